@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark dos codecs de serialização
+
+Compara o custo de codificar/decodificar os payloads de reputação e de
+detalhes de acesso com cada codec de REDIS_CODEC (incluindo a marcação de
+tipo usada pelo RedisService) e o custo de renderizar a resposta HTTP com
+JSONResponse e ORJSONResponse.
+
+Uso:
+    python benchmarks/bench_codecs.py [iterações]
+"""
+
+import os
+import sys
+import timeit
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from src.config.settings import settings
+from src.services.codec import CODECS, decode_value, encode_value, get_codec
+
+PAYLOADS = {
+    "reputation": {
+        "score": 135,
+        "failed_attempts_streak": 0,
+        "last_successful_attempt_ts": 1753371234,
+        "last_failed_attempt_ts": 1753370012,
+        "total_requests": 48,
+        "total_failures": 3,
+    },
+    "access_details": {
+        "data": {
+            "delegatee": "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266",
+            "expires_at": 1753374834,
+            "is_active": True,
+        },
+        "from_cache": True,
+        "ttl": 287,
+    },
+}
+
+def bench(func, number: int) -> float:
+    """Retorna o tempo médio por chamada em microssegundos (melhor de 5)"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("Redis (encode_value/decode_value), µs por operação")
+    print(f"{'payload':<16}{'codec':<10}{'encode':>10}{'decode':>10}{'bytes':>8}")
+    for payload_name, payload in PAYLOADS.items():
+        for codec_name in CODECS:
+            if type(get_codec(codec_name)).__name__ != CODECS[codec_name].__name__:
+                continue  # Dependência opcional ausente
+            settings.REDIS_CODEC = codec_name
+            encoded = encode_value(payload)
+            enc = bench(lambda: encode_value(payload), number)
+            dec = bench(lambda: decode_value(encoded), number)
+            print(f"{payload_name:<16}{codec_name:<10}{enc:>10.2f}{dec:>10.2f}{len(encoded):>8}")
+
+    print("\nResposta HTTP (render), µs por operação")
+    print(f"{'payload':<16}{'classe':<16}{'render':>10}")
+    for payload_name, payload in PAYLOADS.items():
+        for response_class in (JSONResponse, ORJSONResponse):
+            response = response_class(content=None)
+            elapsed = bench(lambda: response.render(payload), number)
+            print(f"{payload_name:<16}{response_class.__name__:<16}{elapsed:>10.2f}")
+
+if __name__ == "__main__":
+    main()
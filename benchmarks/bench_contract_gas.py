@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de gas por item: contrato v1 (uma transação por token) contra v2
+(mintBatch / delegateAccessBatch / revokeAccessBatch)
+
+Compila src/contracts/contract.sol e contract_v2.sol com o solc (py-solc-x),
+implanta os dois em uma EVM local e mede o gasUsed dos recibos. Por padrão
+usa o eth-tester (py-evm, em processo); com --rpc usa um nó local como o
+anvil ou o hardhat node, com contas desbloqueadas.
+
+Requisitos (não fazem parte do requirements.txt do serviço):
+    npm install                        # @openzeppelin/contracts em node_modules
+    pip install py-solc-x "web3[tester]"
+
+Uso:
+    python benchmarks/bench_contract_gas.py [tamanhos...]
+    python benchmarks/bench_contract_gas.py 1 10 50 100
+    python benchmarks/bench_contract_gas.py --rpc http://127.0.0.1:8545 1 10 50
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTRACTS = {
+    "v1": (os.path.join(ROOT, "src", "contracts", "contract.sol"), "IoTAccessNFT"),
+    "v2": (os.path.join(ROOT, "src", "contracts", "contract_v2.sol"), "IoTAccessNFTV2"),
+}
+SOLC_VERSION = "0.8.24"
+TOKEN_URI = "ipfs://bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"
+DURATION = 3600
+
+def compile_contracts() -> dict:
+    """Compila v1 e v2, retornando {versão: (abi, bytecode)}"""
+    import solcx
+
+    if SOLC_VERSION not in {str(v) for v in solcx.get_installed_solc_versions()}:
+        solcx.install_solc(SOLC_VERSION)
+    output = solcx.compile_files(
+        [path for path, _ in CONTRACTS.values()],
+        output_values=["abi", "bin"],
+        solc_version=SOLC_VERSION,
+        allow_paths=[ROOT],
+        optimize=True,
+        optimize_runs=200,
+    )
+    compiled = {}
+    for version, (path, name) in CONTRACTS.items():
+        artifact = output[f"{path}:{name}"]
+        compiled[version] = (artifact["abi"], artifact["bin"])
+    return compiled
+
+def connect(rpc_url: str = None):
+    from web3 import Web3
+
+    if rpc_url:
+        w3 = Web3(Web3.HTTPProvider(rpc_url))
+    else:
+        from web3 import EthereumTesterProvider
+        w3 = Web3(EthereumTesterProvider())
+    if not w3.is_connected():
+        sys.exit(f"❌ EVM local indisponível: {rpc_url}")
+    w3.eth.default_account = w3.eth.accounts[0]
+    return w3
+
+def transact(w3, call) -> int:
+    """Envia a chamada pela conta padrão e retorna o gasUsed"""
+    receipt = w3.eth.wait_for_transaction_receipt(call.transact())
+    if receipt["status"] != 1:
+        raise RuntimeError("transação revertida")
+    return receipt["gasUsed"]
+
+def deploy(w3, abi: list, bytecode: str):
+    factory = w3.eth.contract(abi=abi, bytecode=bytecode)
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor(w3.eth.default_account).transact())
+    return w3.eth.contract(address=receipt["contractAddress"], abi=abi), receipt["gasUsed"]
+
+def measure(w3, compiled: dict, size: int) -> dict:
+    """
+    Gas por item de mint, delegate e revoke para um lote de `size` tokens
+
+    Cada tamanho usa contratos recém-implantados, para que v1 e v2 partam do
+    mesmo estado (slots zerados na primeira escrita custam o mesmo nos dois).
+    """
+    owner = w3.eth.default_account
+    delegatee = w3.eth.accounts[1]
+    v1, _ = deploy(w3, *compiled["v1"])
+    v2, _ = deploy(w3, *compiled["v2"])
+
+    v1_mint = sum(transact(w3, v1.functions.mintNFT(owner, TOKEN_URI)) for _ in range(size))
+    v2_mint = transact(w3, v2.functions.mintBatch([owner] * size, [TOKEN_URI] * size))
+
+    token_ids = list(range(1, size + 1))
+    v1_delegate = sum(transact(w3, v1.functions.delegateAccess(t, delegatee, DURATION)) for t in token_ids)
+    v2_delegate = transact(w3, v2.functions.delegateAccessBatch(token_ids, [delegatee] * size, [DURATION] * size))
+
+    v1_revoke = sum(transact(w3, v1.functions.revokeAccess(t)) for t in token_ids)
+    v2_revoke = transact(w3, v2.functions.revokeAccessBatch(token_ids))
+
+    return {
+        "mint": (v1_mint / size, v2_mint / size),
+        "delegate": (v1_delegate / size, v2_delegate / size),
+        "revoke": (v1_revoke / size, v2_revoke / size),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[1, 10, 50, 100])
+    parser.add_argument("--rpc", help="URL de um nó local (anvil/hardhat); padrão: eth-tester em processo")
+    args = parser.parse_args()
+
+    compiled = compile_contracts()
+    w3 = connect(args.rpc)
+    _, v1_deploy = deploy(w3, *compiled["v1"])
+    _, v2_deploy = deploy(w3, *compiled["v2"])
+    print(f"Deploy: v1 {v1_deploy:,} gas, v2 {v2_deploy:,} gas")
+
+    print(f"{'operação':<10} {'lote':>5} {'v1/item':>10} {'v2/item':>10} {'economia':>9}")
+    for size in args.sizes:
+        for operation, (v1_gas, v2_gas) in measure(w3, compiled, size).items():
+            saving = 1 - v2_gas / v1_gas
+            print(f"{operation:<10} {size:>5} {v1_gas:>10,.0f} {v2_gas:>10,.0f} {saving:>8.1%}")
+
+if __name__ == "__main__":
+    main()
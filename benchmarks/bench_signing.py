@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark de assinatura de transações em lote
+
+Mede assinaturas por segundo do SigningService com pools de threads e de
+processos em vários tamanhos. Não acessa a rede: usa uma chave aleatória e
+transações EIP-1559 sintéticas equivalentes a um delegateAccess.
+
+Uso:
+    python benchmarks/bench_signing.py [quantidade] [tamanhos...]
+    python benchmarks/bench_signing.py 400 1 2 4 8
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account
+from src.services.signing_service import SigningService, sign_transactions
+
+def make_transactions(count: int) -> list:
+    """Gera transações sintéticas com nonces sequenciais"""
+    data = "0x" + "ab" * 100  # Calldata de tamanho semelhante ao delegateAccess
+    return [
+        {
+            "chainId": 137,
+            "nonce": nonce,
+            "to": "0x5FbDB2315678afecb367f032d93F642f64180aa3",
+            "value": 0,
+            "gas": 80_000,
+            "maxFeePerGas": 200 * 10**9,
+            "maxPriorityFeePerGas": 30 * 10**9,
+            "data": data,
+        }
+        for nonce in range(count)
+    ]
+
+async def measure(kind: str, size: int, txs: list, private_key: str) -> float:
+    service = SigningService(kind=kind, size=size)
+    # Aquece o pool (criação de threads/processos não entra na medição)
+    await service.sign_many(txs[:size], private_key)
+    start = time.perf_counter()
+    await service.sign_many(txs, private_key)
+    elapsed = time.perf_counter() - start
+    service.shutdown()
+    return len(txs) / elapsed
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    sizes = [int(s) for s in sys.argv[2:]] or [1, 2, 4, 8]
+    private_key = Account.create().key.hex()
+    txs = make_transactions(count)
+
+    start = time.perf_counter()
+    sign_transactions(txs, private_key)
+    baseline = count / (time.perf_counter() - start)
+
+    print(f"Transações por rodada: {count} | CPUs: {os.cpu_count()}")
+    print(f"{'modo':<10}{'pool':>6}{'assin./s':>12}{'vs. serial':>12}")
+    print(f"{'serial':<10}{'-':>6}{baseline:>12.1f}{1.0:>11.2f}x")
+    for kind in ("thread", "process"):
+        for size in sizes:
+            rate = await measure(kind, size, txs, private_key)
+            print(f"{kind:<10}{size:>6}{rate:>12.1f}{rate / baseline:>11.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,10 @@
-from decouple import config
+import os
+from decouple import Csv, config
 
 class Settings:
     ALCHEMY_API_KEY = config("ALCHEMY_API_KEY")
     CONTRACT_ADDRESS = config("CONTRACT_ADDRESS")
+    CONTRACT_VERSION = config("CONTRACT_VERSION", default=1, cast=int) # 1 = contract.sol, 2 = contract_v2.sol (lotes e eventos)
     MY_ADDRESS = config("MY_ADDRESS")
     PRIVATE_KEY = config("PRIVATE_KEY")  # Armazenar com segurança!
     NETWORK_URL = f"https://polygon-mainnet.g.alchemy.com/v2/{ALCHEMY_API_KEY}"
@@ -15,6 +17,14 @@ class Settings:
     REDIS_DB = config("REDIS_DB", default=0, cast=int)
     REDIS_PASSWORD = config("REDIS_PASSWORD", default=None)
     REDIS_URL = config("REDIS_URL", default=f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}")
+    REDIS_CODEC = config("REDIS_CODEC", default="orjson") # "json", "orjson" ou "msgpack"
+    REDIS_CONNECT_TIMEOUT_SECONDS = config("REDIS_CONNECT_TIMEOUT_SECONDS", default=2.0, cast=float)
+    REDIS_CIRCUIT_FAILURE_THRESHOLD = config("REDIS_CIRCUIT_FAILURE_THRESHOLD", default=3, cast=int)
+    REDIS_HEALTH_CHECK_SECONDS = config("REDIS_HEALTH_CHECK_SECONDS", default=5.0, cast=float)
+    REDIS_FALLBACK_MAX_KEYS = config("REDIS_FALLBACK_MAX_KEYS", default=10000, cast=int) # armazenamento local do modo degradado
+
+    # API Settings
+    API_JSON_CODEC = config("API_JSON_CODEC", default="orjson") # "json" ou "orjson"
 
     # Reputation System Settings
     REPUTATION_INITIAL_SCORE = config("REPUTATION_INITIAL_SCORE", default=100, cast=int)
@@ -23,10 +33,136 @@ class Settings:
     REPUTATION_MAX_FAILED_STREAK = config("REPUTATION_MAX_FAILED_STREAK", default=3, cast=int)
     REPUTATION_BAN_THRESHOLD_SCORE = config("REPUTATION_BAN_THRESHOLD_SCORE", default=50, cast=int)
     REPUTATION_BAN_DURATION_SECONDS = config("REPUTATION_BAN_DURATION_SECONDS", default=300, cast=int) # 5 minutos
-    
-print("Settings loaded successfully.")
-print("Contract Address:", Settings.CONTRACT_ADDRESS)
-print("My Address:", Settings.MY_ADDRESS)
-print("Network URL:", Settings.NETWORK_URL)
+    REPUTATION_WRITE_BEHIND_ENABLED = config("REPUTATION_WRITE_BEHIND_ENABLED", default=False, cast=bool)
+    REPUTATION_FLUSH_INTERVAL_MS = config("REPUTATION_FLUSH_INTERVAL_MS", default=500, cast=int)
+    REPUTATION_FLUSH_MAX_ENTRIES = config("REPUTATION_FLUSH_MAX_ENTRIES", default=1000, cast=int)
+
+    # Ban Filter Settings (filtro de Bloom local das carteiras banidas)
+    BAN_FILTER_ENABLED = config("BAN_FILTER_ENABLED", default=True, cast=bool)
+    BAN_FILTER_CAPACITY = config("BAN_FILTER_CAPACITY", default=10000, cast=int)
+    BAN_FILTER_ERROR_RATE = config("BAN_FILTER_ERROR_RATE", default=0.001, cast=float)
+    BAN_FILTER_REBUILD_SECONDS = config("BAN_FILTER_REBUILD_SECONDS", default=60, cast=int)
+
+    # Rate Limit Settings (token bucket por carteira e por IP)
+    RATE_LIMIT_ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+    RATE_LIMIT_WALLET_CAPACITY = config("RATE_LIMIT_WALLET_CAPACITY", default=30, cast=int)
+    RATE_LIMIT_WALLET_REFILL_PER_SECOND = config("RATE_LIMIT_WALLET_REFILL_PER_SECOND", default=0.5, cast=float)
+    RATE_LIMIT_IP_CAPACITY = config("RATE_LIMIT_IP_CAPACITY", default=120, cast=int)
+    RATE_LIMIT_IP_REFILL_PER_SECOND = config("RATE_LIMIT_IP_REFILL_PER_SECOND", default=2.0, cast=float)
+
+    # Audit Settings (trilha de auditoria das decisões de /access)
+    AUDIT_ENABLED = config("AUDIT_ENABLED", default=True, cast=bool)
+    AUDIT_FLUSH_INTERVAL_MS = config("AUDIT_FLUSH_INTERVAL_MS", default=1000, cast=int)
+    AUDIT_BATCH_SIZE = config("AUDIT_BATCH_SIZE", default=500, cast=int)
+    AUDIT_QUEUE_MAX = config("AUDIT_QUEUE_MAX", default=100000, cast=int)
+    AUDIT_STREAM_MAXLEN = config("AUDIT_STREAM_MAXLEN", default=1000000, cast=int)
+    AUDIT_INDEX_MAXLEN = config("AUDIT_INDEX_MAXLEN", default=10000, cast=int)
+    AUDIT_INDEX_TTL_SECONDS = config("AUDIT_INDEX_TTL_SECONDS", default=2592000, cast=int) # 30 dias
+
+    # Receipt Tracking Settings
+    RECEIPT_CONFIRMATION_DEPTH = config("RECEIPT_CONFIRMATION_DEPTH", default=5, cast=int)
+    RECEIPT_POLL_INTERVAL_SECONDS = config("RECEIPT_POLL_INTERVAL_SECONDS", default=2.0, cast=float)
+    RECEIPT_TRACKING_TIMEOUT_SECONDS = config("RECEIPT_TRACKING_TIMEOUT_SECONDS", default=1800, cast=int) # 30 minutos
+
+    # Token Index Settings (maior id de token criado)
+    TOKEN_INDEX_REFRESH_SECONDS = config("TOKEN_INDEX_REFRESH_SECONDS", default=15, cast=int)
+    TOKEN_INDEX_LOG_CHUNK_BLOCKS = config("TOKEN_INDEX_LOG_CHUNK_BLOCKS", default=2000, cast=int)
+    TOKEN_INDEX_PROBE_WINDOW = config("TOKEN_INDEX_PROBE_WINDOW", default=1000, cast=int) # ids acima do máximo confirmados na rede
+    TOKEN_INDEX_MISSING_TTL_SECONDS = config("TOKEN_INDEX_MISSING_TTL_SECONDS", default=2.0, cast=float)
+
+    # Fee Bump Settings (substituição de transações presas)
+    FEE_BUMP_ENABLED = config("FEE_BUMP_ENABLED", default=True, cast=bool)
+    STUCK_TX_THRESHOLD_SECONDS = config("STUCK_TX_THRESHOLD_SECONDS", default=60, cast=int)
+    FEE_BUMP_CHECK_INTERVAL_SECONDS = config("FEE_BUMP_CHECK_INTERVAL_SECONDS", default=10.0, cast=float)
+    FEE_BUMP_PERCENT = config("FEE_BUMP_PERCENT", default=12.5, cast=float) # nós exigem no mínimo 10%
+    FEE_BUMP_MAX_FEE_GWEI = config("FEE_BUMP_MAX_FEE_GWEI", default=1000, cast=float)
+    FEE_BUMP_MAX_ATTEMPTS = config("FEE_BUMP_MAX_ATTEMPTS", default=5, cast=int)
+
+    # Signing Pool Settings
+    SIGNING_POOL_KIND = config("SIGNING_POOL_KIND", default="thread") # "thread" ou "process"
+    SIGNING_POOL_SIZE = config("SIGNING_POOL_SIZE", default=os.cpu_count() or 1, cast=int)
+
+    # Batch Write Settings (endpoints /mint-nft/batch, /delegate-access/batch e /revoke-access/batch)
+    BATCH_MAX_ITEMS = config("BATCH_MAX_ITEMS", default=500, cast=int) # no contrato v2, uma transação a cada MAX_BATCH_SIZE (200) itens
+
+    # Snapshot Settings (leitura em massa de /tokens/snapshot)
+    SNAPSHOT_CHUNK_SIZE = config("SNAPSHOT_CHUNK_SIZE", default=100, cast=int) # tokens por lote JSON-RPC (3 eth_call cada)
+    SNAPSHOT_RETRIES = config("SNAPSHOT_RETRIES", default=2, cast=int) # novas tentativas de um lote com erro do provedor
+
+    # Access Events Settings (push de mudanças de acesso via SSE)
+    SSE_CLIENT_QUEUE_SIZE = config("SSE_CLIENT_QUEUE_SIZE", default=100, cast=int)
+    SSE_HEARTBEAT_SECONDS = config("SSE_HEARTBEAT_SECONDS", default=15.0, cast=float)
+    SSE_MAX_TOKENS_PER_CLIENT = config("SSE_MAX_TOKENS_PER_CLIENT", default=100, cast=int)
+
+    # Access Cache Settings (invalidação entre workers via pub/sub)
+    ACCESS_CACHE_TTL_SECONDS = config("ACCESS_CACHE_TTL_SECONDS", default=300, cast=int) # limita o atraso de delegações feitas fora do serviço
+    ACCESS_CACHE_LOCAL_TTL_SECONDS = config("ACCESS_CACHE_LOCAL_TTL_SECONDS", default=30, cast=int)
+    ACCESS_CACHE_LOCAL_SIZE = config("ACCESS_CACHE_LOCAL_SIZE", default=10000, cast=int)
+    ACCESS_CACHE_STALE_SECONDS = config("ACCESS_CACHE_STALE_SECONDS", default=86400, cast=int) # cópia servida quando a rota descarta carga
+
+    # JSON-RPC HTTP Settings (sessão compartilhada por todas as chamadas à rede)
+    RPC_POOL_CONNECTIONS = config("RPC_POOL_CONNECTIONS", default=4, cast=int) # hosts distintos
+    RPC_POOL_MAXSIZE = config("RPC_POOL_MAXSIZE", default=32, cast=int) # conexões por host
+    RPC_POOL_BLOCK = config("RPC_POOL_BLOCK", default=False, cast=bool)
+    RPC_TCP_KEEPALIVE = config("RPC_TCP_KEEPALIVE", default=True, cast=bool)
+    RPC_KEEPALIVE_IDLE_SECONDS = config("RPC_KEEPALIVE_IDLE_SECONDS", default=30, cast=int)
+    RPC_GZIP_REQUESTS = config("RPC_GZIP_REQUESTS", default=False, cast=bool) # só se o provedor aceitar
+    RPC_GZIP_MIN_BYTES = config("RPC_GZIP_MIN_BYTES", default=2048, cast=int)
+    RPC_CONNECT_TIMEOUT_SECONDS = config("RPC_CONNECT_TIMEOUT_SECONDS", default=3.05, cast=float)
+    RPC_READ_TIMEOUT_SECONDS = config("RPC_READ_TIMEOUT_SECONDS", default=10.0, cast=float)
+    RPC_METHOD_TIMEOUTS = config("RPC_METHOD_TIMEOUTS", default="eth_getLogs=30,eth_sendRawTransaction=20", cast=Csv())
+    RPC_RETRIES = config("RPC_RETRIES", default=2, cast=int)
+    RPC_RETRY_BACKOFF_SECONDS = config("RPC_RETRY_BACKOFF_SECONDS", default=0.2, cast=float)
+    RPC_RETRY_STATUS = config("RPC_RETRY_STATUS", default="429,502,503,504", cast=Csv(int))
+    RPC_NO_RETRY_METHODS = config("RPC_NO_RETRY_METHODS", default="eth_sendRawTransaction,eth_sendTransaction", cast=Csv())
+
+    # RPC Scheduler Settings (orçamento de compute units do provedor)
+    RPC_SCHEDULER_ENABLED = config("RPC_SCHEDULER_ENABLED", default=True, cast=bool)
+    RPC_CU_PER_SECOND = config("RPC_CU_PER_SECOND", default=330, cast=int) # limite do plano gratuito do Alchemy
+    RPC_CU_BURST = config("RPC_CU_BURST", default=660, cast=int)
+    RPC_QUEUE_MAX_INTERACTIVE = config("RPC_QUEUE_MAX_INTERACTIVE", default=200, cast=int)
+    RPC_QUEUE_MAX_WRITE = config("RPC_QUEUE_MAX_WRITE", default=100, cast=int)
+    RPC_QUEUE_MAX_BACKGROUND = config("RPC_QUEUE_MAX_BACKGROUND", default=50, cast=int)
+    RPC_QUEUE_TIMEOUT_INTERACTIVE = config("RPC_QUEUE_TIMEOUT_INTERACTIVE", default=2.0, cast=float)
+    RPC_QUEUE_TIMEOUT_WRITE = config("RPC_QUEUE_TIMEOUT_WRITE", default=10.0, cast=float)
+    RPC_QUEUE_TIMEOUT_BACKGROUND = config("RPC_QUEUE_TIMEOUT_BACKGROUND", default=30.0, cast=float)
+
+    # Profiling Settings (perfilamento sob demanda de requisições)
+    ADMIN_TOKEN = config("ADMIN_TOKEN", default=None) # exigido pelos endpoints /admin
+    PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool) # desligado: nenhum middleware instalado
+    PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0.0, cast=float) # fração das requisições perfiladas
+    PROFILING_INTERVAL_SECONDS = config("PROFILING_INTERVAL_SECONDS", default=0.001, cast=float)
+    PROFILING_STORAGE = config("PROFILING_STORAGE", default="redis") # "redis" ou "disk"
+    PROFILING_DIR = config("PROFILING_DIR", default="profiles")
+    PROFILING_TTL_SECONDS = config("PROFILING_TTL_SECONDS", default=86400, cast=int) # 1 dia
+    PROFILING_MAX_STORED = config("PROFILING_MAX_STORED", default=200, cast=int)
+
+    # Admission Control Settings (limite adaptativo de requisições em andamento por rota)
+    ADMISSION_CONTROL_ENABLED = config("ADMISSION_CONTROL_ENABLED", default=True, cast=bool)
+    ADMISSION_INITIAL_LIMIT = config("ADMISSION_INITIAL_LIMIT", default=20, cast=int)
+    ADMISSION_MIN_LIMIT = config("ADMISSION_MIN_LIMIT", default=2, cast=int)
+    ADMISSION_MAX_LIMIT = config("ADMISSION_MAX_LIMIT", default=200, cast=int)
+    ADMISSION_BACKOFF_RATIO = config("ADMISSION_BACKOFF_RATIO", default=0.9, cast=float) # redução em latência alta ou falha
+    ADMISSION_READ_LATENCY_TARGET_SECONDS = config("ADMISSION_READ_LATENCY_TARGET_SECONDS", default=1.0, cast=float)
+    ADMISSION_WRITE_LATENCY_TARGET_SECONDS = config("ADMISSION_WRITE_LATENCY_TARGET_SECONDS", default=5.0, cast=float)
+
+    # Access Ticket Settings (tickets assinados para verificação offline nos dispositivos)
+    TICKET_SIGNING_KEY = config("TICKET_SIGNING_KEY", default=None) # chave própria do emissor; sem ela a emissão fica desligada
+    TICKET_MAX_TTL_SECONDS = config("TICKET_MAX_TTL_SECONDS", default=300, cast=int)
+    TICKET_CHAIN_ID = config("TICKET_CHAIN_ID", default=137, cast=int) # domínio EIP-712 (Polygon)
+
+    # Measurement Settings (custo e latência de cada transação, em arquivo colunar)
+    MEASUREMENT_ENABLED = config("MEASUREMENT_ENABLED", default=True, cast=bool)
+    MEASUREMENT_DIR = config("MEASUREMENT_DIR", default="measurements")
+    MEASUREMENT_NETWORK = config("MEASUREMENT_NETWORK", default="Polygon") # rótulo da rede nos gráficos
+    MEASUREMENT_NATIVE_TOKEN_USD = config("MEASUREMENT_NATIVE_TOKEN_USD", default=0.0, cast=float) # 0 = desconhecido (cost_usd = NaN)
+    MEASUREMENT_FLUSH_SECONDS = config("MEASUREMENT_FLUSH_SECONDS", default=5.0, cast=float)
+    MEASUREMENT_BUFFER_MAX = config("MEASUREMENT_BUFFER_MAX", default=100000, cast=int) # linhas em memória se a gravação falhar; as mais antigas são descartadas
+
+    # Idempotency Settings (cabeçalho Idempotency-Key nos endpoints de escrita)
+    IDEMPOTENCY_ENABLED = config("IDEMPOTENCY_ENABLED", default=True, cast=bool)
+    IDEMPOTENCY_TTL_SECONDS = config("IDEMPOTENCY_TTL_SECONDS", default=86400, cast=int) # retenção do resultado (1 dia)
+    IDEMPOTENCY_LOCK_SECONDS = config("IDEMPOTENCY_LOCK_SECONDS", default=120, cast=int) # reserva de uma requisição em andamento
+    IDEMPOTENCY_WAIT_SECONDS = config("IDEMPOTENCY_WAIT_SECONDS", default=30.0, cast=float) # espera máxima de uma duplicata
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,365 @@
+# ABI do contrato IoTAccessNFT em forma de módulo Python.
+#
+# Gerado a partir de IoTAccessNFT.json (saída do compilador). Como módulo, a ABI
+# é compilada para bytecode (.pyc) e carregada uma única vez no import, sem
+# parse de JSON e sem depender do diretório de trabalho. Regenere este arquivo
+# sempre que IoTAccessNFT.json for atualizado.
+
+abi = [
+    {
+        "inputs": [
+            {"internalType": "address", "name": "initialOwner", "type": "address"},
+        ],
+        "stateMutability": "nonpayable",
+        "type": "constructor",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "sender", "type": "address"},
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+            {"internalType": "address", "name": "owner", "type": "address"},
+        ],
+        "name": "ERC721IncorrectOwner",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "operator", "type": "address"},
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "ERC721InsufficientApproval",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "approver", "type": "address"},
+        ],
+        "name": "ERC721InvalidApprover",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "operator", "type": "address"},
+        ],
+        "name": "ERC721InvalidOperator",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "owner", "type": "address"},
+        ],
+        "name": "ERC721InvalidOwner",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "receiver", "type": "address"},
+        ],
+        "name": "ERC721InvalidReceiver",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "sender", "type": "address"},
+        ],
+        "name": "ERC721InvalidSender",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "ERC721NonexistentToken",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "owner", "type": "address"},
+        ],
+        "name": "OwnableInvalidOwner",
+        "type": "error",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "account", "type": "address"},
+        ],
+        "name": "OwnableUnauthorizedAccount",
+        "type": "error",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "address", "name": "owner", "type": "address"},
+            {"indexed": True, "internalType": "address", "name": "approved", "type": "address"},
+            {"indexed": True, "internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "Approval",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "address", "name": "owner", "type": "address"},
+            {"indexed": True, "internalType": "address", "name": "operator", "type": "address"},
+            {"indexed": False, "internalType": "bool", "name": "approved", "type": "bool"},
+        ],
+        "name": "ApprovalForAll",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "internalType": "uint256", "name": "_fromTokenId", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "_toTokenId", "type": "uint256"},
+        ],
+        "name": "BatchMetadataUpdate",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "internalType": "uint256", "name": "_tokenId", "type": "uint256"},
+        ],
+        "name": "MetadataUpdate",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "address", "name": "previousOwner", "type": "address"},
+            {"indexed": True, "internalType": "address", "name": "newOwner", "type": "address"},
+        ],
+        "name": "OwnershipTransferred",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "address", "name": "from", "type": "address"},
+            {"indexed": True, "internalType": "address", "name": "to", "type": "address"},
+            {"indexed": True, "internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "Transfer",
+        "type": "event",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+        ],
+        "name": "accessControl",
+        "outputs": [
+            {"internalType": "address", "name": "delegatee", "type": "address"},
+            {"internalType": "uint256", "name": "expiresAt", "type": "uint256"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "to", "type": "address"},
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "approve",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "owner", "type": "address"},
+        ],
+        "name": "balanceOf",
+        "outputs": [
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+            {"internalType": "address", "name": "delegatee", "type": "address"},
+            {"internalType": "uint256", "name": "duration", "type": "uint256"},
+        ],
+        "name": "delegateAccess",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "getApproved",
+        "outputs": [
+            {"internalType": "address", "name": "", "type": "address"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+            {"internalType": "address", "name": "user", "type": "address"},
+        ],
+        "name": "hasAccess",
+        "outputs": [
+            {"internalType": "bool", "name": "", "type": "bool"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "owner", "type": "address"},
+            {"internalType": "address", "name": "operator", "type": "address"},
+        ],
+        "name": "isApprovedForAll",
+        "outputs": [
+            {"internalType": "bool", "name": "", "type": "bool"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "recipient", "type": "address"},
+            {"internalType": "string", "name": "tokenURI", "type": "string"},
+        ],
+        "name": "mintNFT",
+        "outputs": [
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+        ],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "name",
+        "outputs": [
+            {"internalType": "string", "name": "", "type": "string"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "owner",
+        "outputs": [
+            {"internalType": "address", "name": "", "type": "address"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "ownerOf",
+        "outputs": [
+            {"internalType": "address", "name": "", "type": "address"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "renounceOwnership",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "revokeAccess",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "from", "type": "address"},
+            {"internalType": "address", "name": "to", "type": "address"},
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "safeTransferFrom",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "from", "type": "address"},
+            {"internalType": "address", "name": "to", "type": "address"},
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+            {"internalType": "bytes", "name": "data", "type": "bytes"},
+        ],
+        "name": "safeTransferFrom",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "operator", "type": "address"},
+            {"internalType": "bool", "name": "approved", "type": "bool"},
+        ],
+        "name": "setApprovalForAll",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "bytes4", "name": "interfaceId", "type": "bytes4"},
+        ],
+        "name": "supportsInterface",
+        "outputs": [
+            {"internalType": "bool", "name": "", "type": "bool"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "symbol",
+        "outputs": [
+            {"internalType": "string", "name": "", "type": "string"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "tokenURI",
+        "outputs": [
+            {"internalType": "string", "name": "", "type": "string"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "from", "type": "address"},
+            {"internalType": "address", "name": "to", "type": "address"},
+            {"internalType": "uint256", "name": "tokenId", "type": "uint256"},
+        ],
+        "name": "transferFrom",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "newOwner", "type": "address"},
+        ],
+        "name": "transferOwnership",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+]
@@ -0,0 +1,216 @@
+import gzip
+import json
+import socket
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from web3 import Web3
+from web3.middleware import geth_poa_middleware
+from web3.providers.rpc import HTTPProvider
+from src.config.settings import settings
+from src.contracts.rpc_scheduler import compute_units, rpc_scheduler
+
+class _RPCAdapter(HTTPAdapter):
+    """Adaptador HTTP com keep-alive de TCP nas conexões do pool"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        if settings.RPC_TCP_KEEPALIVE:
+            options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                options += [
+                    (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, settings.RPC_KEEPALIVE_IDLE_SECONDS),
+                    (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, settings.RPC_KEEPALIVE_IDLE_SECONDS),
+                ]
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + options
+        super().init_poolmanager(*args, **kwargs)
+
+class RPCStats:
+    """Contadores por método JSON-RPC (as chamadas vêm de várias threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.methods: dict = {}
+
+    def record(self, method: str, elapsed: float, retries: int, error: bool):
+        with self._lock:
+            counters = self.methods.setdefault(method, {"calls": 0, "errors": 0, "retries": 0, "total_seconds": 0.0})
+            counters["calls"] += 1
+            counters["retries"] += retries
+            counters["errors"] += int(error)
+            counters["total_seconds"] += elapsed
+
+rpc_stats = RPCStats()
+
+# Marcador de envio da requisição atual: quem precisa saber se uma transação
+# pode ter saído (idempotency_service) instala um dict e `rpc_post` marca
+# "submitted" antes de postar um método de RPC_NO_RETRY_METHODS. Como
+# asyncio.to_thread e create_task copiam o contexto, o mesmo dict é visto
+# nas threads de trabalho.
+submission_marker: ContextVar[Optional[dict]] = ContextVar("submission_marker", default=None)
+
+@lru_cache(maxsize=None)
+def _method_timeouts() -> dict:
+    """Lê RPC_METHOD_TIMEOUTS ("metodo=segundos,...")"""
+    timeouts = {}
+    for item in settings.RPC_METHOD_TIMEOUTS:
+        method, _, seconds = item.partition("=")
+        timeouts[method.strip()] = float(seconds)
+    return timeouts
+
+def _timeout_for(methods: list) -> tuple:
+    read_timeout = max(_method_timeouts().get(method, settings.RPC_READ_TIMEOUT_SECONDS) for method in methods)
+    return settings.RPC_CONNECT_TIMEOUT_SECONDS, read_timeout
+
+@lru_cache(maxsize=None)
+def _get_session() -> requests.Session:
+    """
+    Sessão HTTP única do processo para todas as chamadas JSON-RPC.
+
+    O web3 mantém uma sessão por thread; como as chamadas síncronas rodam
+    em threads do asyncio.to_thread, isso multiplicava conexões e handshakes
+    TLS. Aqui todas as threads compartilham o mesmo pool (o urllib3 é
+    thread-safe) e as tentativas ficam a cargo de `rpc_post`.
+    """
+    session = requests.Session()
+    adapter = _RPCAdapter(
+        pool_connections=settings.RPC_POOL_CONNECTIONS,
+        pool_maxsize=settings.RPC_POOL_MAXSIZE,
+        pool_block=settings.RPC_POOL_BLOCK,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+    })
+    return session
+
+def rpc_post(data: bytes, methods: list) -> bytes:
+    """
+    Envia um corpo JSON-RPC (chamada única ou lote) pela sessão compartilhada
+
+    Cada tentativa passa antes pelo rpc_scheduler (orçamento de compute
+    units por prioridade). Timeout de leitura: o maior entre os métodos do
+    corpo. Tentativas com backoff exponencial em erros de conexão, timeouts
+    e status transitórios;
+    métodos de RPC_NO_RETRY_METHODS só são repetidos se a conexão nem chegou
+    a ser aberta (o pedido não saiu).
+    """
+    retryable = not any(method in settings.RPC_NO_RETRY_METHODS for method in methods)
+    headers = {}
+    if settings.RPC_GZIP_REQUESTS and len(data) >= settings.RPC_GZIP_MIN_BYTES:
+        data = gzip.compress(data)
+        headers["Content-Encoding"] = "gzip"
+
+    name = methods[0] if len(methods) == 1 else "batch"
+    cost = compute_units(methods)
+    start = time.time()
+    attempt = 0
+    while True:
+        # Cada tentativa consome orçamento do provedor
+        rpc_scheduler.acquire(cost)
+        marker = submission_marker.get()
+        if not retryable and marker is not None:
+            # A partir daqui o nó pode ter recebido a transação, mesmo que a resposta não chegue
+            marker["submitted"] = True
+        try:
+            response = _get_session().post(
+                settings.NETWORK_URL, data=data, headers=headers, timeout=_timeout_for(methods)
+            )
+            if response.status_code == 429:
+                rpc_scheduler.penalize()
+            if response.status_code in settings.RPC_RETRY_STATUS and retryable and attempt < settings.RPC_RETRIES:
+                raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            response.raise_for_status()
+            rpc_stats.record(name, time.time() - start, attempt, False)
+            return response.content
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            can_retry = retryable or isinstance(e, requests.ConnectTimeout)
+            if not can_retry or attempt >= settings.RPC_RETRIES or (
+                isinstance(e, requests.HTTPError) and e.response.status_code not in settings.RPC_RETRY_STATUS
+            ):
+                rpc_stats.record(name, time.time() - start, attempt, True)
+                raise
+        time.sleep(settings.RPC_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        attempt += 1
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTPProvider que usa a sessão compartilhada e a política de `rpc_post`"""
+
+    # As tentativas ficam em rpc_post (por método), não no middleware do web3
+    _middlewares = ()
+
+    def make_request(self, method, params: Any):
+        request_data = self.encode_rpc_request(method, params)
+        return self.decode_rpc_response(rpc_post(request_data, [method]))
+
+@lru_cache(maxsize=None)
+def get_web3() -> Web3:
+    """
+    Retorna o cliente Web3 compartilhado por todo o processo.
+
+    É criado sob demanda na primeira chamada (nenhum I/O no import) e
+    reutilizado pelo contrato, pelo serviço de gás e pelas tarefas em
+    segundo plano.
+    """
+    w3 = Web3(PooledHTTPProvider(settings.NETWORK_URL))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return w3
+
+def batch_rpc_responses(calls: list) -> list:
+    """
+    Executa várias chamadas JSON-RPC em uma única requisição HTTP (lote)
+
+    Args:
+        calls: Lista de tuplas (método, parâmetros)
+
+    Returns:
+        Respostas na mesma ordem das chamadas, cada uma com "result" ou
+        "error" (um item ausente no lote vira um erro sem código)
+    """
+    if not calls:
+        return []
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    body = json.loads(rpc_post(json.dumps(payload).encode(), [method for method, _ in calls]))
+    if isinstance(body, dict):
+        # O provedor rejeitou o lote inteiro
+        raise RuntimeError(body.get("error", body))
+    by_id = {item.get("id"): item for item in body}
+    return [by_id.get(i) or {"error": {"message": "sem resposta no lote"}} for i in range(len(calls))]
+
+def batch_rpc(calls: list) -> list:
+    """
+    Executa várias chamadas JSON-RPC em uma única requisição HTTP (lote)
+
+    Returns:
+        Lista de resultados na mesma ordem das chamadas (None em caso de erro)
+    """
+    return [response.get("result") for response in batch_rpc_responses(calls)]
+
+def is_revert(error: dict) -> bool:
+    """Indica se o erro de um eth_call é uma reversão do contrato (e não falha do provedor)"""
+    return error.get("code") == 3 or "revert" in str(error.get("message", "")).lower()
+
+def connection_stats() -> dict:
+    """Reaproveitamento de conexões do pool e contadores por método"""
+    pools = []
+    adapter = _get_session().get_adapter(settings.NETWORK_URL)
+    for key in adapter.poolmanager.pools.keys():
+        pool = adapter.poolmanager.pools[key]
+        pools.append({
+            "host": pool.host,
+            "connections_opened": pool.num_connections,
+            "requests": pool.num_requests,
+            "reuse_ratio": 1 - pool.num_connections / pool.num_requests if pool.num_requests else None,
+            "pool_maxsize": pool.pool.maxsize if pool.pool else 0,
+        })
+    return {"pools": pools, "methods": rpc_stats.methods}
@@ -0,0 +1,131 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "../../node_modules/@openzeppelin/contracts/token/ERC721/extensions/ERC721URIStorage.sol";
+import "../../node_modules/@openzeppelin/contracts/access/Ownable.sol";
+
+// Versão 2: mesmas funções e armazenamento da v1, mais operações em lote
+// e eventos de delegação/revogação para indexação off-chain
+contract IoTAccessNFTV2 is ERC721URIStorage, Ownable {
+    uint256 private _tokenIds;
+
+    // Limite de itens por chamada em lote (mantém cada transação abaixo do gas limit do bloco)
+    uint256 public constant MAX_BATCH_SIZE = 200;
+
+    struct Access {
+        address delegatee;
+        uint256 expiresAt; // Timestamp de expiração da permissão
+    }
+
+    // Mapeamento de NFT para permissões delegadas
+    mapping(uint256 => Access) public accessControl;
+
+    event AccessDelegated(uint256 indexed tokenId, address indexed delegatee, uint256 expiresAt);
+    event AccessRevoked(uint256 indexed tokenId, address indexed delegatee);
+
+    constructor(
+        address initialOwner
+    ) ERC721("IoTAccessNFT", "IOTNFT") Ownable(initialOwner) {}
+
+    // Função para criar um NFT associado a um dispositivo IoT
+    function mintNFT(
+        address recipient,
+        string memory _tokenURI
+    ) public onlyOwner returns (uint256) {
+        return _mintWithURI(recipient, _tokenURI);
+    }
+
+    // Cria vários NFTs em uma transação; os ids são sequenciais a partir de firstId
+    function mintBatch(
+        address[] calldata recipients,
+        string[] calldata tokenURIs
+    ) external onlyOwner returns (uint256 firstId) {
+        require(recipients.length == tokenURIs.length, "Tamanhos diferentes");
+        require(recipients.length > 0 && recipients.length <= MAX_BATCH_SIZE, "Tamanho de lote invalido");
+        firstId = _tokenIds + 1;
+        for (uint256 i = 0; i < recipients.length; i++) {
+            _mintWithURI(recipients[i], tokenURIs[i]);
+        }
+    }
+
+    // Função para delegar acesso temporário a outro usuário
+    function delegateAccess(
+        uint256 tokenId,
+        address delegatee,
+        uint256 duration
+    ) public {
+        _delegate(tokenId, delegatee, duration);
+    }
+
+    // Delega vários tokens em uma transação (reverte inteira se qualquer item for inválido)
+    function delegateAccessBatch(
+        uint256[] calldata tokenIds,
+        address[] calldata delegatees,
+        uint256[] calldata durations
+    ) external {
+        require(
+            tokenIds.length == delegatees.length && tokenIds.length == durations.length,
+            "Tamanhos diferentes"
+        );
+        require(tokenIds.length > 0 && tokenIds.length <= MAX_BATCH_SIZE, "Tamanho de lote invalido");
+        for (uint256 i = 0; i < tokenIds.length; i++) {
+            _delegate(tokenIds[i], delegatees[i], durations[i]);
+        }
+    }
+
+    // Função para verificar se um usuário tem acesso ao dispositivo
+    function hasAccess(
+        uint256 tokenId,
+        address user
+    ) public view returns (bool) {
+        if (ownerOf(tokenId) == user) {
+            return true; // O dono do NFT tem acesso
+        }
+        Access memory access = accessControl[tokenId];
+        // Adiciona uma margem de segurança ao usar block.timestamp
+        uint256 safeTimestamp = block.timestamp + 30;
+        if (access.delegatee == user && safeTimestamp < access.expiresAt) {
+            return true; // Usuário delegado ainda tem acesso válido
+        }
+        return false;
+    }
+
+    // Função para revogar acesso antes do tempo de expiração
+    function revokeAccess(uint256 tokenId) public {
+        _revoke(tokenId);
+    }
+
+    // Revoga vários tokens em uma transação
+    function revokeAccessBatch(uint256[] calldata tokenIds) external {
+        require(tokenIds.length > 0 && tokenIds.length <= MAX_BATCH_SIZE, "Tamanho de lote invalido");
+        for (uint256 i = 0; i < tokenIds.length; i++) {
+            _revoke(tokenIds[i]);
+        }
+    }
+
+    function _mintWithURI(address recipient, string memory _tokenURI) internal returns (uint256) {
+        _tokenIds++;
+        uint256 newItemId = _tokenIds;
+        _mint(recipient, newItemId);
+        _setTokenURI(newItemId, _tokenURI);
+        return newItemId;
+    }
+
+    function _delegate(uint256 tokenId, address delegatee, uint256 duration) internal {
+        require(
+            ownerOf(tokenId) == msg.sender,
+            "Somente o dono pode delegar acesso"
+        );
+        require(delegatee != address(0), "Delegado invalido");
+        uint256 expiresAt = block.timestamp + duration;
+        accessControl[tokenId] = Access(delegatee, expiresAt);
+        emit AccessDelegated(tokenId, delegatee, expiresAt);
+    }
+
+    function _revoke(uint256 tokenId) internal {
+        require(ownerOf(tokenId) == msg.sender, "Somente o dono pode revogar");
+        address delegatee = accessControl[tokenId].delegatee;
+        delete accessControl[tokenId];
+        emit AccessRevoked(tokenId, delegatee);
+    }
+}
@@ -1,45 +1,161 @@
-import json
+import threading
 import time
+from typing import Optional
 from web3 import Web3
-from web3.middleware import geth_poa_middleware
 from src.config.settings import settings
+from src.contracts.abis import iot_access_nft_abi, iot_access_nft_v2_abi
+from src.contracts.chain_client import get_web3
+from src.contracts.rpc_scheduler import RPCBudgetExceeded
+
+# ABI de cada versão implantada do contrato (CONTRACT_VERSION)
+CONTRACT_ABIS = {
+    1: iot_access_nft_abi.abi,
+    2: iot_access_nft_v2_abi.abi,
+}
+
+# Limite de itens por chamada de lote do contrato v2 (MAX_BATCH_SIZE em contract_v2.sol)
+MAX_BATCH_SIZE = 200
+
+# keccak256 das assinaturas dos eventos de acesso do contrato v2
+ACCESS_DELEGATED_TOPIC = Web3.keccak(text="AccessDelegated(uint256,address,uint256)").hex()
+ACCESS_REVOKED_TOPIC = Web3.keccak(text="AccessRevoked(uint256,address)").hex()
+ACCESS_TOPICS = (ACCESS_DELEGATED_TOPIC, ACCESS_REVOKED_TOPIC)
+
+def parse_access_events(logs: list) -> list:
+    """
+    Extrai os eventos AccessDelegated/AccessRevoked de logs JSON-RPC (recibos ou eth_getLogs)
+
+    Returns:
+        Lista de dicts {"event", "token_id", "delegatee", "expires_at",
+        "block", "tx_hash"} na ordem dos logs (expires_at é None na revogação)
+    """
+    events = []
+    for log in logs:
+        topics = [topic.lower() for topic in log.get("topics", [])]
+        if len(topics) != 3 or topics[0] not in ACCESS_TOPICS:
+            continue
+        delegated = topics[0] == ACCESS_DELEGATED_TOPIC
+        events.append({
+            "event": "AccessDelegated" if delegated else "AccessRevoked",
+            "token_id": int(topics[1], 16),
+            "delegatee": Web3.to_checksum_address("0x" + topics[2][-40:]),
+            "expires_at": int(log["data"], 16) if delegated else None,
+            "block": int(log["blockNumber"], 16) if log.get("blockNumber") else None,
+            "tx_hash": log.get("transactionHash"),
+        })
+    return events
+
+class NonceAllocator:
+    """
+    Nonces da conta do serviço, compartilhados pelos envios individuais e em lote
+
+    Cada reserva parte do maior entre o contador "pending" do nó e o próximo
+    nonce já entregue localmente, então transações montadas ao mesmo tempo
+    (ainda não vistas pelo nó) nunca recebem o mesmo nonce.
+    """
+
+    def __init__(self, w3: Web3):
+        self.w3 = w3
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+
+    def reserve(self, count: int = 1) -> int:
+        """Reserva `count` nonces consecutivos e retorna o primeiro"""
+        with self._lock:
+            pending = self.w3.eth.get_transaction_count(settings.MY_ADDRESS, "pending")
+            start = pending if self._next is None else max(self._next, pending)
+            self._next = start + count
+            return start
+
+    def release(self, nonce: int):
+        """
+        Devolve um nonce reservado que não foi enviado
+
+        Se for o último entregue, volta a ser o próximo; senão ficou uma
+        lacuna e a próxima reserva ressincroniza com o contador do nó.
+        """
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+            else:
+                self._next = None
 
 class IoTAccessNFT:
-    def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(settings.NETWORK_URL))
-        with open("src/contracts/abis/IoTAccessNFT.json") as f:
-            abi = json.load(f)
-        
-        self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-            
+    def __init__(self, w3: Web3 = None, version: int = None):
+        self.w3 = w3 or get_web3()
+        self.nonces = NonceAllocator(self.w3)
+        self.version = version or settings.CONTRACT_VERSION
+        if self.version not in CONTRACT_ABIS:
+            raise ValueError(f"CONTRACT_VERSION inválida: {self.version}")
         self.contract = self.w3.eth.contract(
             address=settings.CONTRACT_ADDRESS,
-            abi=abi
+            abi=CONTRACT_ABIS[self.version]
         )
 
-    def mint_nft(self, recipient: str, token_uri: str, private_key: str):
-        """Cria um novo NFT para o destinatário especificado"""
-        start = time.time()
+    @property
+    def supports_batch(self) -> bool:
+        """Se o contrato implantado tem mintBatch/delegateAccessBatch/revokeAccessBatch (v2)"""
+        return self.version >= 2
+
+    def _require_batch(self):
+        if not self.supports_batch:
+            raise ValueError("Operações em lote exigem o contrato v2 (CONTRACT_VERSION=2)")
+
+    def _build(self, call, nonce: int = None, **tx_params) -> dict:
+        if nonce is not None:
+            return call.build_transaction({"from": settings.MY_ADDRESS, "nonce": nonce, **tx_params})
+        # Reserva o nonce só depois de montar: uma estimativa de gas que reverte não deixa lacuna
+        tx = call.build_transaction({"from": settings.MY_ADDRESS, **tx_params})
+        tx["nonce"] = self.nonces.reserve()
+        return tx
+
+    def fee_params(self) -> dict:
+        """
+        Busca uma única vez os parâmetros comuns a um lote de transações
+        (chainId e taxas EIP-1559), para que não sejam consultados por item
+        """
+        priority = self.w3.eth.max_priority_fee
+        base_fee = self.w3.eth.get_block("latest")["baseFeePerGas"]
+        return {
+            "chainId": self.w3.eth.chain_id,
+            "maxPriorityFeePerGas": priority,
+            "maxFeePerGas": 2 * base_fee + priority,
+        }
+
+    def build_mint_tx(self, recipient: str, token_uri: str, nonce: int = None, **tx_params) -> dict:
+        """Monta (sem assinar) a transação de mint"""
         # Converte para checksum address
         checksum_address = self.w3.to_checksum_address(recipient)
-        nonce = self.w3.eth.get_transaction_count(settings.MY_ADDRESS)
-        tx = self.contract.functions.mintNFT(
-            checksum_address,
-            token_uri
-        ).build_transaction({
-            "from": settings.MY_ADDRESS,
-            "nonce": nonce
-        })
+        return self._build(
+            self.contract.functions.mintNFT(checksum_address, token_uri),
+            nonce, **tx_params
+        )
+
+    def sign_and_send(self, tx: dict, private_key: str) -> str:
+        """Assina e envia uma transação já montada, retornando o hash"""
         signed_tx = self.w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        return self.send_raw(signed_tx.rawTransaction)
+
+    def send_raw(self, raw_tx: bytes) -> str:
+        """Envia uma transação já assinada, retornando o hash"""
+        tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
+        return tx_hash.hex()
+
+    def mint_nft(self, recipient: str, token_uri: str, private_key: str):
+        """Cria um novo NFT para o destinatário especificado"""
+        start = time.time()
+        tx = self.build_mint_tx(recipient, token_uri)
+        tx_hash = self.sign_and_send(tx, private_key)
         latency = time.time() - start
         print(f"Latência da transação de mint: {latency:.2f} segundos")
-        return tx_hash.hex()
+        return tx_hash
 
     def get_access_details(self, token_id: int) -> tuple:
         """Retorna (delegatee, expiresAt) para um token"""
         try:
             return self.contract.functions.accessControl(token_id).call()
+        except RPCBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Erro ao acessar accessControl: {e}")
             return (None, 0)
@@ -48,37 +164,75 @@ class IoTAccessNFT:
         """Verifica se um usuário tem acesso ao token"""
         try:
             return self.contract.functions.hasAccess(token_id, user).call()
+        except RPCBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Erro ao verificar acesso: {e}")
             return False
 
+    def build_delegate_tx(self, token_id: int, delegatee: str, duration: int, nonce: int = None, **tx_params) -> dict:
+        """Monta (sem assinar) a transação de delegação de acesso"""
+        # Converte para checksum address
+        checksum_address = self.w3.to_checksum_address(delegatee)
+        return self._build(
+            self.contract.functions.delegateAccess(token_id, checksum_address, duration),
+            nonce, **tx_params
+        )
+
     def delegate_access(self, token_id: int, delegatee: str, duration: int, private_key: str):
         """Delega acesso temporário"""
         start = time.time()
-        # Converte para checksum address
-        checksum_address = self.w3.to_checksum_address(delegatee)
-        nonce = self.w3.eth.get_transaction_count(settings.MY_ADDRESS)
-        tx = self.contract.functions.delegateAccess(
-            token_id,
-            checksum_address,
-            duration
-        ).build_transaction({
-            "from": settings.MY_ADDRESS,
-            "nonce": nonce
-        })
-        signed_tx = self.w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        tx = self.build_delegate_tx(token_id, delegatee, duration)
+        tx_hash = self.sign_and_send(tx, private_key)
         latency = time.time() - start
         print(f"Latência da transação: {latency:.2f} segundos")
-        return tx_hash.hex()
+        return tx_hash
+
+    def build_revoke_tx(self, token_id: int, nonce: int = None, **tx_params) -> dict:
+        """Monta (sem assinar) a transação de revogação de acesso"""
+        return self._build(self.contract.functions.revokeAccess(token_id), nonce, **tx_params)
 
     def revoke_access(self, token_id: int, private_key: str):
         """Revoga acesso delegado"""
-        nonce = self.w3.eth.get_transaction_count(settings.MY_ADDRESS)
-        tx = self.contract.functions.revokeAccess(token_id).build_transaction({
-            "from": settings.MY_ADDRESS,
-            "nonce": nonce
-        })
-        signed_tx = self.w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        return tx_hash.hex()
\ No newline at end of file
+        tx = self.build_revoke_tx(token_id)
+        return self.sign_and_send(tx, private_key)
+
+    def build_mint_batch_tx(self, recipients: list, token_uris: list, nonce: int = None, **tx_params) -> dict:
+        """Monta (sem assinar) um mintBatch; os ids criados são sequenciais (v2)"""
+        self._require_batch()
+        return self._build(
+            self.contract.functions.mintBatch(
+                [self.w3.to_checksum_address(recipient) for recipient in recipients],
+                list(token_uris)
+            ),
+            nonce, **tx_params
+        )
+
+    def build_delegate_batch_tx(self, token_ids: list, delegatees: list, durations: list,
+                                nonce: int = None, **tx_params) -> dict:
+        """Monta (sem assinar) um delegateAccessBatch; reverte inteiro se algum item for inválido (v2)"""
+        self._require_batch()
+        return self._build(
+            self.contract.functions.delegateAccessBatch(
+                list(token_ids),
+                [self.w3.to_checksum_address(delegatee) for delegatee in delegatees],
+                list(durations)
+            ),
+            nonce, **tx_params
+        )
+
+    def build_revoke_batch_tx(self, token_ids: list, nonce: int = None, **tx_params) -> dict:
+        """Monta (sem assinar) um revokeAccessBatch (v2)"""
+        self._require_batch()
+        return self._build(self.contract.functions.revokeAccessBatch(list(token_ids)), nonce, **tx_params)
+
+    def access_events(self, receipt: dict) -> list:
+        """
+        Eventos AccessDelegated/AccessRevoked de um recibo JSON-RPC (v2)
+
+        Returns:
+            Ver `parse_access_events`; vazia no contrato v1, que não emite eventos
+        """
+        if not self.supports_batch or not receipt:
+            return []
+        return parse_access_events(receipt.get("logs", []))
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from src.config.settings import settings
+
+# Classes de prioridade, da mais para a menos urgente
+PRIORITIES = ("interactive", "write", "background")
+
+# Prioridade das chamadas feitas no contexto atual. asyncio.create_task e
+# asyncio.to_thread copiam o contexto, então basta definir no início de uma
+# tarefa em segundo plano ou em volta de uma operação de escrita.
+rpc_priority: ContextVar[str] = ContextVar("rpc_priority", default="interactive")
+
+# Custo em compute units (tabela do Alchemy) dos métodos usados pelo serviço
+METHOD_COMPUTE_UNITS = {
+    "eth_blockNumber": 10,
+    "eth_chainId": 0,
+    "eth_call": 26,
+    "eth_estimateGas": 87,
+    "eth_gasPrice": 19,
+    "eth_maxPriorityFeePerGas": 10,
+    "eth_getBlockByNumber": 16,
+    "eth_getLogs": 75,
+    "eth_getTransactionCount": 26,
+    "eth_getTransactionReceipt": 15,
+    "eth_sendRawTransaction": 250,
+}
+DEFAULT_COMPUTE_UNITS = 26
+
+class RPCBudgetExceeded(Exception):
+    """A chamada não coube no orçamento de compute units (fila cheia ou espera longa demais)"""
+
+    def __init__(self, priority: str, reason: str, retry_after: float):
+        super().__init__(f"Orçamento de RPC esgotado para '{priority}': {reason}")
+        self.priority = priority
+        self.retry_after = retry_after
+
+@contextmanager
+def priority(name: str):
+    """Executa o bloco com a prioridade de RPC informada"""
+    token = rpc_priority.set(name)
+    try:
+        yield
+    finally:
+        rpc_priority.reset(token)
+
+def compute_units(methods: list) -> int:
+    """Custo total de uma chamada (ou lote) em compute units"""
+    return sum(METHOD_COMPUTE_UNITS.get(method, DEFAULT_COMPUTE_UNITS) for method in methods)
+
+def _on_event_loop() -> bool:
+    """Se a thread atual está rodando um event loop do asyncio"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+class RPCScheduler:
+    """
+    Token bucket de compute units na frente de todas as chamadas JSON-RPC.
+
+    As chamadas vêm de várias threads (asyncio.to_thread) e esperam em uma
+    fila limitada por classe. Uma chamada só é liberada quando está no topo
+    da sua fila, não há ninguém esperando em uma classe mais prioritária e
+    o balde tem saldo; assim uma rajada em segundo plano nunca passa na
+    frente de uma leitura de /access. Um 429 do provedor zera o saldo.
+
+    Uma chamada síncrona feita direto no event loop nunca espera (travaria
+    todas as requisições do worker): é liberada se houver saldo na hora e
+    rejeitada com RPCBudgetExceeded caso contrário.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._tokens = float(settings.RPC_CU_BURST)
+        self._updated = time.monotonic()
+        self._queues = {name: deque() for name in PRIORITIES}
+        self._counters = {
+            name: {"granted": 0, "throttled": 0, "rejected": 0, "timeouts": 0, "loop_rejected": 0, "wait_seconds": 0.0, "max_depth": 0}
+            for name in PRIORITIES
+        }
+        self.provider_throttles = 0
+
+    def _limits(self, name: str) -> tuple:
+        return (
+            getattr(settings, f"RPC_QUEUE_MAX_{name.upper()}"),
+            getattr(settings, f"RPC_QUEUE_TIMEOUT_{name.upper()}"),
+        )
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            float(settings.RPC_CU_BURST),
+            self._tokens + (now - self._updated) * settings.RPC_CU_PER_SECOND
+        )
+        self._updated = now
+
+    def _is_next(self, ticket: object, name: str) -> bool:
+        for other in PRIORITIES:
+            if other == name:
+                return self._queues[name][0] is ticket
+            if self._queues[other]:
+                return False
+        return False
+
+    def acquire(self, cost: int, name: str = None):
+        """
+        Bloqueia a thread até haver saldo para `cost` compute units
+
+        No event loop não bloqueia: libera na hora ou levanta a exceção.
+
+        Raises:
+            RPCBudgetExceeded: fila da classe cheia, espera acima do limite
+                ou sem saldo imediato no event loop
+        """
+        if not settings.RPC_SCHEDULER_ENABLED or cost <= 0:
+            return
+        name = name or rpc_priority.get()
+        max_depth, timeout = self._limits(name)
+        counters = self._counters[name]
+        start = time.monotonic()
+        on_loop = _on_event_loop()
+        deadline = start if on_loop else start + timeout
+        # Um custo maior que o balde seria impossível de atender: libera com o balde cheio
+        needed = min(cost, settings.RPC_CU_BURST)
+
+        with self._cond:
+            queue = self._queues[name]
+            if len(queue) >= max_depth:
+                counters["rejected"] += 1
+                raise RPCBudgetExceeded(name, "fila cheia", needed / settings.RPC_CU_PER_SECOND)
+            ticket = object()
+            queue.append(ticket)
+            counters["max_depth"] = max(counters["max_depth"], len(queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    is_next = self._is_next(ticket, name)
+                    if is_next and self._tokens >= needed:
+                        self._tokens -= cost
+                        break
+                    if now >= deadline:
+                        retry_after = needed / settings.RPC_CU_PER_SECOND
+                        if on_loop:
+                            counters["loop_rejected"] += 1
+                            raise RPCBudgetExceeded(name, "sem saldo imediato (chamada no event loop)", retry_after)
+                        counters["timeouts"] += 1
+                        raise RPCBudgetExceeded(name, "tempo de espera esgotado", retry_after)
+                    # No topo: espera o saldo encher; fora dele: espera outra chamada sair da fila
+                    wait = (needed - self._tokens) / settings.RPC_CU_PER_SECOND if is_next else deadline - now
+                    self._cond.wait(min(wait, deadline - now))
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            counters["granted"] += 1
+            counters["wait_seconds"] += waited
+            if waited > 0.001:
+                counters["throttled"] += 1
+
+    def penalize(self):
+        """O provedor respondeu 429: esvazia o balde para aliviar a pressão"""
+        with self._cond:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = time.monotonic()
+            self.provider_throttles += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "enabled": settings.RPC_SCHEDULER_ENABLED,
+                "tokens": round(self._tokens, 1),
+                "cu_per_second": settings.RPC_CU_PER_SECOND,
+                "burst": settings.RPC_CU_BURST,
+                "provider_throttles": self.provider_throttles,
+                "classes": {
+                    name: {"queue_depth": len(self._queues[name]), **self._counters[name]}
+                    for name in PRIORITIES
+                },
+            }
+
+# Instância global do escalonador de RPC
+rpc_scheduler = RPCScheduler()
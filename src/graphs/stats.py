@@ -0,0 +1,286 @@
+"""
+Estatísticas vetorizadas sobre as medições de transações
+
+Lê o arquivo colunar gravado pelo MeasurementService (um `<coluna>.bin`
+por coluna + schema.json) e calcula, por grupo, contagem, média, desvio,
+percentis e IC da média por bootstrap, sem laços Python por linha: milhões
+de linhas são processadas em blocos com bincount/lexsort/matmul e o
+bootstrap é de Poisson (cada linha recebe um peso ~ Poisson(1) por
+réplica), o que permite acumular todas as réplicas em uma única passada.
+
+Depende só do NumPy, para que os scripts de gráfico rodem sem a
+configuração do serviço; o matplotlib só é importado pelas funções de
+desenho compartilhadas pelos scripts (new_figure, bar_panel, save_figure).
+
+cost_usd só tem valores quando MEASUREMENT_NATIVE_TOKEN_USD foi configurado
+na coleta (o padrão 0 grava NaN); sem ele os painéis em USD são omitidos.
+"""
+
+import json
+import math
+import os
+import warnings
+from typing import Optional
+import numpy as np
+
+# CDF da Poisson(1) em escala de 2**16: o peso de uma linha é o número de limiares
+# abaixo de um inteiro uniforme de 16 bits (bem mais rápido que Generator.poisson)
+_POISSON_THRESHOLDS = np.array([
+    t for t in (round(sum(math.exp(-1) / math.factorial(j) for j in range(k + 1)) * 2**16) for k in range(10))
+    if t < 2**16
+], dtype=np.uint16)
+
+def _poisson_weights(rng: np.random.Generator, shape: tuple) -> np.ndarray:
+    uniform = rng.integers(0, 2**16, size=shape, dtype=np.uint16)
+    weights = np.zeros(shape, dtype=np.uint8)
+    for threshold in _POISSON_THRESHOLDS:
+        np.add(weights, uniform >= threshold, out=weights, casting="unsafe")
+    return weights.astype(np.float32)
+
+def measurement_paths(argv: list) -> list:
+    """Diretórios passados na linha de comando, ou MEASUREMENT_DIR (padrão: measurements)"""
+    return argv[1:] or [os.getenv("MEASUREMENT_DIR", "measurements")]
+
+def load_measurements(*paths: str) -> dict:
+    """
+    Carrega um ou mais diretórios de medições (ex.: um por rede)
+
+    Returns:
+        {coluna: ndarray} com as categorias (kind, network) já convertidas em
+        rótulos (arrays de objetos str); linhas incompletas no fim são ignoradas
+    """
+    parts = []
+    for path in paths:
+        with open(os.path.join(path, "schema.json")) as f:
+            schema = json.load(f)
+        columns = {}
+        for column in schema["columns"]:
+            file = os.path.join(path, f"{column['name']}.bin")
+            dtype = np.dtype(column["dtype"])
+            size = os.path.getsize(file) // dtype.itemsize if os.path.exists(file) else 0
+            columns[column["name"]] = np.memmap(file, dtype=dtype, mode="r", shape=(size,)) if size else np.empty(0, dtype)
+        rows = min(len(values) for values in columns.values())
+        for name, labels in schema["categories"].items():
+            columns[name] = np.asarray(labels + [""], dtype=object)[columns[name][:rows]]
+        parts.append({name: values[:rows] for name, values in columns.items()})
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def grouped_stats(values: np.ndarray, groups: np.ndarray, n_groups: int,
+                  percentiles=(50, 90, 99), confidence: float = 0.95, n_boot: int = 200,
+                  chunk_size: int = 8192, seed: Optional[int] = 0) -> dict:
+    """
+    Estatísticas de `values` por grupo (códigos 0..n_groups-1)
+
+    Valores não finitos (ex.: cost_usd sem preço) são descartados.
+
+    Returns:
+        Arrays indexados pelo grupo: count, mean, std, ci_low, ci_high
+        (IC da média por bootstrap de Poisson) e percentiles (n_groups x len(percentiles))
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups, dtype=np.intp)
+    valid = np.isfinite(values)
+    values, groups = values[valid], groups[valid]
+
+    counts = np.bincount(groups, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(groups, weights=values, minlength=n_groups) / counts
+        deviations = values - mean[groups]
+        std = np.sqrt(np.bincount(groups, weights=deviations * deviations, minlength=n_groups) / (counts - 1))
+
+    # Percentis: ordena por (grupo, valor) e interpola dentro do trecho de cada grupo
+    ordered = values[np.lexsort((values, groups))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    q = np.asarray(percentiles, dtype=np.float64) / 100
+    positions = starts[:, None] + q[None, :] * np.maximum(counts[:, None] - 1, 0)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.ceil(positions).astype(np.intp)
+    if len(ordered):
+        lower_values = ordered[np.minimum(lower, len(ordered) - 1)]
+        upper_values = ordered[np.minimum(upper, len(ordered) - 1)]
+        pct = lower_values + (upper_values - lower_values) * (positions - lower)
+    else:
+        pct = np.full(positions.shape, np.nan)
+    pct[counts == 0] = np.nan
+
+    # Bootstrap de Poisson: somas e contagens ponderadas de todas as réplicas em uma passada.
+    # Acumula os desvios em relação à média do grupo, o que mantém o float32 preciso.
+    rng = np.random.default_rng(seed)
+    boot_sums = np.zeros((n_boot, n_groups))
+    boot_counts = np.zeros((n_boot, n_groups))
+    for start in range(0, len(values), chunk_size):
+        chunk_groups = groups[start:start + chunk_size]
+        one_hot = np.zeros((len(chunk_groups), n_groups), dtype=np.float32)
+        one_hot[np.arange(len(chunk_groups)), chunk_groups] = 1
+        # Colunas: desvios por grupo, seguidos das indicadoras (contagens)
+        design = np.concatenate((one_hot * deviations[start:start + chunk_size, None], one_hot), axis=1)
+        totals = _poisson_weights(rng, (n_boot, len(chunk_groups))) @ design
+        boot_sums += totals[:, :n_groups]
+        boot_counts += totals[:, n_groups:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        boot_means = mean + boot_sums / boot_counts
+    alpha = (1 - confidence) / 2
+    if n_boot and len(values):
+        # Grupos vazios dão colunas só com NaN; o IC deles é anulado logo abaixo
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ci_low, ci_high = np.nanquantile(boot_means, [alpha, 1 - alpha], axis=0)
+    else:
+        ci_low = ci_high = np.full(n_groups, np.nan)
+    ci_low = np.where(counts > 0, ci_low, np.nan)
+    ci_high = np.where(counts > 0, ci_high, np.nan)
+
+    return {
+        "count": counts,
+        "mean": mean,
+        "std": std,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "percentiles": pct,
+    }
+
+def summarize_by_network(data: dict, kind: str, columns: dict, networks: Optional[list] = None,
+                         successful_only: bool = True, **options) -> dict:
+    """
+    Resume colunas de uma operação por rede, no formato usado pelos gráficos
+
+    Args:
+        data: Resultado de load_measurements
+        kind: Operação ("mint", "delegate", "revoke")
+        columns: {rótulo da métrica: array por linha} ou {rótulo: nome da coluna}
+        networks: Ordem das redes (padrão: as presentes nos dados, em ordem alfabética)
+
+    Returns:
+        {"networks": [...], rótulo: [médias], f"{rótulo}_CI": [(média - inferior, superior - média)],
+         f"{rótulo}_stats": saída de grouped_stats}
+    """
+    mask = data["kind"] == kind
+    if successful_only:
+        mask &= data["success"] == 1
+    present = np.unique(data["network"][mask]).tolist()
+    networks = [n for n in networks if n in present] if networks else present
+    codes = np.full(mask.sum(), -1, dtype=np.intp)
+    network_column = data["network"][mask]
+    for code, network in enumerate(networks):
+        codes[network_column == network] = code
+    keep = codes >= 0
+
+    summary = {"networks": networks}
+    for label, column in columns.items():
+        values = (data[column] if isinstance(column, str) else np.asarray(column))[mask][keep]
+        result = grouped_stats(values, codes[keep], len(networks), **options)
+        summary[label] = result["mean"].tolist()
+        summary[f"{label}_CI"] = [
+            (max(m - lo, 0.0), max(hi - m, 0.0)) if np.isfinite(lo) else (0.0, 0.0)
+            for m, lo, hi in zip(result["mean"], result["ci_low"], result["ci_high"])
+        ]
+        summary[f"{label}_stats"] = result
+    return summary
+
+# --- Apoio aos scripts de gráfico (mint_costs, delegate, revoke) ---
+# O matplotlib é importado só dentro das funções de desenho, para que as
+# estatísticas continuem dependendo apenas do NumPy.
+
+NETWORKS = ["Polygon", "Arbitrum", "Optimism"]
+NETWORK_COLORS = {"Polygon": "#8A2BE2", "Arbitrum": "#1E90FF", "Optimism": "#FF4500"}
+NETWORK_LABELS = {"Polygon": "Polygon (Sidechain)", "Arbitrum": "Arbitrum (Rollup)", "Optimism": "Optimism (Rollup)"}
+
+def gas_efficiency(data: dict) -> np.ndarray:
+    """Gas usado em relação ao limite enviado (%); NaN quando o limite é 0 (linha descartada)"""
+    gas_limit = np.asarray(data["gas_limit"], dtype=np.float64)
+    gas_used = np.asarray(data["gas_used"], dtype=np.float64)
+    efficiency = np.full(gas_limit.shape, np.nan)
+    np.divide(gas_used * 100, gas_limit, out=efficiency, where=gas_limit > 0)
+    return efficiency
+
+def load_network_metrics(argv: list, kind: str, columns: dict) -> dict:
+    """
+    Carrega as medições da linha de comando e resume `columns` por rede (ordem de NETWORKS)
+
+    `columns` aceita nomes de coluna ou funções que recebem os dados carregados
+    (ex.: gas_efficiency).
+    """
+    data = load_measurements(*measurement_paths(argv))
+    columns = {label: column(data) if callable(column) else column for label, column in columns.items()}
+    return summarize_by_network(data, kind, columns, networks=NETWORKS)
+
+def has_values(metrics: dict, label: str) -> bool:
+    """Se a métrica tem alguma amostra válida (cost_usd fica NaN sem MEASUREMENT_NATIVE_TOKEN_USD)"""
+    return bool(metrics[f"{label}_stats"]["count"].sum())
+
+def usd_panels(metrics: dict, label: str = "Cost (USD)") -> bool:
+    """Indica se os painéis em USD devem ser desenhados; avisa quando não há preço configurado"""
+    if has_values(metrics, label):
+        return True
+    print("⚠️ cost_usd sem valores (MEASUREMENT_NATIVE_TOKEN_USD=0 na coleta): painéis em USD omitidos")
+    return False
+
+def upper_limit(metrics: dict, label: str) -> float:
+    """Topo do eixo: espaço acima da maior barra (com IC) para o rótulo"""
+    tops = [m + ci[1] for m, ci in zip(metrics[label], metrics[f"{label}_CI"]) if np.isfinite(m)]
+    return max(tops, default=1) * 1.25 or 1
+
+def new_figure(panels: int, panel_width: float = 7, height: float = 6):
+    """Aplica o estilo padrão dos gráficos e cria a figura com `panels` eixos lado a lado"""
+    import matplotlib.pyplot as plt
+    plt.style.use("default")
+    plt.rcParams.update({
+        "font.family": "DejaVu Sans",
+        "axes.edgecolor": "#333333",
+        "axes.facecolor": "white",
+        "figure.facecolor": "white",
+    })
+    fig, axes = plt.subplots(1, panels, figsize=(panel_width * panels, height), facecolor="white", squeeze=False)
+    return fig, list(axes[0])
+
+def bar_panel(ax, metrics: dict, label: str, title: str, ylabel: str, value_format: str,
+              ylim: Optional[tuple] = None, label_offset: Optional[float] = None) -> None:
+    """Barras por rede com IC da média e o valor acima de cada barra"""
+    networks = metrics["networks"]
+    top = upper_limit(metrics, label)
+    ylim = ylim or (0, top)
+    offset = top * 0.02 if label_offset is None else label_offset
+    for i, network in enumerate(networks):
+        value = metrics[label][i]
+        ci_lower, ci_upper = metrics[f"{label}_CI"][i]
+        if not np.isfinite(value):
+            continue
+        ax.bar(i, value, color=NETWORK_COLORS.get(network, "#808080"), edgecolor="black",
+               linewidth=0.7, width=0.65, alpha=0.9, zorder=3)
+        # Barras de erro apenas se houver variação
+        if ci_lower + ci_upper > 0:
+            ax.errorbar(i, value, yerr=[[ci_lower], [ci_upper]], fmt="none", ecolor="#333333",
+                        elinewidth=1.5, capsize=5, capthick=1.5, zorder=4)
+        ax.text(i, value + ci_upper + offset, value_format.format(value), ha="center",
+                fontsize=10, fontweight="bold", color="#333333", zorder=5)
+
+    ax.set_title(title, fontsize=12, fontweight="bold", pad=15)
+    ax.set_ylabel(ylabel, fontsize=11)
+    ax.set_xticks(range(len(networks)))
+    ax.set_xticklabels(networks, fontsize=11)
+    ax.set_ylim(*ylim)
+    ax.yaxis.grid(True, linestyle=":", alpha=0.5, zorder=1)
+
+def efficiency_limits(metrics: dict, label: str = "Efficiency (%)") -> tuple:
+    """Faixa do eixo de eficiência: de até 70% (ou abaixo da menor média) a 105%"""
+    finite = [m for m in metrics[label] if np.isfinite(m)]
+    return min(70, min(finite, default=70) - 5), 105
+
+def save_figure(fig, metrics: dict, filename: str) -> None:
+    """Legenda das redes abaixo dos painéis e gravação em PNG (300 dpi)"""
+    import matplotlib.pyplot as plt
+    networks = metrics["networks"]
+    plt.tight_layout(pad=3)
+    legend_elements = [plt.Rectangle((0, 0), 1, 1, fc=NETWORK_COLORS.get(network, "#808080"), edgecolor="black")
+                       for network in networks]
+    fig.legend(legend_elements,
+               [NETWORK_LABELS.get(network, network) for network in networks],
+               loc="lower center",
+               bbox_to_anchor=(0.5, -0.08),
+               ncol=max(len(networks), 1),
+               frameon=True,
+               facecolor="white",
+               edgecolor="#cccccc",
+               fontsize=10)
+    fig.savefig(filename, dpi=300, bbox_inches="tight", facecolor="white")
+    print(f"📊 Gráfico salvo em {filename}")
@@ -1,10 +1,35 @@
+import asyncio
+import math
 import time
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from src.config.settings import settings
+from src.contracts.chain_client import connection_stats
+from src.contracts.rpc_scheduler import RPCBudgetExceeded, rpc_scheduler
 from src.services.nft_service import NFTService
 from src.services.redis_service import redis_service
 from src.services.reputation_service import reputation_service
-from src.schemas.models import DelegateAccessRequest, MintNFTRequest
+from src.services.rate_limit_service import rate_limit_service
+from src.services.ban_filter import ban_filter
+from src.services.token_index import token_index
+from src.services.audit_service import AUDIT_CURSOR_PATTERN, audit_service
+from src.services.codec import get_response_class
+from src.services.validation_service import normalize_address, token_missing, validate_access_request, validate_token_id
+from src.services.receipt_tracker import receipt_tracker
+from src.services.fee_bump_service import fee_bump_service
+from src.services.signing_service import signing_service
+from src.services.access_events import access_event_hub
+from src.services.access_cache import access_cache
+from src.services.snapshot_service import snapshot_service
+from src.services.profiling_service import PROFILE_MEDIA_TYPES, profiling_service
+from src.services.idempotency_service import idempotency_service
+from src.services.admission_control import AdmissionRejected, admission_control
+from src.services.ticket_service import ticket_service
+from src.services.measurement_service import measurement_service
+from src.schemas.models import (
+    DelegateAccessRequest, DelegateAccessBatchRequest, MintNFTRequest, MintNFTBatchRequest, RevokeAccessBatchRequest
+)
 
 async def latency_middleware(request: Request, call_next):
     start_time = time.time()
@@ -13,20 +38,57 @@ async def latency_middleware(request: Request, call_next):
     response.headers["X-API-Latency"] = str(latency)
     return response
 
-app = FastAPI()
+app = FastAPI(default_response_class=get_response_class())
 # app.add_middleware(latency_middleware)
 app.middleware("http")(latency_middleware) 
+app.middleware("http")(idempotency_service.middleware)
+if settings.PROFILING_ENABLED:
+    app.middleware("http")(profiling_service.middleware)
 
 nft_service = NFTService()
 
 @app.on_event("startup")
 async def startup_event():
-    """Conecta ao Redis quando a aplicação inicia"""
+    """Conecta ao Redis e inicia o acompanhamento de transações quando a aplicação inicia"""
     await redis_service.connect()
+    redis_service.start()
+    ban_filter.start()
+    reputation_service.start()
+    audit_service.start()
+    receipt_tracker.start()
+    receipt_tracker.subscribe(token_index.on_receipt)
+    receipt_tracker.subscribe(access_event_hub.on_receipt)
+    receipt_tracker.subscribe(access_cache.on_receipt)
+    receipt_tracker.subscribe(ticket_service.on_receipt)
+    receipt_tracker.subscribe(measurement_service.on_receipt)
+    measurement_service.start()
+    token_index.on_transfer(access_event_hub.on_transfer)
+    token_index.on_transfer(access_cache.on_transfer)
+    token_index.on_transfer(ticket_service.on_transfer)
+    token_index.on_access_event(access_event_hub.on_access_event)
+    token_index.on_access_event(access_cache.on_access_event)
+    token_index.on_access_event(ticket_service.on_access_event)
+    ticket_service.start()
+    access_cache.start()
+    snapshot_service.contract = nft_service.contract
+    access_event_hub.start(nft_service.contract)
+    token_index.start(nft_service.contract)
+    fee_bump_service.start(nft_service.contract)
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Desconecta do Redis quando a aplicação termina"""
+    """Para o acompanhamento de transações e desconecta do Redis quando a aplicação termina"""
+    await fee_bump_service.stop()
+    await token_index.stop()
+    await receipt_tracker.stop()
+    await measurement_service.stop()
+    await access_event_hub.stop()
+    await access_cache.stop()
+    await signing_service.shutdown()
+    await reputation_service.stop()
+    await audit_service.stop()
+    await ban_filter.stop()
+    await redis_service.stop()
     await redis_service.disconnect()
 
 def measure_chain_latency(func):
@@ -42,6 +104,23 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
+    )
+
+@app.exception_handler(RPCBudgetExceeded)
+async def rpc_budget_exception_handler(request: Request, exc: RPCBudgetExceeded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_exception_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
     )
 
 @app.exception_handler(Exception)
@@ -53,54 +132,323 @@ async def generic_exception_handler(request: Request, exc: Exception):
 
 @app.post("/mint-nft")
 async def mint_nft(request: MintNFTRequest):
-    tx_hash = nft_service.mint_nft(
-        request.recipient,
-        request.token_uri
-    )
+    async with admission_control.limit("/mint-nft", write=True):
+        tx_hash = await asyncio.to_thread(
+            nft_service.mint_nft,
+            request.recipient,
+            request.token_uri
+        )
     return {"tx_hash": tx_hash}
 
+@app.post("/mint-nft/batch")
+async def mint_nft_batch(request: MintNFTBatchRequest):
+    """Cria vários NFTs em lote (nonces sequenciais, assinatura no pool)"""
+    async with admission_control.limit("/mint-nft/batch", write=True):
+        results = await nft_service.mint_nft_batch(
+            [(item.recipient, item.token_uri) for item in request.items]
+        )
+    return _batch_response(results)
+
+def _batch_response(results: list) -> dict:
+    """Resultado por item de um lote, com os totais de enviados e falhos"""
+    return {
+        "results": results,
+        "sent": sum(1 for r in results if r["status"] == "sent"),
+        "failed": sum(1 for r in results if r["status"] != "sent"),
+    }
+
+async def _validate_batch_tokens(token_ids: list):
+    """
+    Rejeita o lote inteiro se algum token não existe
+
+    Chamado dentro da vaga de admissão do lote; as confirmações na rede (ids
+    logo acima do maior conhecido) correm em paralelo, limitadas pelo
+    orçamento do agendador de RPC.
+    """
+    flags = await asyncio.gather(*(token_missing(token_id) for token_id in token_ids))
+    missing = [token_id for token_id, is_missing in zip(token_ids, flags) if is_missing]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tokens não encontrados: {missing}")
+
 @app.get("/access/{token_id}/{user}")
-async def check_access(token_id: int, user: str):
+async def check_access(token_id: int, user: str, request: Request, response: Response):
+    start = time.time()
+    decision = {"result": "error", "user": user}
+    try:
+        return await _check_access(token_id, user, request, response, decision)
+    finally:
+        # Registro de auditoria em memória; gravado em lote fora do caminho da requisição
+        audit_service.record(token_id, decision["user"], decision["result"], time.time() - start)
+
+async def _check_access(token_id: int, user: str, request: Request, response: Response, decision: dict):
+    # 0. Validação local: endereço inválido ou token inexistente não gera I/O
+    try:
+        user = await validate_access_request(token_id, user)
+    except HTTPException:
+        decision["result"] = "rejected"
+        raise
+    decision["user"] = user
+
     # 1. Verifica se o usuário está banido
     if await reputation_service.is_banned(user):
+        decision["result"] = "banned"
         ttl = await reputation_service.get_ban_ttl(user)
         raise HTTPException(
             status_code=429, 
             detail=f"Too Many Requests. You are temporarily blocked. Try again in {ttl} seconds."
         )
 
-    # 2. Consulta o Smart Contract
-    has_access = nft_service.check_access(token_id, user)
+    # 2. Limita a taxa por carteira e por IP antes de gastar cota do provedor
+    client_ip = request.client.host if request.client else None
+    rate_limit = await rate_limit_service.check(user, client_ip)
+    rate_limit_headers = rate_limit_service.headers(rate_limit) if rate_limit else {}
+    if rate_limit is not None and not rate_limit["allowed"]:
+        decision["result"] = "rate_limited"
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded. Try again in {rate_limit_headers['Retry-After']} seconds.",
+            headers=rate_limit_headers
+        )
+    response.headers.update(rate_limit_headers)
 
-    # 3. Atualiza a reputação
+    # 3. Consulta o Smart Contract (recusada na hora se a rota estiver no limite)
+    try:
+        async with admission_control.limit("/access"):
+            has_access = await asyncio.to_thread(nft_service.check_access, token_id, user)
+    except AdmissionRejected:
+        decision["result"] = "shed"
+        raise
+    decision["result"] = "granted" if has_access else "denied"
+
+    # 4. Atualiza a reputação
     if has_access:
         await reputation_service.update_reputation_on_success(user)
     else:
         await reputation_service.update_reputation_on_failure(user)
 
     if not has_access:
-        raise HTTPException(status_code=403, detail="Access denied by Smart Contract.")
+        raise HTTPException(status_code=403, detail="Access denied by Smart Contract.", headers=rate_limit_headers)
 
     return {"has_access": has_access}
 
+@app.get("/access/{token_id}/{user}/ticket")
+async def access_ticket(token_id: int, user: str, request: Request, response: Response):
+    """
+    Verifica o acesso (mesmo fluxo de /access) e emite um ticket assinado
+    para o dispositivo verificar localmente nas próximas vezes
+
+    O ticket vale até TICKET_MAX_TTL_SECONDS ou até a delegação vencer.
+    """
+    if not ticket_service.enabled:
+        raise HTTPException(status_code=503, detail="Emissão de tickets desativada (TICKET_SIGNING_KEY)")
+    await check_access(token_id, user, request, response)
+
+    async with admission_control.limit("/access"):
+        delegatee, expires_at = await asyncio.to_thread(nft_service.contract.get_access_details, token_id)
+    if delegatee is None:
+        # Sem a delegação não dá para limitar a validade do ticket
+        raise HTTPException(status_code=503, detail="Não foi possível ler a delegação do token")
+    ticket = ticket_service.issue(token_id, normalize_address(user), delegatee, expires_at)
+    if ticket is None:
+        raise HTTPException(status_code=403, detail="Delegação vence antes de o ticket ter validade")
+    return ticket
+
+@app.get("/tickets/revocations")
+async def ticket_revocations():
+    """Lista de revogação de tickets assinada pelo emissor (para verificação local)"""
+    if not ticket_service.enabled:
+        raise HTTPException(status_code=503, detail="Emissão de tickets desativada (TICKET_SIGNING_KEY)")
+    return await ticket_service.revocation_list()
+
+@app.get("/audit")
+async def get_audit(
+    token_id: Optional[int] = None,
+    wallet: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=1000),
+):
+    """
+    Lista as decisões de /access (mais recentes primeiro), por token e/ou carteira
+    cursor: valor de next_cursor da página anterior
+    """
+    if wallet is not None:
+        wallet = normalize_address(wallet)
+        if wallet is None:
+            raise HTTPException(status_code=400, detail="Endereço Ethereum inválido")
+    if cursor is not None and not AUDIT_CURSOR_PATTERN.match(cursor):
+        raise HTTPException(status_code=400, detail="Cursor inválido (use o next_cursor da página anterior)")
+    page = await audit_service.query(token_id, wallet, cursor, limit)
+    if page is None:
+        raise HTTPException(status_code=503, detail="Auditoria indisponível (Redis)")
+    return page
+
 @app.get("/access-details/{token_id}")
 async def get_access_details(token_id: int):
-    return nft_service.get_access_details(token_id)
+    await validate_token_id(token_id)
+    async with admission_control.limit("/access-details"):
+        details = await asyncio.to_thread(nft_service.get_access_details, token_id)
+    access_event_hub.schedule_expiry(token_id, details["expires_at"], details["delegatee"])
+    return details
+
+@app.get("/tokens/snapshot")
+async def tokens_snapshot(
+    block: Optional[int] = Query(default=None, ge=0),
+    from_id: int = Query(default=1, ge=1),
+    to_id: Optional[int] = Query(default=None, ge=1),
+):
+    """
+    Snapshot NDJSON (um token por linha) de dono, URI e delegação de todos os tokens
+    block: bloco do snapshot (padrão: o mais recente); informado em X-Snapshot-Block
+    A última linha é um trailer {"complete": ..., "last_token_id": ...}; sem ele, o stream foi cortado
+    """
+    try:
+        pinned = await asyncio.to_thread(snapshot_service.pin_block, block)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Bloco indisponível: {e}")
+    return StreamingResponse(
+        snapshot_service.stream(pinned, from_id, to_id),
+        media_type="application/x-ndjson",
+        headers={
+            "X-Snapshot-Block": str(pinned["number"]),
+            "X-Snapshot-Timestamp": str(pinned["timestamp"]),
+        },
+    )
+
+@app.get("/events/access")
+async def access_events(request: Request, token_ids: str = Query(..., description="Ids separados por vírgula")):
+    """
+    Stream SSE com as mudanças de acesso dos tokens informados
+    Eventos: delegated, revoked, expired, transfer e minted
+    """
+    try:
+        ids = sorted({int(token_id) for token_id in token_ids.split(",") if token_id.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="token_ids deve ser uma lista de inteiros")
+    if not ids or len(ids) > settings.SSE_MAX_TOKENS_PER_CLIENT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Informe entre 1 e {settings.SSE_MAX_TOKENS_PER_CLIENT} tokens"
+        )
+    for token_id in ids:
+        await validate_token_id(token_id)
+
+    queue = access_event_hub.subscribe(ids)
+
+    async def stream():
+        try:
+            yield f"retry: 5000\nevent: subscribed\ndata: {{\"token_ids\": {ids}}}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event_type, payload = await asyncio.wait_for(queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+                    yield f"event: {event_type}\ndata: {payload}\n\n"
+                except asyncio.TimeoutError:
+                    # Mantém a conexão aberta atrás de proxies
+                    yield ": heartbeat\n\n"
+        finally:
+            access_event_hub.unsubscribe(queue, ids)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Declaradas antes de /revoke-access/{token_id}, que também casaria com "batch"
+@app.post("/delegate-access/batch")
+async def delegate_access_batch(request: DelegateAccessBatchRequest):
+    """Delega o acesso de vários tokens em lote (nonces sequenciais, envio concorrente)"""
+    async with admission_control.limit("/delegate-access/batch", write=True):
+        await _validate_batch_tokens([item.token_id for item in request.items])
+        results = await nft_service.delegate_access_batch(
+            [(item.token_id, item.delegatee, item.duration) for item in request.items]
+        )
+    sent = [r["token_id"] for r in results if r["status"] == "sent"]
+    await access_cache.invalidate(*sent)
+    await ticket_service.revoke(*sent)
+    return _batch_response(results)
+
+@app.post("/revoke-access/batch")
+async def revoke_access_batch(request: RevokeAccessBatchRequest):
+    """Revoga o acesso de vários tokens em lote (nonces sequenciais, envio concorrente)"""
+    async with admission_control.limit("/revoke-access/batch", write=True):
+        await _validate_batch_tokens(request.token_ids)
+        results = await nft_service.revoke_access_batch(request.token_ids)
+    sent = [r["token_id"] for r in results if r["status"] == "sent"]
+    await access_cache.invalidate(*sent)
+    await ticket_service.revoke(*sent)
+    return _batch_response(results)
 
 @app.post("/delegate-access")
 async def delegate_access(request: DelegateAccessRequest):
-    tx_hash = nft_service.delegate_access(
-        request.token_id,
-        request.delegatee,
-        request.duration
-    )
+    async with admission_control.limit("/delegate-access", write=True):
+        tx_hash = await asyncio.to_thread(
+            nft_service.delegate_access,
+            request.token_id,
+            request.delegatee,
+            request.duration
+        )
+    await access_cache.invalidate(request.token_id)
+    await ticket_service.revoke(request.token_id)
     return {"tx_hash": tx_hash}
 
 @app.post("/revoke-access/{token_id}")
 async def revoke_access(token_id: int):
-    tx_hash = nft_service.revoke_access(token_id)
+    async with admission_control.limit("/revoke-access", write=True):
+        tx_hash = await asyncio.to_thread(nft_service.revoke_access, token_id)
+    await access_cache.invalidate(token_id)
+    await ticket_service.revoke(token_id)
     return {"tx_hash": tx_hash}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas internas do worker"""
+    return {
+        "redis": redis_service.stats(),
+        "ban_filter": ban_filter.stats(),
+        "audit": audit_service.stats(),
+        "access_events": access_event_hub.stats(),
+        "access_cache": access_cache.stats(),
+        "rpc": connection_stats(),
+        "rpc_scheduler": rpc_scheduler.stats(),
+        "idempotency": idempotency_service.stats(),
+        "admission": admission_control.stats(),
+        "tickets": ticket_service.stats(),
+        "measurements": measurement_service.stats(),
+    }
+
+@app.get("/tx/{tx_hash}")
+async def get_transaction_status(tx_hash: str):
+    """Retorna o estado de confirmação de uma transação enviada por este serviço"""
+    status = receipt_tracker.status(tx_hash)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transação não acompanhada por este serviço")
+    return status
+
+# ====== ADMIN ======
+
+def require_admin(request: Request):
+    if not profiling_service.is_admin(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request, limit: int = Query(default=50, ge=1, le=500)):
+    """Lista os perfis de requisições gravados (mais recentes primeiro)"""
+    require_admin(request)
+    profiles = await profiling_service.list(limit)
+    if profiles is None:
+        raise HTTPException(status_code=503, detail="Perfis indisponíveis (Redis)")
+    return {"profiles": profiles}
+
+@app.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """Retorna um perfil (speedscope JSON ou pilhas colapsadas)"""
+    require_admin(request)
+    profile = await profiling_service.fetch(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    fmt, data = profile
+    return Response(content=data, media_type=PROFILE_MEDIA_TYPES[fmt])
+
 # ====== REDIS ENDPOINTS DE EXEMPLO ======
 
 @app.get("/redis/status")
@@ -169,31 +517,54 @@ async def get_counter(name: str):
 
 # Exemplo de cache para os detalhes de acesso do NFT
 @app.get("/access-details-cached/{token_id}")
-async def get_access_details_cached(token_id: int, cache_time: int = 300):
+async def get_access_details_cached(token_id: int, cache_time: int = settings.ACCESS_CACHE_TTL_SECONDS):
     """
-    Obtém detalhes de acesso com cache Redis
-    cache_time: tempo de cache em segundos (padrão: 5 minutos)
+    Obtém detalhes de acesso com cache (memória do worker + Redis)
+    cache_time: tempo de cache em segundos (padrão: ACCESS_CACHE_TTL_SECONDS)
+    O cache é invalidado por delegate/revoke/mint, então o TTL pode ser longo.
+    Se a rota estiver descartando carga, serve a última leitura não
+    invalidada (stale) em vez de responder 503.
     """
-    cache_key = f"access_details:{token_id}"
-    
+    await validate_token_id(token_id)
+
     # Tenta buscar no cache primeiro
-    cached_data = await redis_service.get(cache_key)
-    if cached_data is not None:
+    cached = await access_cache.get(token_id)
+    if cached is not None:
+        cached_data, source, ttl = cached
         return {
             "data": cached_data,
             "from_cache": True,
-            "ttl": await redis_service.ttl(cache_key)
+            "source": source,
+            "ttl": ttl
         }
-    
+
     # Se não estiver no cache, busca os dados e armazena
     try:
-        access_details = nft_service.get_access_details(token_id)
-        await redis_service.set(cache_key, access_details, cache_time)
-        
+        generation = access_cache.generation(token_id)
+        async with admission_control.limit("/access-details-cached"):
+            access_details = await asyncio.to_thread(nft_service.get_access_details, token_id)
+        access_event_hub.schedule_expiry(token_id, access_details["expires_at"], access_details["delegatee"])
+        # is_active muda sozinho na expiração: o cache não pode durar além dela
+        if access_details["is_active"]:
+            cache_time = min(cache_time, access_details["expires_at"] - int(time.time()))
+        await access_cache.set(token_id, access_details, cache_time, generation)
+
         return {
             "data": access_details,
             "from_cache": False,
-            "cached_for": cache_time
+            "cached_for": max(cache_time, 0)
+        }
+    except (AdmissionRejected, RPCBudgetExceeded):
+        stale = await access_cache.get_stale(token_id)
+        if stale is None:
+            raise
+        stale_data, age = stale
+        return {
+            "data": stale_data,
+            "from_cache": True,
+            "source": "stale",
+            "stale": True,
+            "age": age
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar detalhes: {e}")
@@ -201,6 +572,8 @@ async def get_access_details_cached(token_id: int, cache_time: int = 300):
 @app.get("/reputation/{wallet_address}")
 async def get_reputation(wallet_address: str):
     """Retorna os dados de reputação de um endereço."""
+    # A reputação é registrada com o endereço normalizado (checksum)
+    wallet_address = normalize_address(wallet_address) or wallet_address
     reputation_data = await reputation_service.get_reputation_data(wallet_address)
     is_banned = await reputation_service.is_banned(wallet_address)
     ban_ttl = await reputation_service.get_ban_ttl(wallet_address) if is_banned else 0
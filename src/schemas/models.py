@@ -1,5 +1,20 @@
+from collections import Counter
 from pydantic import BaseModel, field_validator
 from web3 import Web3
+from src.config.settings import settings
+
+def validate_batch_size(items: list) -> list:
+    if not items:
+        raise ValueError("O lote deve conter ao menos um item")
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise ValueError(f"O lote pode conter no máximo {settings.BATCH_MAX_ITEMS} itens")
+    return items
+
+def validate_unique_tokens(token_ids: list):
+    # Duas transações no mesmo token do lote teriam resultado dependente da ordem de mineração
+    duplicated = sorted(t for t, count in Counter(token_ids).items() if count > 1)
+    if duplicated:
+        raise ValueError(f"Tokens repetidos no lote: {duplicated}")
 
 class DelegateAccessRequest(BaseModel):
     token_id: int
@@ -21,4 +36,30 @@ class MintNFTRequest(BaseModel):
         try:
             return Web3.to_checksum_address(v)
         except ValueError:
-            raise ValueError("Endereço Ethereum inválido para o destinatário")
\ No newline at end of file
+            raise ValueError("Endereço Ethereum inválido para o destinatário")
+
+class MintNFTBatchRequest(BaseModel):
+    items: list[MintNFTRequest]
+
+    @field_validator('items')
+    def validate_batch_size(cls, v):
+        return validate_batch_size(v)
+
+class DelegateAccessBatchRequest(BaseModel):
+    items: list[DelegateAccessRequest]
+
+    @field_validator('items')
+    def validate_items(cls, v):
+        # Tamanho primeiro: um corpo grande demais é rejeitado sem ser percorrido
+        validate_batch_size(v)
+        validate_unique_tokens([item.token_id for item in v])
+        return v
+
+class RevokeAccessBatchRequest(BaseModel):
+    token_ids: list[int]
+
+    @field_validator('token_ids')
+    def validate_token_ids(cls, v):
+        validate_batch_size(v)
+        validate_unique_tokens(v)
+        return v
\ No newline at end of file
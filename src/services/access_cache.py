@@ -0,0 +1,213 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+from src.services.redis_service import redis_service
+from src.contracts.iot_access_nft import parse_access_events
+from src.services.token_index import minted_token_ids
+from src.config.settings import settings
+
+# Canal pub/sub em que as invalidações (ids de token separados por vírgula) são anunciadas
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+def cache_key(token_id: int) -> str:
+    return f"access_details:{token_id}"
+
+def stale_key(token_id: int) -> str:
+    return f"access_details_stale:{token_id}"
+
+class AccessCache:
+    """
+    Cache em dois níveis dos detalhes de acesso: memória do worker + Redis.
+
+    Escritas (delegate/revoke/mint), confirmações de recibo e Transfers
+    publicam invalidações por token em `INVALIDATION_CHANNEL`; todo worker
+    descarta a entrada local e a chave `access_details:{token_id}` some do
+    Redis. Delegações feitas direto no contrato (fora deste serviço) são
+    percebidas pela varredura de logs do token_index no contrato v2 (eventos
+    AccessDelegated/AccessRevoked); no v1, só quando o TTL vence, por isso
+    ACCESS_CACHE_TTL_SECONDS é curto.
+    O nível local só é usado enquanto o worker está inscrito no canal
+    (sem a inscrição, uma invalidação poderia passar despercebida).
+
+    Cada leitura também deixa uma cópia antiga (`access_details_stale:`)
+    que sobrevive ao TTL, mas não à invalidação, servida quando a rota
+    descarta carga.
+    """
+
+    def __init__(self):
+        self._local: OrderedDict = OrderedDict()
+        self._generations: dict = {}
+        self._subscribed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stale_hits": 0, "invalidations": 0}
+
+    # ---- Leitura e escrita ----
+
+    def generation(self, token_id: int) -> int:
+        """Versão local do token; `set` ignora dados lidos antes de uma invalidação"""
+        return self._generations.get(token_id, 0)
+
+    def _get_local(self, token_id: int) -> Optional[tuple]:
+        item = self._local.get(token_id)
+        if item is None:
+            return None
+        data, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._local[token_id]
+            return None
+        self._local.move_to_end(token_id)
+        return data, expires_at
+
+    def _set_local(self, token_id: int, data: dict, ttl: float):
+        if not self._subscribed or settings.ACCESS_CACHE_LOCAL_SIZE <= 0:
+            return
+        self._local[token_id] = (data, time.monotonic() + min(ttl, settings.ACCESS_CACHE_LOCAL_TTL_SECONDS))
+        self._local.move_to_end(token_id)
+        while len(self._local) > settings.ACCESS_CACHE_LOCAL_SIZE:
+            self._local.popitem(last=False)
+
+    async def get(self, token_id: int) -> Optional[tuple]:
+        """
+        Busca os detalhes em memória e depois no Redis
+
+        Returns:
+            (dados, origem "local" ou "redis", ttl em segundos) ou None
+        """
+        local = self._get_local(token_id) if self._subscribed else None
+        if local is not None:
+            self.stats_counters["local_hits"] += 1
+            return local[0], "local", int(local[1] - time.monotonic())
+
+        generation = self.generation(token_id)
+        data = await redis_service.get(cache_key(token_id))
+        if data is None:
+            self.stats_counters["misses"] += 1
+            return None
+        self.stats_counters["redis_hits"] += 1
+        ttl = await redis_service.ttl(cache_key(token_id))
+        if ttl > 0 and self.generation(token_id) == generation:
+            self._set_local(token_id, data, ttl)
+        return data, "redis", ttl
+
+    async def set(self, token_id: int, data: dict, ttl: int, generation: int) -> bool:
+        """
+        Armazena os detalhes lidos da blockchain
+
+        Não grava nada se o token foi invalidado depois da leitura
+        (`generation` obtido antes de consultar a rede).
+        """
+        if self.generation(token_id) != generation or ttl <= 0:
+            return False
+        self._set_local(token_id, data, ttl)
+        await redis_service.set(stale_key(token_id), {"data": data, "cached_at": int(time.time())},
+                                settings.ACCESS_CACHE_STALE_SECONDS)
+        return await redis_service.set(cache_key(token_id), data, ttl)
+
+    async def get_stale(self, token_id: int) -> Optional[tuple]:
+        """
+        Última leitura do token ainda não invalidada, mesmo com o TTL vencido
+
+        Returns:
+            (dados com is_active recalculado pelo relógio local, idade em segundos) ou None
+        """
+        entry = await redis_service.get(stale_key(token_id))
+        if entry is None:
+            return None
+        self.stats_counters["stale_hits"] += 1
+        data = {**entry["data"], "is_active": entry["data"]["expires_at"] > time.time()}
+        return data, int(time.time()) - entry["cached_at"]
+
+    # ---- Invalidação ----
+
+    def _drop_local(self, token_ids: list):
+        for token_id in token_ids:
+            self._generations[token_id] = self.generation(token_id) + 1
+            self._local.pop(token_id, None)
+        self.stats_counters["invalidations"] += len(token_ids)
+
+    async def invalidate(self, *token_ids: int):
+        """Remove os tokens do cache deste worker e do Redis e avisa os demais workers"""
+        token_ids = [int(token_id) for token_id in token_ids if token_id is not None]
+        if not token_ids:
+            return
+        self._drop_local(token_ids)
+        for token_id in token_ids:
+            await redis_service.delete(cache_key(token_id))
+            await redis_service.delete(stale_key(token_id))
+        await redis_service.publish(INVALIDATION_CHANNEL, ",".join(map(str, token_ids)))
+
+    def invalidate_threadsafe(self, *token_ids: int):
+        """Agenda uma invalidação a partir de outra thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: asyncio.create_task(self.invalidate(*token_ids)))
+
+    async def on_receipt(self, event: str, entry: dict):
+        """Assinante do receipt_tracker: invalida os tokens afetados por transações mineradas"""
+        if event not in ("mined", "confirmed", "reorged"):
+            return
+        token_ids = [entry.get("token_id"), *entry.get("token_ids", [])]
+        logs = (entry.get("receipt") or {}).get("logs", [])
+        if entry.get("kind") == "mint":
+            token_ids += minted_token_ids(logs)
+        token_ids += [event["token_id"] for event in parse_access_events(logs)]
+        await self.invalidate(*set(token_ids))
+
+    def on_transfer(self, token_id: int, sender: str, recipient: str, block: Optional[int]):
+        """Ouvinte do token_index (executado na thread de varredura)"""
+        self.invalidate_threadsafe(token_id)
+
+    def on_access_event(self, event: dict):
+        """Ouvinte do token_index para AccessDelegated/AccessRevoked (thread de varredura)"""
+        self.invalidate_threadsafe(event["token_id"])
+
+    # ---- Inscrição no canal ----
+
+    def start(self):
+        """Inicia a escuta das invalidações dos demais workers"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Interrompe a escuta e descarta o cache local"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._subscribed = False
+        self._local.clear()
+
+    async def _listen(self):
+        while True:
+            pubsub = redis_service.pubsub()
+            if pubsub is None:
+                await asyncio.sleep(settings.ACCESS_CACHE_LOCAL_TTL_SECONDS)
+                continue
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Invalidações perdidas enquanto desinscrito: recomeça do zero
+                self._local.clear()
+                self._subscribed = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._drop_local([int(token_id) for token_id in message["data"].split(",")])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Barramento de invalidação desconectado: {e}")
+            finally:
+                self._subscribed = False
+                self._local.clear()
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {"subscribed": self._subscribed, "local_entries": len(self._local), **self.stats_counters}
+
+# Instância global do cache de detalhes de acesso
+access_cache = AccessCache()
@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import json
+import time
+from typing import Optional
+from src.config.settings import settings
+from src.contracts.iot_access_nft import parse_access_events
+from src.services.receipt_tracker import receipt_tracker
+from src.services.token_index import minted_token_ids
+
+class AccessEventHub:
+    """
+    Distribui mudanças de estado de acesso aos clientes inscritos (SSE).
+
+    Uma única tarefa por worker recebe os eventos das fontes (confirmações
+    de delegate/revoke/mint do receipt_tracker, Transfers e, no contrato v2,
+    AccessDelegated/AccessRevoked da varredura do token_index e expirações
+    calculadas localmente) e os repassa às filas
+    dos clientes inscritos em cada token. Nenhum cliente consulta a rede.
+    """
+
+    def __init__(self):
+        self.contract = None
+        self._subscribers: dict = {}
+        self._inbox: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._expiries: list = []
+        self._known_expiry: dict = {}
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    # ---- Inscrições ----
+
+    def subscribe(self, token_ids: list) -> asyncio.Queue:
+        """Cria a fila de um cliente inscrito nos tokens informados"""
+        queue = asyncio.Queue(maxsize=settings.SSE_CLIENT_QUEUE_SIZE)
+        for token_id in token_ids:
+            self._subscribers.setdefault(token_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, token_ids: list):
+        """Remove a fila de um cliente desconectado"""
+        for token_id in token_ids:
+            queues = self._subscribers.get(token_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[token_id]
+
+    def subscriber_count(self) -> int:
+        return len({queue for queues in self._subscribers.values() for queue in queues})
+
+    # ---- Fontes de eventos ----
+
+    def publish(self, event_type: str, token_id: int, **data):
+        """Enfileira um evento para distribuição (chamar no event loop)"""
+        if self._inbox is not None:
+            self._inbox.put_nowait({"type": event_type, "token_id": token_id, "ts": int(time.time()), **data})
+
+    def publish_threadsafe(self, event_type: str, token_id: int, **data):
+        """Enfileira um evento a partir de outra thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: self.publish(event_type, token_id, **data))
+
+    def schedule_expiry(self, token_id: int, expires_at: int, delegatee: Optional[str] = None):
+        """Agenda o evento de expiração de uma delegação conhecida"""
+        if not expires_at or expires_at <= time.time():
+            self._known_expiry.pop(token_id, None)
+            return
+        if self._known_expiry.get(token_id) == expires_at:
+            return
+        self._known_expiry[token_id] = expires_at
+        heapq.heappush(self._expiries, (expires_at, token_id, delegatee))
+        if self._inbox is not None:
+            # Acorda a tarefa para recalcular o próximo prazo
+            self._inbox.put_nowait(None)
+
+    def on_transfer(self, token_id: int, sender: str, recipient: str, block: Optional[int]):
+        """Ouvinte do token_index (executado na thread de varredura)"""
+        self.publish_threadsafe("transfer", token_id, **{"from": sender, "to": recipient, "block": block})
+
+    def _publish_access(self, event: dict, tx_hash: Optional[str] = None):
+        """Publica um evento AccessDelegated/AccessRevoked decodificado (chamar no event loop)"""
+        token_id = event["token_id"]
+        tx_hash = tx_hash or event.get("tx_hash")
+        if event["event"] == "AccessDelegated":
+            self.schedule_expiry(token_id, event["expires_at"], event["delegatee"])
+            self.publish("delegated", token_id, tx_hash=tx_hash,
+                         delegatee=event["delegatee"], expires_at=event["expires_at"])
+        else:
+            self._known_expiry.pop(token_id, None)
+            self.publish("revoked", token_id, tx_hash=tx_hash)
+
+    def on_access_event(self, event: dict):
+        """Ouvinte do token_index (thread de varredura) para eventos de acesso do contrato v2"""
+        # Transações deste serviço são publicadas na confirmação do recibo
+        if self._loop is None or (event.get("tx_hash") and receipt_tracker.status(event["tx_hash"])):
+            return
+        self._loop.call_soon_threadsafe(self._publish_access, event)
+
+    async def on_receipt(self, event: str, entry: dict):
+        """Assinante do receipt_tracker: publica as operações confirmadas"""
+        if event != "confirmed" or entry.get("status") != "success":
+            return
+        token_id = entry.get("token_id")
+        logs = (entry.get("receipt") or {}).get("logs", [])
+        access_events = parse_access_events(logs)
+        if entry.get("kind") == "mint":
+            for minted_id in minted_token_ids(logs):
+                self.publish("minted", minted_id, tx_hash=entry["tx_hash"])
+        elif access_events:
+            # Contrato v2: os eventos trazem delegatee e prazo, sem nova leitura na rede
+            for access_event in access_events:
+                self._publish_access(access_event, entry["tx_hash"])
+        elif token_id is None:
+            return
+        elif entry["kind"] == "delegate":
+            details = await self._fetch_details(token_id)
+            self.publish("delegated", token_id, tx_hash=entry["tx_hash"], **(details or {}))
+        elif entry["kind"] == "revoke":
+            self._known_expiry.pop(token_id, None)
+            self.publish("revoked", token_id, tx_hash=entry["tx_hash"])
+
+    async def _fetch_details(self, token_id: int) -> Optional[dict]:
+        try:
+            delegatee, expires_at = await asyncio.to_thread(self.contract.get_access_details, token_id)
+        except Exception as e:
+            print(f"⚠️  Não foi possível ler a delegação do token {token_id}: {e}")
+            return None
+        if delegatee is None:
+            return None
+        self.schedule_expiry(token_id, expires_at, delegatee)
+        return {"delegatee": delegatee, "expires_at": expires_at}
+
+    # ---- Distribuição ----
+
+    def _dispatch(self, event: dict):
+        payload = json.dumps(event)
+        for queue in list(self._subscribers.get(event["token_id"], ())):
+            if queue.full():
+                # Cliente lento: descarta o evento mais antigo dele
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait((event["type"], payload))
+
+    def _pop_expired(self):
+        now = time.time()
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, token_id, delegatee = heapq.heappop(self._expiries)
+            # Ignora prazos substituídos por uma nova delegação ou revogação
+            if self._known_expiry.get(token_id) == expires_at:
+                del self._known_expiry[token_id]
+                self._dispatch({"type": "expired", "token_id": token_id, "ts": int(now),
+                                "delegatee": delegatee, "expires_at": expires_at})
+
+    async def _run(self):
+        while True:
+            timeout = max(self._expiries[0][0] - time.time(), 0) if self._expiries else None
+            try:
+                event = await asyncio.wait_for(self._inbox.get(), timeout)
+                if event is not None:
+                    self._dispatch(event)
+            except asyncio.TimeoutError:
+                pass
+            self._pop_expired()
+
+    def start(self, contract):
+        """Inicia a tarefa de distribuição do worker"""
+        self.contract = contract
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._inbox = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe a tarefa de distribuição"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscriber_count(),
+            "tokens": len(self._subscribers),
+            "scheduled_expiries": len(self._known_expiry),
+            "dropped": self.dropped,
+        }
+
+# Instância global do hub de eventos de acesso
+access_event_hub = AccessEventHub()
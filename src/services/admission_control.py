@@ -0,0 +1,128 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import HTTPException
+from src.config.settings import settings
+
+class AdmissionRejected(Exception):
+    """A rota já está no limite de requisições em andamento"""
+
+    def __init__(self, route: str, retry_after: float):
+        super().__init__(f"Serviço sobrecarregado em '{route}', tente novamente")
+        self.route = route
+        self.retry_after = retry_after
+
+class AdaptiveLimit:
+    """
+    Limite de concorrência AIMD de uma rota.
+
+    Cada resposta dentro da latência alvo, com a rota ao menos meio ocupada,
+    soma 1/limite (≈ +1 por rodada); uma resposta lenta ou uma falha de
+    sobrecarga multiplica o limite por ADMISSION_BACKOFF_RATIO, no máximo
+    uma vez por janela de latência alvo, para que uma leva de respostas
+    lentas simultâneas não derrube o limite de uma vez.
+    """
+
+    def __init__(self, latency_target: float):
+        self.latency_target = latency_target
+        self.limit = float(settings.ADMISSION_INITIAL_LIMIT)
+        self.inflight = 0
+        self.latency_ewma: Optional[float] = None
+        self._last_decrease = 0.0
+        self.counters = {"admitted": 0, "rejected": 0, "decreases": 0}
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= int(self.limit):
+            self.counters["rejected"] += 1
+            return False
+        self.inflight += 1
+        self.counters["admitted"] += 1
+        return True
+
+    def release(self, latency: float, overloaded: bool):
+        busy = self.inflight >= self.limit / 2
+        self.inflight -= 1
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+        if overloaded or latency > self.latency_target:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(float(settings.ADMISSION_MIN_LIMIT), self.limit * settings.ADMISSION_BACKOFF_RATIO)
+                self._last_decrease = now
+                self.counters["decreases"] += 1
+        elif busy:
+            self.limit = min(float(settings.ADMISSION_MAX_LIMIT), self.limit + 1 / self.limit)
+
+    def retry_after(self) -> float:
+        """Estimativa de quando uma vaga deve abrir: a latência típica da rota"""
+        return self.latency_ewma if self.latency_ewma is not None else self.latency_target
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "latency_target": self.latency_target,
+            **self.counters,
+        }
+
+class AdmissionControl:
+    """
+    Controle de admissão das rotas que dependem da blockchain.
+
+    Cada rota tem um AdaptiveLimit próprio. Acima do limite a requisição é
+    recusada na hora (AdmissionRejected → 503 com Retry-After) em vez de
+    esperar na fila do worker enquanto o provedor está lento; rotas com
+    cache podem capturar a exceção e servir dados antigos.
+    """
+
+    def __init__(self):
+        self._limits: dict = {}
+
+    def _limit(self, route: str, write: bool) -> AdaptiveLimit:
+        limit = self._limits.get(route)
+        if limit is None:
+            target = (
+                settings.ADMISSION_WRITE_LATENCY_TARGET_SECONDS if write
+                else settings.ADMISSION_READ_LATENCY_TARGET_SECONDS
+            )
+            limit = self._limits[route] = AdaptiveLimit(target)
+        return limit
+
+    @asynccontextmanager
+    async def limit(self, route: str, write: bool = False):
+        """
+        Executa o bloco ocupando uma vaga da rota
+
+        Raises:
+            AdmissionRejected: a rota está no limite
+        """
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            yield
+            return
+        limit = self._limit(route, write)
+        if not limit.try_acquire():
+            raise AdmissionRejected(route, limit.retry_after())
+
+        start = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except HTTPException as e:
+            # Erros de validação/negócio não indicam sobrecarga
+            overloaded = e.status_code >= 500
+            raise
+        except Exception:
+            overloaded = True
+            raise
+        finally:
+            limit.release(time.monotonic() - start, overloaded)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.ADMISSION_CONTROL_ENABLED,
+            "routes": {route: limit.stats() for route, limit in self._limits.items()},
+        }
+
+# Instância global do controle de admissão
+admission_control = AdmissionControl()
@@ -0,0 +1,165 @@
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Optional
+from src.config.settings import settings
+from src.contracts.chain_client import batch_rpc
+from src.contracts.rpc_scheduler import rpc_priority
+from src.services.redis_service import redis_service
+
+# Stream com todas as decisões e prefixos dos streams indexados por token e por carteira
+AUDIT_STREAM = "audit:access"
+AUDIT_TOKEN_STREAM = "audit:token:{}"
+AUDIT_WALLET_STREAM = "audit:wallet:{}"
+
+# Formato dos ids de stream aceitos como cursor (<ms>-<seq>)
+AUDIT_CURSOR_PATTERN = re.compile(r"^\d+-\d+$")
+# Entradas lidas por ida ao Redis quando a página é filtrada por token e carteira
+AUDIT_FILTER_SCAN_COUNT = 500
+
+class AuditService:
+    """
+    Trilha de auditoria das decisões de /access.
+
+    `record` apenas enfileira o registro em memória (sem I/O no caminho da
+    requisição). Uma tarefa em segundo plano grava os registros em lote, por
+    pipeline, em um Redis Stream limitado (`AUDIT_STREAM`) e em streams por
+    token e por carteira, que permitem consultas paginadas por intervalo de
+    ids sem varrer o stream completo.
+    """
+
+    def __init__(self):
+        self._queue: deque = deque()
+        self.latest_block: Optional[int] = None
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, token_id: int, user: str, result: str, latency: float):
+        """Enfileira uma decisão de acesso para gravação em lote"""
+        if not settings.AUDIT_ENABLED:
+            return
+        if len(self._queue) >= settings.AUDIT_QUEUE_MAX:
+            # Fila cheia (Redis lento ou fora): descarta o mais antigo e contabiliza
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append({
+            "ts": int(time.time() * 1000),
+            "token_id": token_id,
+            "user": user,
+            "result": result,
+            "latency_ms": round(latency * 1000, 3),
+            "block": self.latest_block,
+        })
+
+    def _entries(self, record: dict) -> list:
+        fields = {k: "" if v is None else str(v) for k, v in record.items()}
+        entries = [(AUDIT_STREAM, fields, settings.AUDIT_STREAM_MAXLEN, None)]
+        if record["result"] != "rejected":
+            # Requisições inválidas ficam só no stream geral para não criar chaves arbitrárias
+            entries.append((AUDIT_TOKEN_STREAM.format(record["token_id"]), fields,
+                            settings.AUDIT_INDEX_MAXLEN, settings.AUDIT_INDEX_TTL_SECONDS))
+            entries.append((AUDIT_WALLET_STREAM.format(record["user"]), fields,
+                            settings.AUDIT_INDEX_MAXLEN, settings.AUDIT_INDEX_TTL_SECONDS))
+        return entries
+
+    async def flush(self) -> int:
+        """Grava até AUDIT_BATCH_SIZE registros da fila em um único pipeline"""
+        batch = [self._queue.popleft() for _ in range(min(len(self._queue), settings.AUDIT_BATCH_SIZE))]
+        if not batch:
+            return 0
+        entries = [entry for record in batch for entry in self._entries(record)]
+        if not await redis_service.stream_add_many(entries):
+            # Devolve para a fila (na ordem original) para a próxima tentativa
+            self._queue.extendleft(reversed(batch))
+            return 0
+        return len(batch)
+
+    async def _update_block(self):
+        # Um eth_blockNumber por intervalo de flush (e só quando há tráfego)
+        try:
+            result = (await asyncio.to_thread(batch_rpc, [("eth_blockNumber", [])]))[0]
+            if result is not None:
+                self.latest_block = int(result, 16)
+        except Exception as e:
+            print(f"⚠️  Não foi possível atualizar o bloco da auditoria: {e}")
+
+    def start(self):
+        """Inicia a gravação em lote em segundo plano"""
+        if settings.AUDIT_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe a gravação periódica e grava o que restar na fila"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue and await self.flush():
+            pass
+
+    async def _run(self):
+        rpc_priority.set("background")
+        while True:
+            await asyncio.sleep(settings.AUDIT_FLUSH_INTERVAL_MS / 1000)
+            if not self._queue:
+                continue
+            await self._update_block()
+            try:
+                while len(self._queue) and await self.flush() == settings.AUDIT_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                print(f"❌ Erro ao gravar auditoria: {e}")
+
+    async def query(self, token_id: Optional[int] = None, wallet: Optional[str] = None,
+                    cursor: Optional[str] = None, limit: int = 50) -> dict:
+        """
+        Lê decisões da mais recente para a mais antiga
+
+        Args:
+            token_id: Filtra por token (usa o stream do token)
+            wallet: Filtra por carteira (usa o stream da carteira)
+            cursor: Id da última entrada da página anterior (exclusivo, formato
+                AUDIT_CURSOR_PATTERN)
+            limit: Tamanho da página
+
+        Com os dois filtros, pagina pelo stream do token e continua lendo até
+        juntar `limit` entradas da carteira (ou o stream acabar), então uma
+        página curta sempre significa fim dos resultados.
+        """
+        if cursor is not None and not AUDIT_CURSOR_PATTERN.match(cursor):
+            raise ValueError(f"Cursor de auditoria inválido: {cursor!r}")
+        if token_id is not None:
+            stream = AUDIT_TOKEN_STREAM.format(token_id)
+        elif wallet is not None:
+            stream = AUDIT_WALLET_STREAM.format(wallet)
+        else:
+            stream = AUDIT_STREAM
+        filter_wallet = token_id is not None and wallet is not None
+        count = max(limit, AUDIT_FILTER_SCAN_COUNT) if filter_wallet else limit
+
+        items = []
+        end = f"({cursor}" if cursor else "+"
+        while True:
+            entries = await redis_service.stream_range(stream, end=end, count=count, reverse=True)
+            if entries is None:
+                return None
+            for entry_id, fields in entries:
+                if filter_wallet and fields.get("user") != wallet:
+                    continue
+                items.append({"id": entry_id, **fields})
+                if len(items) == limit:
+                    return {"items": items, "next_cursor": entry_id}
+            if len(entries) < count:
+                return {"items": items, "next_cursor": None}
+            end = f"({entries[-1][0]}"
+
+    def stats(self) -> dict:
+        """Métricas da fila de auditoria"""
+        return {"queued": len(self._queue), "dropped": self.dropped}
+
+# Instância global do serviço de auditoria
+audit_service = AuditService()
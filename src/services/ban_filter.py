@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import math
+from typing import Optional
+from src.services.redis_service import redis_service
+from src.config.settings import settings
+
+# Canal pub/sub em que os banimentos são anunciados a todos os workers
+BAN_CHANNEL = "bans:added"
+
+class BloomFilter:
+    """Filtro de Bloom simples sobre um bytearray (hashing duplo com BLAKE2b)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        # Conta apenas itens novos (reanúncios do mesmo banimento não inflam o total)
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def estimated_error_rate(self) -> float:
+        """Taxa de falso positivo estimada para o número atual de itens"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+class BanFilter:
+    """
+    Filtro de Bloom, por worker, das carteiras banidas.
+
+    Uma resposta negativa dispensa o Redis por completo; uma positiva precisa
+    ser confirmada com EXISTS. O filtro é reconstruído periodicamente a
+    partir de `ban:*` (descartando banimentos expirados) e recebe novos
+    banimentos pelo canal pub/sub `BAN_CHANNEL`. Enquanto não estiver
+    sincronizado, toda consulta cai no Redis.
+    """
+
+    def __init__(self):
+        self.filter: Optional[BloomFilter] = None
+        self.ready = False
+        self._subscribed = False
+        self._added_during_rebuild: Optional[set] = None
+        self._tasks: list = []
+        self.stats_counters = {"skipped": 0, "confirmed": 0, "false_positives": 0, "rebuilds": 0}
+
+    def might_be_banned(self, wallet_address: str) -> bool:
+        """False garante que a carteira não está banida; True exige confirmação no Redis"""
+        if not self.ready or self.filter is None:
+            return True
+        if wallet_address in self.filter:
+            return True
+        self.stats_counters["skipped"] += 1
+        return False
+
+    def record_confirmation(self, banned: bool):
+        """Registra o resultado da confirmação de um positivo no Redis"""
+        self.stats_counters["confirmed"] += 1
+        if not banned:
+            self.stats_counters["false_positives"] += 1
+
+    def add(self, wallet_address: str):
+        """Adiciona uma carteira recém-banida ao filtro local"""
+        if self.filter is not None:
+            self.filter.add(wallet_address)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.add(wallet_address)
+
+    async def announce(self, wallet_address: str):
+        """Adiciona a carteira localmente e avisa os demais workers"""
+        self.add(wallet_address)
+        await redis_service.publish(BAN_CHANNEL, wallet_address)
+
+    async def rebuild(self) -> bool:
+        """Reconstrói o filtro a partir das chaves `ban:*` existentes"""
+        self._added_during_rebuild = set()
+        try:
+            keys = await redis_service.scan_keys("ban:*")
+            if keys is None:
+                self.ready = False
+                return False
+            new_filter = BloomFilter(
+                max(settings.BAN_FILTER_CAPACITY, 2 * len(keys)),
+                settings.BAN_FILTER_ERROR_RATE
+            )
+            for key in keys:
+                new_filter.add(key[len("ban:"):])
+            for wallet_address in self._added_during_rebuild:
+                new_filter.add(wallet_address)
+            self.filter = new_filter
+            self.ready = self._subscribed
+            self.stats_counters["rebuilds"] += 1
+            return True
+        finally:
+            self._added_during_rebuild = None
+
+    def start(self):
+        """Inicia a escuta de banimentos e a reconstrução periódica"""
+        if settings.BAN_FILTER_ENABLED and not self._tasks:
+            self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._refresh())]
+
+    async def stop(self):
+        """Interrompe as tarefas em segundo plano"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self.ready = False
+
+    async def _listen(self):
+        while True:
+            pubsub = redis_service.pubsub()
+            if pubsub is None:
+                self.ready = False
+                await asyncio.sleep(settings.BAN_FILTER_REBUILD_SECONDS)
+                continue
+            try:
+                await pubsub.subscribe(BAN_CHANNEL)
+                self._subscribed = True
+                await self.rebuild()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.add(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Filtro de banidos dessincronizado: {e}")
+            finally:
+                self._subscribed = False
+                self.ready = False
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+    async def _refresh(self):
+        while True:
+            await asyncio.sleep(settings.BAN_FILTER_REBUILD_SECONDS)
+            if self._subscribed:
+                try:
+                    await self.rebuild()
+                except Exception as e:
+                    print(f"❌ Erro ao reconstruir filtro de banidos: {e}")
+
+    def stats(self) -> dict:
+        """Métricas do filtro (tamanho, taxa de falso positivo e uso)"""
+        data = {"ready": self.ready, **self.stats_counters}
+        if self.filter is not None:
+            data.update(
+                size_bits=self.filter.size,
+                size_bytes=len(self.filter.bits),
+                hash_functions=self.filter.hash_count,
+                items=self.filter.count,
+                capacity=self.filter.capacity,
+                target_error_rate=self.filter.error_rate,
+                estimated_error_rate=self.filter.estimated_error_rate(),
+            )
+        negatives = data["skipped"] + data["false_positives"]
+        if negatives:
+            data["observed_error_rate"] = data["false_positives"] / negatives
+        return data
+
+# Instância global do filtro de banidos
+ban_filter = BanFilter()
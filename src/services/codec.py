@@ -0,0 +1,110 @@
+import json
+from functools import lru_cache
+from typing import Any
+from fastapi.responses import JSONResponse, ORJSONResponse
+from src.config.settings import settings
+
+# Prefixos que identificam o formato de um valor gravado no Redis.
+# Começam com \x00, que nunca aparece no início de valores antigos (JSON ou texto).
+STRING_TAG = b"\x00s"
+JSON_TAG = b"\x00j"
+MSGPACK_TAG = b"\x00m"
+
+class JsonCodec:
+    """JSON da biblioteca padrão"""
+    tag = JSON_TAG
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class OrjsonCodec:
+    """JSON via orjson (mesmo formato do JsonCodec, serialização mais rápida)"""
+    tag = JSON_TAG
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value, option=self._orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return self._orjson.loads(data)
+
+class MsgpackCodec:
+    """MessagePack (binário, mais compacto)"""
+    tag = MSGPACK_TAG
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+CODECS = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+@lru_cache(maxsize=None)
+def get_codec(name: str):
+    """
+    Retorna o codec pelo nome, usando JSON padrão se a dependência
+    opcional (orjson/msgpack) não estiver instalada
+    """
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"Codec desconhecido: {name}")
+    except ImportError:
+        print(f"⚠️  Codec '{name}' indisponível (dependência não instalada), usando 'json'")
+        return JsonCodec()
+
+def _codec_for_tag(tag: bytes):
+    configured = get_codec(settings.REDIS_CODEC)
+    if configured.tag == tag:
+        return configured
+    # Valor gravado com outro codec (ex.: após trocar REDIS_CODEC)
+    return get_codec("msgpack") if tag == MSGPACK_TAG else JsonCodec()
+
+def encode_value(value: Any) -> bytes:
+    """Serializa um valor para o Redis, marcando o tipo para que strings e estruturas não se confundam"""
+    if isinstance(value, str):
+        return STRING_TAG + value.encode()
+    codec = get_codec(settings.REDIS_CODEC)
+    return codec.tag + codec.dumps(value)
+
+def decode_value(data: bytes) -> Any:
+    """
+    Desserializa um valor lido do Redis
+
+    Valores sem marcação (gravados antes dos codecs, ou por INCR) são lidos
+    como JSON e, se não forem JSON, como texto.
+    """
+    tag = data[:2]
+    if tag == STRING_TAG:
+        return data[2:].decode()
+    if tag in (JSON_TAG, MSGPACK_TAG):
+        return _codec_for_tag(tag).loads(data[2:])
+    try:
+        return json.loads(data)
+    except ValueError:
+        return data.decode(errors="replace")
+
+def get_response_class():
+    """Classe de resposta padrão da API conforme API_JSON_CODEC"""
+    if settings.API_JSON_CODEC == "orjson":
+        try:
+            import orjson  # noqa: F401
+            return ORJSONResponse
+        except ImportError:
+            print("⚠️  orjson não instalado, usando JSONResponse")
+    return JSONResponse
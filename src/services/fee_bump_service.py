@@ -0,0 +1,137 @@
+import asyncio
+import math
+import time
+from typing import Optional
+from web3 import Web3
+from src.config.settings import settings
+from src.contracts.rpc_scheduler import rpc_priority
+from src.services.receipt_tracker import receipt_tracker
+
+# Erros de envio que indicam que esta versão da transação já está no mempool
+_KNOWN_TX_ERRORS = ("already known", "known transaction")
+
+# Erros de envio que indicam que o nonce já foi consumido (alguma versão foi minerada)
+_NONCE_USED_ERRORS = ("nonce too low", "nonce has already been used")
+
+class FeeBumpService:
+    """
+    Detecta transações presas no mempool e as substitui por uma versão com
+    o mesmo nonce e taxas EIP-1559 maiores, respeitando um teto configurável.
+
+    As transações acompanhadas pelo `receipt_tracker` que seguem sem recibo
+    após `STUCK_TX_THRESHOLD_SECONDS` são reassinadas; o rastreador passa a
+    consultar todos os hashes do mesmo nonce e registra qual foi minerado.
+    """
+
+    def __init__(self):
+        self.contract = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, contract):
+        """Inicia a verificação periódica usando o cliente do contrato informado"""
+        self.contract = contract
+        if settings.FEE_BUMP_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe a verificação periódica"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # Substituições disputam o orçamento de RPC como escritas, não como segundo plano
+        rpc_priority.set("write")
+        while True:
+            try:
+                await self.check_once()
+            except Exception as e:
+                print(f"❌ Erro ao verificar transações presas: {e}")
+            await asyncio.sleep(settings.FEE_BUMP_CHECK_INTERVAL_SECONDS)
+
+    def stuck_transactions(self, now: Optional[float] = None) -> list:
+        """Retorna as transações pendentes há mais tempo que o limite configurado"""
+        now = now or time.time()
+        return [
+            entry for entry in receipt_tracker.pending_entries()
+            if entry["receipt"] is None
+            and entry.get("tx") is not None
+            and entry.get("bumps", 0) < settings.FEE_BUMP_MAX_ATTEMPTS
+            and now - max(entry["last_submitted_at"], entry.get("last_bump_attempt_at", 0)) >= settings.STUCK_TX_THRESHOLD_SECONDS
+        ]
+
+    async def check_once(self):
+        """Substitui as transações presas (nenhuma chamada RPC se não houver)"""
+        for entry in self.stuck_transactions():
+            try:
+                await asyncio.to_thread(self.bump, entry)
+            except Exception as e:
+                # Uma falha (ex.: "replacement transaction underpriced") não impede as demais;
+                # a transação volta a ser candidata só após outro STUCK_TX_THRESHOLD_SECONDS
+                # (sem mexer em last_submitted_at, que conta o prazo de descarte no rastreador)
+                entry["last_bump_attempt_at"] = time.time()
+                print(f"❌ Erro ao substituir a transação {entry['tx_hash']}: {e}")
+
+    def bumped_fees(self, tx: dict) -> Optional[dict]:
+        """
+        Calcula as novas taxas para substituir a transação.
+
+        Retorna None se o teto não permitir o aumento mínimo exigido pelos
+        nós para aceitar a substituição.
+        """
+        factor = 1 + settings.FEE_BUMP_PERCENT / 100
+        ceiling = Web3.to_wei(settings.FEE_BUMP_MAX_FEE_GWEI, "gwei")
+
+        if "gasPrice" in tx:
+            min_price = math.ceil(tx["gasPrice"] * factor)
+            gas_price = max(min_price, self.contract.w3.eth.gas_price)
+            if min(gas_price, ceiling) < min_price:
+                return None
+            return {"gasPrice": min(gas_price, ceiling)}
+
+        min_priority = math.ceil(tx["maxPriorityFeePerGas"] * factor)
+        min_max_fee = math.ceil(tx["maxFeePerGas"] * factor)
+
+        base_fee = self.contract.w3.eth.get_block("latest").get("baseFeePerGas", 0)
+        priority = max(min_priority, self.contract.w3.eth.max_priority_fee)
+        max_fee = min(max(min_max_fee, 2 * base_fee + priority), ceiling)
+        priority = min(priority, max_fee)
+
+        if max_fee < min_max_fee or priority < min_priority:
+            return None
+        return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": priority}
+
+    def bump(self, entry: dict) -> Optional[str]:
+        """Reassina a transação com o mesmo nonce e taxas maiores e a reenvia"""
+        fees = self.bumped_fees(entry["tx"])
+        if fees is None:
+            entry["bumps"] = settings.FEE_BUMP_MAX_ATTEMPTS
+            print(f"⚠️  Transação {entry['tx_hash']} presa, mas o teto de taxa foi atingido")
+            return None
+
+        new_tx = {**entry["tx"], **fees}
+        try:
+            new_hash = self.contract.sign_and_send(new_tx, settings.PRIVATE_KEY)
+        except Exception as e:
+            message = str(e).lower()
+            if any(msg in message for msg in _NONCE_USED_ERRORS):
+                # Alguma versão já foi minerada; o rastreador vai encontrar o recibo
+                entry["bumps"] = settings.FEE_BUMP_MAX_ATTEMPTS
+                return None
+            if any(msg in message for msg in _KNOWN_TX_ERRORS):
+                # Já está no mempool: espera outro intervalo antes de tentar de novo
+                entry["last_bump_attempt_at"] = time.time()
+                return None
+            raise
+
+        entry["bumps"] = entry.get("bumps", 0) + 1
+        receipt_tracker.replace(entry["tx_hash"], new_hash, new_tx)
+        print(f"⛽ Transação {entry['tx_hash']} (nonce {new_tx['nonce']}) substituída por {new_hash}")
+        return new_hash
+
+# Instância global do serviço de substituição de taxas
+fee_bump_service = FeeBumpService()
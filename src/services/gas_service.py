@@ -1,9 +1,9 @@
-from web3 import Web3
 from src.config.settings import settings
+from src.contracts.chain_client import get_web3
 
 class GasService:
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(settings.NETWORK_URL))
+        self.w3 = get_web3()
 
     def estimate_gas_for_mint(self, recipient: str, token_uri: str) -> int:
         tx = {
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from src.config.settings import settings
+from src.contracts.chain_client import submission_marker
+from src.services.redis_service import redis_service
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_KEY = "idempotency:{}:{}:{}"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+class IdempotencyService:
+    """
+    Deduplicação de requisições de escrita pelo cabeçalho `Idempotency-Key`.
+
+    A primeira requisição com uma chave a reserva no Redis (SET NX) e, ao
+    terminar, grava o status e o corpo da resposta por IDEMPOTENCY_TTL_SECONDS.
+    Repetições com a mesma chave recebem essa resposta (com o tx_hash ou o
+    resultado do lote original) sem montar nem enviar outra transação; se a
+    primeira ainda estiver em andamento, esperam por ela.
+
+    Um erro só libera a chave (a repetição executa de novo) se nenhuma
+    transação chegou a ser postada ao nó: admissão recusada, orçamento de
+    RPC esgotado, validação. Se o envio já começou e a requisição falhou
+    (timeout do eth_sendRawTransaction, exceção depois do envio), o nó pode
+    ter aceitado a transação: o registro fica "unknown" e as repetições
+    recebem 409 em vez de enviar de novo.
+
+    A chave vale por método e caminho, e a repetição precisa ter o mesmo
+    corpo. Sem Redis a reserva fica no armazenamento local do worker.
+    """
+
+    def __init__(self):
+        # Chaves em andamento neste worker: duplicatas locais acordam sem consultar o Redis
+        self._inflight: dict = {}
+        self.stats_counters = {"executed": 0, "replayed": 0, "waited": 0, "conflicts": 0, "released": 0, "unknown": 0}
+
+    def _record_key(self, request, key: str) -> str:
+        return IDEMPOTENCY_KEY.format(request.method, request.url.path, key)
+
+    def _fingerprint(self, body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    def _replay(self, record: dict) -> Response:
+        if record.get("state") == "unknown":
+            self.stats_counters["conflicts"] += 1
+            return self._error(409, "A requisição original falhou depois de enviar a transação e o resultado é "
+                                    "desconhecido; confira a transação antes de repetir com outra Idempotency-Key")
+        self.stats_counters["replayed"] += 1
+        return Response(
+            content=record["body"],
+            status_code=record["status_code"],
+            media_type=record.get("media_type"),
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    def _error(self, status_code: int, detail: str, retry_after: int = None) -> JSONResponse:
+        headers = {"Retry-After": str(retry_after)} if retry_after else None
+        return JSONResponse(status_code=status_code, content={"detail": detail}, headers=headers)
+
+    async def _wait_for_result(self, record_key: str) -> Optional[dict]:
+        """Espera a requisição original terminar; None se a reserva sumir ou o tempo esgotar"""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        interval = 0.05
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            event = self._inflight.get(record_key)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+            else:
+                # Original em outro worker: consulta o Redis com intervalo crescente
+                await asyncio.sleep(min(interval, remaining))
+                interval = min(interval * 2, 0.5)
+            record = await redis_service.get(record_key)
+            if record is None or record.get("state") in ("done", "unknown"):
+                return record
+
+    async def _release(self, record_key: str):
+        # Nada foi postado ao nó: a repetição pode executar de novo
+        await redis_service.delete(record_key)
+        self.stats_counters["released"] += 1
+
+    async def _mark_unknown(self, record_key: str, fingerprint: str):
+        await redis_service.set(record_key, {
+            "state": "unknown",
+            "fingerprint": fingerprint,
+        }, settings.IDEMPOTENCY_TTL_SECONDS)
+        self.stats_counters["unknown"] += 1
+
+    async def _execute(self, request, call_next, record_key: str, fingerprint: str) -> Response:
+        event = self._inflight[record_key] = asyncio.Event()
+        marker = {"submitted": False}
+        token = submission_marker.set(marker)
+        try:
+            try:
+                response = await call_next(request)
+            except Exception:
+                if marker["submitted"]:
+                    await self._mark_unknown(record_key, fingerprint)
+                else:
+                    await self._release(record_key)
+                raise
+            if response.status_code >= 400 and not marker["submitted"]:
+                await self._release(record_key)
+                return response
+            if response.status_code >= 500:
+                await self._mark_unknown(record_key, fingerprint)
+                return response
+
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            await redis_service.set(record_key, {
+                "state": "done",
+                "fingerprint": fingerprint,
+                "status_code": response.status_code,
+                "media_type": response.headers.get("content-type"),
+                "body": body.decode(),
+            }, settings.IDEMPOTENCY_TTL_SECONDS)
+            self.stats_counters["executed"] += 1
+            return Response(
+                content=body,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                background=response.background,
+            )
+        finally:
+            submission_marker.reset(token)
+            event.set()
+            self._inflight.pop(record_key, None)
+
+    async def middleware(self, request, call_next):
+        """Middleware HTTP: aplica a deduplicação às escritas com Idempotency-Key"""
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or request.method not in WRITE_METHODS or not settings.IDEMPOTENCY_ENABLED:
+            return await call_next(request)
+        if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+            return self._error(400, f"Idempotency-Key inválida (1 a {MAX_KEY_LENGTH} caracteres imprimíveis)")
+
+        record_key = self._record_key(request, key)
+        fingerprint = self._fingerprint(await request.body())
+        pending = {"state": "pending", "fingerprint": fingerprint, "started_at": int(time.time())}
+
+        # Poucas voltas: só se repete quando a reserva some entre uma leitura e outra
+        for _ in range(3):
+            if await redis_service.set_if_absent(record_key, pending, settings.IDEMPOTENCY_LOCK_SECONDS):
+                return await self._execute(request, call_next, record_key, fingerprint)
+
+            record = await redis_service.get(record_key)
+            if record is None:
+                continue  # Reserva expirou ou foi liberada entre o SET NX e o GET
+            if record.get("fingerprint") != fingerprint:
+                self.stats_counters["conflicts"] += 1
+                return self._error(422, "Idempotency-Key já usada com outro corpo de requisição")
+            if record.get("state") in ("done", "unknown"):
+                return self._replay(record)
+
+            self.stats_counters["waited"] += 1
+            record = await self._wait_for_result(record_key)
+            if record is not None:
+                return self._replay(record)
+            if await redis_service.exists(record_key):
+                self.stats_counters["conflicts"] += 1
+                return self._error(409, "Requisição com esta Idempotency-Key ainda em andamento", retry_after=1)
+            # A original falhou e liberou a chave: esta tenta reservar de novo
+        return self._error(409, "Requisição com esta Idempotency-Key ainda em andamento", retry_after=1)
+
+    def stats(self) -> dict:
+        return {"enabled": settings.IDEMPOTENCY_ENABLED, "inflight": len(self._inflight), **self.stats_counters}
+
+# Instância global do serviço de idempotência
+idempotency_service = IdempotencyService()
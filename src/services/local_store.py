@@ -0,0 +1,110 @@
+import fnmatch
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+class LocalStore:
+    """
+    Armazenamento chave-valor em memória, limitado e com TTL (despejo LRU).
+
+    Usado pelo RedisService enquanto o Redis está indisponível. Registra o
+    que foi alterado (gravações, incrementos e remoções) para que essas
+    alterações sejam reaplicadas no Redis quando a conexão voltar.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max(max_keys, 1)
+        self._data: OrderedDict = OrderedDict()
+        self._increments: dict = {}
+        self._deleted: set = set()
+        self.evictions = 0
+
+    def _entry(self, key: str) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value: Any, expire: Optional[float]):
+        self._data[key] = (value, time.monotonic() + expire if expire else None)
+        self._data.move_to_end(key)
+        self._deleted.discard(key)
+        while len(self._data) > self.max_keys:
+            evicted, _ = self._data.popitem(last=False)
+            self._increments.pop(evicted, None)
+            self.evictions += 1
+
+    def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        self._store(key, value, expire)
+        self._increments.pop(key, None)
+        return True
+
+    def set_if_absent(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        if self._entry(key) is not None:
+            return False
+        return self.set(key, value, expire)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entry(key)
+        return entry[0] if entry else None
+
+    def delete(self, key: str) -> bool:
+        self._increments.pop(key, None)
+        self._deleted.add(key)
+        return self._data.pop(key, None) is not None
+
+    def exists(self, key: str) -> bool:
+        return self._entry(key) is not None
+
+    def expire(self, key: str, seconds: int) -> bool:
+        entry = self._entry(key)
+        if entry is None:
+            return False
+        self._data[key] = (entry[0], time.monotonic() + seconds)
+        return True
+
+    def ttl(self, key: str) -> int:
+        entry = self._entry(key)
+        if entry is None:
+            return -2
+        if entry[1] is None:
+            return -1
+        return max(int(entry[1] - time.monotonic()), 0)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        entry = self._entry(key)
+        value = int(entry[0] if entry else 0) + amount
+        self._store(key, value, entry[1] - time.monotonic() if entry and entry[1] else None)
+        self._increments[key] = self._increments.get(key, 0) + amount
+        return value
+
+    def keys(self, pattern: str = "*") -> list:
+        return [key for key in list(self._data) if fnmatch.fnmatchcase(key, pattern) and self._entry(key)]
+
+    def drain(self) -> tuple:
+        """
+        Retorna e esvazia as alterações feitas localmente
+
+        Returns:
+            (gravações: lista de (chave, valor, ttl ou None),
+             incrementos: {chave: total incrementado},
+             remoções: conjunto de chaves)
+        """
+        writes = []
+        for key in list(self._data):
+            entry = self._entry(key)
+            if entry is not None and key not in self._increments:
+                ttl = max(int(entry[1] - time.monotonic()), 1) if entry[1] is not None else None
+                writes.append((key, entry[0], ttl))
+        increments, deleted = self._increments, self._deleted
+        self._data = OrderedDict()
+        self._increments = {}
+        self._deleted = set()
+        return writes, increments, deleted
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,206 @@
+import asyncio
+import fcntl
+import json
+import math
+import os
+import struct
+from typing import Optional
+from src.config.settings import settings
+
+# Colunas gravadas por transação: (nome, formato struct, dtype NumPy equivalente).
+# Categorias (kind, network) são gravadas como códigos; os rótulos ficam em schema.json.
+COLUMNS = (
+    ("submitted_at", "d", "<f8"),         # epoch (s) do primeiro envio
+    ("kind", "B", "|u1"),                 # mint, delegate, revoke, ...
+    ("network", "B", "|u1"),              # MEASUREMENT_NETWORK
+    ("success", "B", "|u1"),              # status do recibo
+    ("gas_used", "Q", "<u8"),
+    ("gas_limit", "Q", "<u8"),
+    ("effective_gas_price", "Q", "<u8"),  # wei
+    ("cost_native", "d", "<f8"),          # gas_used * effective_gas_price, em unidades do token nativo
+    ("cost_usd", "d", "<f8"),             # NaN se o preço do token nativo for desconhecido
+    ("mine_latency", "d", "<f8"),         # envio -> mineração (s)
+    ("confirm_latency", "d", "<f8"),      # envio -> RECEIPT_CONFIRMATION_DEPTH confirmações (s)
+)
+CATEGORY_COLUMNS = ("kind", "network")
+SCHEMA_FILE = "schema.json"
+LOCK_FILE = ".lock"
+
+class ColumnarLog:
+    """
+    Arquivo colunar só de acréscimo: um `<coluna>.bin` (little-endian, largura
+    fixa) por coluna e um schema.json com os dtypes e os rótulos das categorias.
+
+    Lido sem cópia com numpy.fromfile/memmap (src/graphs/stats.py). Vários
+    workers podem gravar no mesmo diretório: cada acréscimo acontece sob um
+    flock e começa cortando as colunas para o menor número de linhas
+    completas, então uma gravação interrompida não desalinha as seguintes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _load_schema(self) -> dict:
+        try:
+            with open(os.path.join(self.path, SCHEMA_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "version": 1,
+                "columns": [{"name": name, "dtype": dtype} for name, _, dtype in COLUMNS],
+                "categories": {name: [] for name in CATEGORY_COLUMNS},
+            }
+
+    def _save_schema(self, schema: dict):
+        tmp = os.path.join(self.path, f"{SCHEMA_FILE}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(schema, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, SCHEMA_FILE))
+
+    def _repair(self) -> int:
+        """Corta todas as colunas para o número de linhas completas"""
+        rows = min(
+            (os.path.getsize(self._column_path(name)) if os.path.exists(self._column_path(name)) else 0)
+            // struct.calcsize(f"<{fmt}")
+            for name, fmt, _ in COLUMNS
+        )
+        for name, fmt, _ in COLUMNS:
+            path = self._column_path(name)
+            if os.path.exists(path) and os.path.getsize(path) != rows * struct.calcsize(f"<{fmt}"):
+                os.truncate(path, rows * struct.calcsize(f"<{fmt}"))
+        return rows
+
+    def append(self, rows: list) -> int:
+        """Acrescenta linhas (dicts com as colunas; categorias como texto)"""
+        if not rows:
+            return 0
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                schema = self._load_schema()
+                categories = schema["categories"]
+                changed = False
+                for row in rows:
+                    for name in CATEGORY_COLUMNS:
+                        if row[name] not in categories[name]:
+                            categories[name].append(row[name])
+                            changed = True
+                if changed or not os.path.exists(os.path.join(self.path, SCHEMA_FILE)):
+                    self._save_schema(schema)
+
+                self._repair()
+                for name, fmt, _ in COLUMNS:
+                    if name in CATEGORY_COLUMNS:
+                        values = [categories[name].index(row[name]) for row in rows]
+                    else:
+                        values = [row[name] for row in rows]
+                    with open(self._column_path(name), "ab") as f:
+                        f.write(struct.pack(f"<{len(values)}{fmt}", *values))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return len(rows)
+
+class MeasurementService:
+    """
+    Registra custo e latência de toda transação enviada pelo serviço.
+
+    Assinante do receipt_tracker: na confirmação de cada transação monta uma
+    linha (gas usado e limite, preço efetivo, custo no token nativo e em USD,
+    latências envio→mineração e envio→confirmação) e a enfileira em memória;
+    uma tarefa em segundo plano acrescenta as linhas ao ColumnarLog em
+    MEASUREMENT_DIR. Os gráficos de src/graphs são gerados a partir desses
+    arquivos. Se a gravação falhar, as linhas esperam em memória (no máximo
+    MEASUREMENT_BUFFER_MAX; as mais antigas são descartadas e contadas em
+    `dropped`).
+    """
+
+    def __init__(self):
+        self.log = ColumnarLog(settings.MEASUREMENT_DIR)
+        self._rows: list = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters = {"recorded": 0, "written": 0, "write_errors": 0, "dropped": 0}
+
+    def _row(self, entry: dict) -> dict:
+        gas_used = entry.get("gas_used") or 0
+        gas_price = entry.get("effective_gas_price") or 0
+        cost_native = gas_used * gas_price / 10**18
+        price = settings.MEASUREMENT_NATIVE_TOKEN_USD
+        mined_at = entry.get("mined_at")
+        confirmed_at = entry.get("confirmed_at")
+        return {
+            "submitted_at": entry["submitted_at"],
+            # Uma transação de lote do contrato v2 não é comparável a uma operação avulsa
+            "kind": (entry.get("kind") or "unknown") + ("_batch" if entry.get("batch_size") else ""),
+            "network": settings.MEASUREMENT_NETWORK,
+            "success": 1 if entry.get("status") == "success" else 0,
+            "gas_used": gas_used,
+            "gas_limit": (entry.get("tx") or {}).get("gas") or 0,
+            "effective_gas_price": gas_price,
+            "cost_native": cost_native,
+            "cost_usd": cost_native * price if price > 0 else math.nan,
+            "mine_latency": mined_at - entry["submitted_at"] if mined_at else math.nan,
+            "confirm_latency": confirmed_at - entry["submitted_at"] if confirmed_at else math.nan,
+        }
+
+    def on_receipt(self, event: str, entry: dict):
+        """Assinante do receipt_tracker: mede cada transação uma vez, na confirmação"""
+        if event != "confirmed" or not settings.MEASUREMENT_ENABLED:
+            return
+        self._rows.append(self._row(entry))
+        self.stats_counters["recorded"] += 1
+        self._trim()
+
+    def _trim(self):
+        # Disco cheio ou somente leitura: limita a memória descartando as linhas mais antigas
+        excess = len(self._rows) - settings.MEASUREMENT_BUFFER_MAX
+        if excess > 0:
+            del self._rows[:excess]
+            self.stats_counters["dropped"] += excess
+
+    async def flush(self) -> int:
+        """Acrescenta ao arquivo as linhas acumuladas"""
+        rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            written = await asyncio.to_thread(self.log.append, rows)
+        except OSError as e:
+            # Mantém as linhas para a próxima tentativa (até MEASUREMENT_BUFFER_MAX)
+            self._rows = rows + self._rows
+            self._trim()
+            self.stats_counters["write_errors"] += 1
+            print(f"❌ Erro ao gravar medições: {e}")
+            return 0
+        self.stats_counters["written"] += written
+        return written
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.MEASUREMENT_FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self):
+        """Inicia a gravação periódica das medições"""
+        if settings.MEASUREMENT_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe a gravação periódica e grava o que restar"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {"enabled": settings.MEASUREMENT_ENABLED, "buffered": len(self._rows), **self.stats_counters}
+
+# Instância global do serviço de medições
+measurement_service = MeasurementService()
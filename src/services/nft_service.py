@@ -1,23 +1,192 @@
-from src.contracts.iot_access_nft import IoTAccessNFT
+import asyncio
+import time
+from src.contracts.iot_access_nft import MAX_BATCH_SIZE, IoTAccessNFT
 from src.config.settings import settings
+from src.contracts.rpc_scheduler import RPCBudgetExceeded, priority
+from src.services.receipt_tracker import receipt_tracker
+from src.services.signing_service import signing_service
 from fastapi import HTTPException
 
 class NFTService:
     def __init__(self):
-        self.contract = IoTAccessNFT()
+        self._contract = None
+
+    @property
+    def contract(self) -> IoTAccessNFT:
+        """Cliente do contrato, criado sob demanda no primeiro uso"""
+        if self._contract is None:
+            self._contract = IoTAccessNFT()
+        return self._contract
+
+    def _send_tracked(self, tx: dict, kind: str, **meta) -> str:
+        """Assina, envia e registra a transação no rastreador de recibos"""
+        start = time.time()
+        try:
+            with priority("write"):
+                tx_hash = self.contract.sign_and_send(tx, settings.PRIVATE_KEY)
+        except Exception:
+            self.contract.nonces.release(tx["nonce"])
+            raise
+        receipt_tracker.track(tx_hash, kind=kind, tx=tx, **meta)
+        latency = time.time() - start
+        print(f"Latência da transação de {kind}: {latency:.2f} segundos")
+        return tx_hash
 
     def mint_nft(self, recipient: str, token_uri: str):
         """Cria um novo NFT"""
         try:
-            tx_hash = self.contract.mint_nft(
-                recipient,
-                token_uri,
-                settings.PRIVATE_KEY
-            )
-            return tx_hash
+            with priority("write"):
+                tx = self.contract.build_mint_tx(recipient, token_uri)
+            return self._send_tracked(tx, "mint", recipient=recipient)
+        except RPCBudgetExceeded:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Erro ao fazer mint do NFT: {str(e)}")
 
+    async def _submit_batch(self, builders: list, kind: str, metas: list) -> list:
+        """
+        Monta, assina no pool de assinatura e envia um lote de transações
+
+        Args:
+            builders: Funções (nonce, taxas) -> transação montada, uma por item
+            kind: Tipo da operação registrado no rastreador de recibos
+            metas: Dados de cada item (incluídos no resultado e no rastreador)
+
+        Returns:
+            Um resultado por item, com status "sent" ou "failed"; itens enviados
+            atrás de um nonce que falhou trazem "blocked_by_nonce"
+        """
+        with priority("write"):
+            return await self._submit_batch_items(builders, kind, metas)
+
+    async def _submit_batch_items(self, builders: list, kind: str, metas: list) -> list:
+        fees = await asyncio.to_thread(self.contract.fee_params)
+        built = await asyncio.gather(
+            *(asyncio.to_thread(build, 0, fees) for build in builders),
+            return_exceptions=True
+        )
+
+        results = [{**meta, "status": "failed", "tx_hash": None} for meta in metas]
+        ready = []
+        for result, tx in zip(results, built):
+            if isinstance(tx, Exception):
+                result["error"] = str(tx)
+            else:
+                ready.append((result, tx))
+        if not ready:
+            return results
+
+        # Nonces sequenciais apenas para os itens que puderam ser montados, do mesmo
+        # alocador das transações individuais
+        nonce = await asyncio.to_thread(self.contract.nonces.reserve, len(ready))
+        txs = []
+        for i, (result, tx) in enumerate(ready):
+            tx["nonce"] = nonce + i
+            result["nonce"] = tx["nonce"]
+            txs.append(tx)
+        try:
+            signed = await signing_service.sign_many(txs, settings.PRIVATE_KEY)
+        except Exception:
+            for tx in reversed(txs):
+                self.contract.nonces.release(tx["nonce"])
+            raise
+
+        # Envio concorrente: o nó aceita nonces fora de ordem e os enfileira
+        sent = await asyncio.gather(
+            *(asyncio.to_thread(self.contract.send_raw, raw_tx) for raw_tx, _ in signed),
+            return_exceptions=True
+        )
+        failed_nonces = [tx["nonce"] for (_, tx), tx_hash in zip(ready, sent) if isinstance(tx_hash, Exception)]
+        for failed in reversed(failed_nonces):
+            self.contract.nonces.release(failed)
+        for (result, tx), tx_hash in zip(ready, sent):
+            if isinstance(tx_hash, Exception):
+                result["error"] = str(tx_hash)
+                continue
+            result.update(status="sent", tx_hash=tx_hash)
+            # Um nonce anterior não enviado deixa esta transação presa na fila do nó
+            gaps = [n for n in failed_nonces if n < tx["nonce"]]
+            if gaps:
+                result["blocked_by_nonce"] = gaps[0]
+            meta = {k: v for k, v in result.items() if k not in ("status", "tx_hash", "nonce", "blocked_by_nonce")}
+            receipt_tracker.track(tx_hash, kind=kind, tx=tx, **meta)
+        return results
+
+    async def _submit_contract_batches(self, build_chunk, items: list, kind: str, metas: list) -> list:
+        """
+        Envia um lote pelas funções de lote do contrato v2, uma transação a cada MAX_BATCH_SIZE itens
+
+        Args:
+            build_chunk: Função (itens do bloco, nonce, taxas) -> transação de lote montada
+            items: Itens do lote, na ordem recebida
+            kind: Tipo da operação registrado no rastreador de recibos
+            metas: Dados de cada item; no rastreador viram listas (token_id -> token_ids)
+
+        Returns:
+            Um resultado por item; os itens de um mesmo bloco compartilham
+            status, tx_hash e nonce (o contrato aplica o bloco inteiro ou nada)
+        """
+        chunks = [range(start, min(start + MAX_BATCH_SIZE, len(items))) for start in range(0, len(items), MAX_BATCH_SIZE)]
+        builders = [
+            lambda nonce, fees, c=chunk: build_chunk([items[i] for i in c], nonce, fees)
+            for chunk in chunks
+        ]
+        chunk_metas = [
+            {"batch_size": len(chunk), **{f"{key}s": [metas[i][key] for i in chunk] for key in metas[0]}}
+            for chunk in chunks
+        ]
+        chunk_results = await self._submit_batch(builders, kind, chunk_metas)
+
+        results = []
+        for chunk, chunk_meta, chunk_result in zip(chunks, chunk_metas, chunk_results):
+            shared = {k: v for k, v in chunk_result.items() if k not in chunk_meta}
+            results += [{**metas[i], **shared} for i in chunk]
+        return results
+
+    async def mint_nft_batch(self, items: list) -> list:
+        """Cria vários NFTs em lote, a partir de pares (destinatário, token_uri)"""
+        metas = [{"recipient": recipient} for recipient, _ in items]
+        if self.contract.supports_batch:
+            return await self._submit_contract_batches(
+                lambda chunk, nonce, fees: self.contract.build_mint_batch_tx(
+                    [recipient for recipient, _ in chunk], [token_uri for _, token_uri in chunk], nonce, **fees
+                ),
+                items, "mint", metas
+            )
+        builders = [
+            lambda nonce, fees, r=recipient, u=token_uri: self.contract.build_mint_tx(r, u, nonce, **fees)
+            for recipient, token_uri in items
+        ]
+        return await self._submit_batch(builders, "mint", metas)
+
+    async def delegate_access_batch(self, items: list) -> list:
+        """Delega o acesso de vários tokens, a partir de triplas (token_id, delegatee, duração)"""
+        metas = [{"token_id": token_id, "delegatee": delegatee} for token_id, delegatee, _ in items]
+        if self.contract.supports_batch:
+            return await self._submit_contract_batches(
+                lambda chunk, nonce, fees: self.contract.build_delegate_batch_tx(*zip(*chunk), nonce, **fees),
+                items, "delegate", metas
+            )
+        builders = [
+            lambda nonce, fees, t=token_id, d=delegatee, s=duration: self.contract.build_delegate_tx(t, d, s, nonce, **fees)
+            for token_id, delegatee, duration in items
+        ]
+        return await self._submit_batch(builders, "delegate", metas)
+
+    async def revoke_access_batch(self, token_ids: list) -> list:
+        """Revoga o acesso de vários tokens"""
+        metas = [{"token_id": token_id} for token_id in token_ids]
+        if self.contract.supports_batch:
+            return await self._submit_contract_batches(
+                lambda chunk, nonce, fees: self.contract.build_revoke_batch_tx(chunk, nonce, **fees),
+                token_ids, "revoke", metas
+            )
+        builders = [
+            lambda nonce, fees, t=token_id: self.contract.build_revoke_tx(t, nonce, **fees)
+            for token_id in token_ids
+        ]
+        return await self._submit_batch(builders, "revoke", metas)
+
     def get_access_details(self, token_id: int):
         delegatee, expires_at = self.contract.get_access_details(token_id)
         if delegatee is None:
@@ -31,16 +200,17 @@ class NFTService:
     def check_access(self, token_id: int, user: str):
         try:
             return self.contract.has_access(token_id, user)
+        except RPCBudgetExceeded:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
     def delegate_access(self, token_id: int, delegatee: str, duration: int):
-        return self.contract.delegate_access(
-            token_id,
-            delegatee,
-            duration,
-            settings.PRIVATE_KEY
-        )
+        with priority("write"):
+            tx = self.contract.build_delegate_tx(token_id, delegatee, duration)
+        return self._send_tracked(tx, "delegate", token_id=token_id, delegatee=delegatee)
 
     def revoke_access(self, token_id: int):
-        return self.contract.revoke_access(token_id, settings.PRIVATE_KEY)
\ No newline at end of file
+        with priority("write"):
+            tx = self.contract.build_revoke_tx(token_id)
+        return self._send_tracked(tx, "revoke", token_id=token_id)
\ No newline at end of file
@@ -0,0 +1,203 @@
+import asyncio
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+from src.config.settings import settings
+from src.services.redis_service import redis_service
+
+# Índice dos perfis gravados no Redis (o conteúdo fica em profile:{id})
+PROFILE_INDEX_STREAM = "profiles"
+PROFILE_KEY = "profile:{}"
+
+# Formatos gerados e o media type de cada um
+PROFILE_MEDIA_TYPES = {
+    "speedscope": "application/json",  # pyinstrument (abre em https://www.speedscope.app)
+    "folded": "text/plain",            # pilhas colapsadas (flamegraph.pl, speedscope)
+}
+
+class StackSampler:
+    """
+    Amostrador de pilha por relógio de parede, sem dependências.
+
+    Uma thread lê a pilha da thread do event loop a cada intervalo e conta
+    as pilhas colapsadas ("a;b;c N"). Usado quando o pyinstrument não está
+    instalado; não separa requisições concorrentes no mesmo loop.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._target = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> tuple:
+        self._stopped.set()
+        self._thread.join()
+        return "folded", "\n".join(f"{stack} {count}" for stack, count in self.samples.items())
+
+class PyinstrumentProfiler:
+    """Perfil assíncrono do pyinstrument (o tempo em await é atribuído à corrotina que espera)"""
+
+    def __init__(self, interval: float):
+        from pyinstrument import Profiler
+        self._profiler = Profiler(interval=interval, async_mode="enabled")
+
+    def start(self):
+        self._profiler.start()
+
+    def stop(self) -> tuple:
+        from pyinstrument.renderers import SpeedscopeRenderer
+        self._profiler.stop()
+        return "speedscope", self._profiler.output(renderer=SpeedscopeRenderer())
+
+class ProfilingService:
+    """
+    Perfilamento sob demanda de requisições em produção.
+
+    Só é instalado como middleware com PROFILING_ENABLED (desligado não há
+    nenhum custo por requisição). Perfila uma fração PROFILING_SAMPLE_RATE
+    das requisições ou qualquer requisição com o cabeçalho `X-Profile: 1` e
+    `X-Admin-Token` válido, e grava o resultado no Redis ou em disco
+    (PROFILING_STORAGE).
+    """
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        """Compara o token de administração em tempo constante"""
+        return bool(settings.ADMIN_TOKEN and token) and hmac.compare_digest(token, settings.ADMIN_TOKEN)
+
+    def should_profile(self, headers) -> bool:
+        if headers.get("x-profile") == "1" and self.is_admin(headers.get("x-admin-token")):
+            return True
+        return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def new_profiler(self):
+        """pyinstrument se instalado; senão o amostrador de pilha embutido"""
+        try:
+            return PyinstrumentProfiler(settings.PROFILING_INTERVAL_SECONDS)
+        except ImportError:
+            return StackSampler(settings.PROFILING_INTERVAL_SECONDS)
+
+    async def save(self, meta: dict, fmt: str, data: str) -> str:
+        """Grava um perfil e retorna o id"""
+        profile_id = uuid.uuid4().hex
+        meta = {"id": profile_id, "format": fmt, "created_at": int(time.time()), **meta}
+        if settings.PROFILING_STORAGE == "disk":
+            await asyncio.to_thread(self._save_to_disk, meta, data)
+        else:
+            await redis_service.set(PROFILE_KEY.format(profile_id), data, settings.PROFILING_TTL_SECONDS)
+            await redis_service.stream_add_many([(
+                PROFILE_INDEX_STREAM,
+                {k: str(v) for k, v in meta.items()},
+                settings.PROFILING_MAX_STORED,
+                settings.PROFILING_TTL_SECONDS,
+            )])
+        return profile_id
+
+    def _save_to_disk(self, meta: dict, data: str):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILING_DIR, meta["id"])
+        with open(f"{path}.{meta['format']}", "w") as f:
+            f.write(data)
+        with open(f"{path}.json", "w") as f:
+            json.dump(meta, f)
+        # Mantém apenas os PROFILING_MAX_STORED mais recentes
+        for old in self._list_disk()[settings.PROFILING_MAX_STORED:]:
+            for ext in ("json", old["format"]):
+                try:
+                    os.remove(os.path.join(settings.PROFILING_DIR, f"{old['id']}.{ext}"))
+                except FileNotFoundError:
+                    pass
+
+    def _list_disk(self) -> list:
+        if not os.path.isdir(settings.PROFILING_DIR):
+            return []
+        items = []
+        for name in os.listdir(settings.PROFILING_DIR):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(settings.PROFILING_DIR, name)) as f:
+                        items.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(items, key=lambda item: item["created_at"], reverse=True)
+
+    async def list(self, limit: int = 50) -> Optional[list]:
+        """Perfis gravados, do mais recente para o mais antigo (None se o Redis falhar)"""
+        if settings.PROFILING_STORAGE == "disk":
+            return (await asyncio.to_thread(self._list_disk))[:limit]
+        entries = await redis_service.stream_range(PROFILE_INDEX_STREAM, count=limit, reverse=True)
+        if entries is None:
+            return None
+        return [fields for _, fields in entries]
+
+    async def fetch(self, profile_id: str) -> Optional[tuple]:
+        """Retorna (formato, conteúdo) de um perfil ou None"""
+        if settings.PROFILING_STORAGE == "disk":
+            return await asyncio.to_thread(self._fetch_from_disk, profile_id)
+        data = await redis_service.get(PROFILE_KEY.format(profile_id))
+        if data is None:
+            return None
+        # O conteúdo do pyinstrument é JSON (speedscope); o do amostrador, texto
+        return ("speedscope", data) if data.startswith("{") else ("folded", data)
+
+    def _fetch_from_disk(self, profile_id: str) -> Optional[tuple]:
+        if not profile_id.isalnum():
+            return None
+        for fmt in PROFILE_MEDIA_TYPES:
+            path = os.path.join(settings.PROFILING_DIR, f"{profile_id}.{fmt}")
+            if os.path.exists(path):
+                with open(path) as f:
+                    return fmt, f.read()
+        return None
+
+    async def middleware(self, request, call_next):
+        """Middleware HTTP: perfila a requisição se sorteada ou pedida por um administrador"""
+        if not self.should_profile(request.headers):
+            return await call_next(request)
+
+        profiler = self.new_profiler()
+        start = time.time()
+        profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            fmt, data = profiler.stop()
+        duration = time.time() - start
+        try:
+            profile_id = await self.save(
+                {"method": request.method, "path": request.url.path, "duration": round(duration, 6)},
+                fmt, data
+            )
+            response.headers["X-Profile-Id"] = profile_id
+        except Exception as e:
+            print(f"❌ Erro ao gravar perfil: {e}")
+        return response
+
+# Instância global do serviço de perfilamento
+profiling_service = ProfilingService()
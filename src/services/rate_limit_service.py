@@ -0,0 +1,114 @@
+import math
+from typing import Optional
+from src.services.redis_service import redis_service
+from src.config.settings import settings
+
+# Token bucket atômico para várias chaves de uma só vez.
+# KEYS: um bucket por chave (carteira, IP, ...)
+# ARGV: custo, seguido de (capacidade, reposição por segundo) para cada chave
+# Retorna: permitido (0/1) e, para cada chave, tokens restantes, ms até
+# encher e ms até haver tokens suficientes (0 se já houver).
+# A requisição só consome tokens se todas as chaves permitirem.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local allowed = 1
+local state = {}
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1]) / 1000
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if tokens < cost then
+        allowed = 0
+    end
+    state[i] = {tokens, capacity, rate}
+end
+
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local tokens, capacity, rate = state[i][1], state[i][2], state[i][3]
+    if allowed == 1 then
+        tokens = tokens - cost
+    end
+    local full_in = math.ceil((capacity - tokens) / rate)
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.max(full_in, 1))
+    local retry_in = 0
+    if tokens < cost then
+        retry_in = math.ceil((cost - tokens) / rate)
+    end
+    table.insert(result, math.floor(tokens))
+    table.insert(result, full_in)
+    table.insert(result, retry_in)
+end
+return result
+"""
+
+class RateLimitService:
+    """
+    Limita a taxa de requisições por carteira e por IP antes de consultar a
+    blockchain, usando um token bucket atômico em Lua (uma ida ao Redis).
+    """
+
+    async def check(self, wallet_address: str, client_ip: Optional[str] = None) -> Optional[dict]:
+        """
+        Consome um token dos buckets da carteira e do IP
+
+        Returns:
+            Estado do bucket mais restritivo ou None se o limitador estiver
+            desativado ou o Redis indisponível (falha aberta)
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+
+        buckets = [(
+            f"ratelimit:wallet:{wallet_address}",
+            settings.RATE_LIMIT_WALLET_CAPACITY,
+            settings.RATE_LIMIT_WALLET_REFILL_PER_SECOND,
+        )]
+        if client_ip:
+            buckets.append((
+                f"ratelimit:ip:{client_ip}",
+                settings.RATE_LIMIT_IP_CAPACITY,
+                settings.RATE_LIMIT_IP_REFILL_PER_SECOND,
+            ))
+
+        args = [1]
+        for _, capacity, refill in buckets:
+            args += [capacity, refill]
+        result = await redis_service.run_script(TOKEN_BUCKET_SCRIPT, [key for key, _, _ in buckets], args)
+        if not result:
+            return None
+
+        allowed = result[0] == 1
+        states = [
+            {
+                "limit": capacity,
+                "remaining": max(int(result[1 + i * 3]), 0),
+                "reset": math.ceil(int(result[2 + i * 3]) / 1000),
+                "retry_after": math.ceil(int(result[3 + i * 3]) / 1000),
+            }
+            for i, (_, capacity, _) in enumerate(buckets)
+        ]
+        # Reporta o bucket que bloqueou (ou o mais próximo de bloquear)
+        state = max(states, key=lambda s: s["retry_after"]) if not allowed else min(states, key=lambda s: s["remaining"])
+        return {"allowed": allowed, **state}
+
+    def headers(self, state: dict) -> dict:
+        """Monta os cabeçalhos RateLimit-* (e Retry-After quando bloqueado)"""
+        headers = {
+            "RateLimit-Limit": str(state["limit"]),
+            "RateLimit-Remaining": str(state["remaining"]),
+            "RateLimit-Reset": str(state["reset"]),
+        }
+        if not state["allowed"]:
+            headers["Retry-After"] = str(max(state["retry_after"], 1))
+        return headers
+
+# Instância global do limitador de taxa
+rate_limit_service = RateLimitService()
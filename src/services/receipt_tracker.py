@@ -0,0 +1,215 @@
+import asyncio
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from src.config.settings import settings
+from src.contracts.chain_client import batch_rpc
+from src.contracts.rpc_scheduler import rpc_priority
+
+# Quantidade de transações finalizadas mantidas para consulta em /tx/{tx_hash}
+RECENT_HISTORY_SIZE = 1000
+
+def _normalize_hash(tx_hash: str) -> str:
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
+
+def _to_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+class ReceiptTracker:
+    """
+    Acompanha os recibos das transações enviadas por este serviço.
+
+    A cada novo bloco, todos os hashes pendentes são consultados em uma única
+    requisição em lote de `eth_getTransactionReceipt`, então o custo em RPC
+    cresce com o número de blocos e não com o número de transações pendentes.
+    Quando nada está pendente, nenhuma chamada é feita.
+
+    `track` e `replace` são chamados de threads de trabalho (asyncio.to_thread);
+    as alterações de `pending` ficam sob um lock e o loop itera sobre cópias
+    (`pending_entries`).
+    """
+
+    def __init__(self):
+        self.pending: dict = {}
+        self.recent: OrderedDict = OrderedDict()
+        self.latest_block: Optional[int] = None
+        self._aliases: dict = {}
+        self._subscribers: list = []
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    def track(self, tx_hash: str, kind: Optional[str] = None, token_id: Optional[int] = None,
+              tx: Optional[dict] = None, **meta):
+        """
+        Registra uma transação enviada para acompanhamento
+
+        Args:
+            tx_hash: Hash da transação enviada
+            kind: Tipo da operação ("mint", "delegate", "revoke", ...)
+            token_id: Token afetado, se houver
+            tx: Transação montada (necessária para substituição por taxa maior)
+        """
+        tx_hash = _normalize_hash(tx_hash)
+        now = time.time()
+        entry = {
+            "tx_hash": tx_hash,
+            "kind": kind,
+            "token_id": token_id,
+            "submitted_at": now,
+            "last_submitted_at": now,
+            "status": "pending",
+            "hashes": [tx_hash],
+            "mined_hash": None,
+            "block_number": None,
+            "confirmations": 0,
+            "receipt": None,
+            "tx": tx,
+            **meta,
+        }
+        with self._lock:
+            self.pending[tx_hash] = entry
+
+    def replace(self, tx_hash: str, new_hash: str, new_tx: dict):
+        """
+        Registra uma transação substituta (mesmo nonce, taxa maior).
+
+        Todos os hashes enviados para o mesmo nonce continuam sendo
+        consultados; o primeiro que for minerado é registrado em `mined_hash`.
+        """
+        tx_hash = _normalize_hash(tx_hash)
+        new_hash = _normalize_hash(new_hash)
+        with self._lock:
+            entry = self.pending[tx_hash]
+            entry["hashes"] = entry["hashes"] + [new_hash]
+            entry["tx"] = new_tx
+            entry["last_submitted_at"] = time.time()
+            self._aliases[new_hash] = tx_hash
+
+    def pending_entries(self) -> list:
+        """Cópia da lista de transações pendentes (segura contra `track` concorrente)"""
+        with self._lock:
+            return list(self.pending.values())
+
+    def subscribe(self, callback: Callable[[str, dict], Any]) -> Callable[[], None]:
+        """
+        Inscreve um callback (síncrono ou assíncrono) nos eventos de recibo.
+
+        O callback recebe (evento, transação), onde evento é "mined",
+        "confirmed", "reorged" ou "dropped". Retorna uma função que cancela
+        a inscrição.
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def status(self, tx_hash: str) -> Optional[dict]:
+        """Retorna o estado conhecido de uma transação (pendente ou recente)"""
+        tx_hash = _normalize_hash(tx_hash)
+        tx_hash = self._aliases.get(tx_hash, tx_hash)
+        entry = self.pending.get(tx_hash) or self.recent.get(tx_hash)
+        if entry is None:
+            return None
+        return {k: v for k, v in entry.items() if k not in ("receipt", "tx")}
+
+    def start(self):
+        """Inicia o loop de acompanhamento em segundo plano"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe o loop de acompanhamento"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        rpc_priority.set("background")
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"❌ Erro ao acompanhar recibos: {e}")
+            await asyncio.sleep(settings.RECEIPT_POLL_INTERVAL_SECONDS)
+
+    async def poll_once(self):
+        """Consulta os recibos pendentes se um novo bloco foi produzido"""
+        if not self.pending:
+            return
+
+        block_number = _to_int((await asyncio.to_thread(batch_rpc, [("eth_blockNumber", [])]))[0])
+        if block_number is None or block_number == self.latest_block:
+            return
+        self.latest_block = block_number
+
+        entries = self.pending_entries()
+        hashes = [h for entry in entries for h in entry["hashes"]]
+        receipts = dict(zip(hashes, await asyncio.to_thread(
+            batch_rpc, [("eth_getTransactionReceipt", [h]) for h in hashes]
+        )))
+
+        now = time.time()
+        for entry in entries:
+            mined = next(((h, receipts[h]) for h in entry["hashes"] if receipts.get(h)), (None, None))
+            await self._update(entry, mined[0], mined[1], block_number, now)
+
+    async def _update(self, entry: dict, mined_hash: Optional[str], receipt: Optional[dict],
+                      block_number: int, now: float):
+        if receipt is None:
+            if entry["receipt"] is not None:
+                # O bloco que incluía a transação saiu da cadeia canônica
+                entry.update(receipt=None, status="pending", mined_hash=None, block_number=None, confirmations=0)
+                await self._emit("reorged", entry)
+            elif now - entry["last_submitted_at"] > settings.RECEIPT_TRACKING_TIMEOUT_SECONDS:
+                # Contado a partir do último envio: uma substituição por taxa maior reinicia o prazo
+                entry["status"] = "dropped"
+                self._finish(entry)
+                await self._emit("dropped", entry)
+            return
+
+        receipt_block = _to_int(receipt.get("blockNumber"))
+        entry["confirmations"] = max(block_number - receipt_block + 1, 1)
+        if entry["receipt"] is None or entry["block_number"] != receipt_block:
+            entry.update(
+                receipt=receipt,
+                mined_hash=mined_hash,
+                block_number=receipt_block,
+                status="success" if _to_int(receipt.get("status")) == 1 else "failed",
+                gas_used=_to_int(receipt.get("gasUsed")),
+                effective_gas_price=_to_int(receipt.get("effectiveGasPrice")),
+                mined_at=now,
+            )
+            await self._emit("mined", entry)
+
+        if entry["confirmations"] >= settings.RECEIPT_CONFIRMATION_DEPTH:
+            entry["confirmed_at"] = now
+            self._finish(entry)
+            await self._emit("confirmed", entry)
+
+    def _finish(self, entry: dict):
+        with self._lock:
+            self.pending.pop(entry["tx_hash"], None)
+            self.recent[entry["tx_hash"]] = entry
+            while len(self.recent) > RECENT_HISTORY_SIZE:
+                _, old = self.recent.popitem(last=False)
+                for h in old["hashes"][1:]:
+                    self._aliases.pop(h, None)
+
+    async def _emit(self, event: str, entry: dict):
+        for callback in list(self._subscribers):
+            try:
+                result = callback(event, entry)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"❌ Erro no assinante de recibos ({event}): {e}")
+
+# Instância global do rastreador de recibos
+receipt_tracker = ReceiptTracker()
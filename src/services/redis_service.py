@@ -1,14 +1,100 @@
-import json
+import asyncio
+from contextvars import ContextVar
 import redis.asyncio as redis
-from typing import Optional, Any
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError, WatchError
+from redis.client import NEVER_DECODE
+from typing import Callable, Optional, Any
 from src.config.settings import Settings
+from src.services.codec import decode_value, encode_value
+from src.services.local_store import LocalStore
 
-# Constantes
-REDIS_NOT_CONNECTED_MSG = "⚠️  Redis não conectado"
+# Como as gravações feitas no modo degradado voltam ao Redis, por prefixo de chave:
+# "if_absent" não sobrescreve o valor do Redis, "discard" descarta (só as remoções
+# são reaplicadas) e o padrão ("overwrite") grava o valor local
+FALLBACK_MERGE_POLICIES = {
+    "ban:": "if_absent",
+    "access_details:": "discard",
+    "access_details_stale:": "discard",
+    "idempotency:": "if_absent",
+    # A reputação volta como delta pelo flush do ReputationService; um valor
+    # local completo apagaria o histórico gravado por outros workers
+    "reputation:": "discard",
+}
+
+# Erros de transporte: só eles contam para abrir o circuito. Erros do comando
+# (ResponseError, DataError, argumento inválido) são do pedido, não do Redis.
+OUTAGE_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError)
+
+# Verdadeiro na tarefa que está mesclando o armazenamento local após a reconexão:
+# só ela usa o Redis enquanto os demais continuam no modo degradado
+_recovering: ContextVar[bool] = ContextVar("redis_recovering", default=False)
 
 class RedisService:
+    """
+    Cliente Redis com disjuntor e armazenamento local de contingência.
+
+    Após REDIS_CIRCUIT_FAILURE_THRESHOLD falhas seguidas (ou se a conexão
+    inicial falhar) o circuito abre: get/set/exists/ttl/... passam a usar um
+    LocalStore do worker, sem tentar a rede nem imprimir a cada chamada.
+    Só erros de transporte (OUTAGE_ERRORS) contam como falha; um erro do
+    comando é registrado e a chamada retorna o valor padrão, sem tocar o
+    circuito nem o armazenamento local.
+
+    Uma tarefa de verificação testa o Redis periodicamente; quando ele volta,
+    as alterações locais são mescladas (FALLBACK_MERGE_POLICIES) e os
+    callbacks de `on_reconnect` são chamados. O circuito só fecha depois
+    deles, para nenhuma requisição ler o Redis sem as gravações locais.
+    """
+
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
+        self._scripts: dict = {}
+        self.fallback = LocalStore(Settings.REDIS_FALLBACK_MAX_KEYS)
+        self._failures = 0
+        self._circuit_open = False
+        self._reconnect_callbacks: list = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters = {
+            "circuit_opens": 0, "merged_keys": 0, "fallback_calls": 0, "watch_conflicts": 0, "command_errors": 0,
+        }
+
+    @property
+    def degraded(self) -> bool:
+        """True enquanto as operações estão sendo atendidas pelo armazenamento local"""
+        return self.redis_client is None or (self._circuit_open and not _recovering.get())
+
+    def _available(self) -> bool:
+        if self.degraded:
+            self.stats_counters["fallback_calls"] += 1
+            return False
+        return True
+
+    def _record_success(self):
+        self._failures = 0
+
+    def _record_failure(self, message: str, error: Exception) -> bool:
+        """
+        Registra um erro do Redis
+
+        Returns:
+            True se foi uma falha de transporte (a chamada pode usar o
+            armazenamento local); False para um erro do próprio comando
+        """
+        print(message)
+        if not isinstance(error, OUTAGE_ERRORS):
+            self.stats_counters["command_errors"] += 1
+            return False
+        self._failures += 1
+        if not self._circuit_open and self._failures >= Settings.REDIS_CIRCUIT_FAILURE_THRESHOLD:
+            self._circuit_open = True
+            self.stats_counters["circuit_opens"] += 1
+            print("⚠️  Redis indisponível: usando armazenamento local (modo degradado)")
+        return True
+
+    def on_reconnect(self, callback: Callable[[], Any]):
+        """Registra um callback assíncrono chamado quando o Redis volta a responder"""
+        if callback not in self._reconnect_callbacks:
+            self._reconnect_callbacks.append(callback)
     
     async def connect(self):
         """Conecta ao Redis"""
@@ -16,8 +102,10 @@ class RedisService:
             self.redis_client = redis.Redis.from_url(
                 Settings.REDIS_URL,
                 encoding="utf-8", 
-                decode_responses=True
+                decode_responses=True,
+                socket_connect_timeout=Settings.REDIS_CONNECT_TIMEOUT_SECONDS
             )
+            self._scripts = {}
             # Testa a conexão
             print(self.redis_client)
             await self.redis_client.ping()
@@ -38,24 +126,40 @@ class RedisService:
         
         Args:
             key: Chave
-            value: Valor (será serializado como JSON se não for string)
+            value: Valor (serializado com o codec de REDIS_CODEC se não for string)
             expire: Tempo de expiração em segundos
         """
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return False
+        if not self._available():
+            return self.fallback.set(key, value, expire)
         
         try:
-            # Serializa o valor se não for string
-            if not isinstance(value, str):
-                value = json.dumps(value)
-            
-            result = await self.redis_client.set(key, value, ex=expire)
+            result = await self.redis_client.set(key, encode_value(value), ex=expire)
+            self._record_success()
             return result
         except Exception as e:
-            print(f"❌ Erro ao definir valor no Redis: {e}")
+            if self._record_failure(f"❌ Erro ao definir valor no Redis: {e}", e):
+                return self.fallback.set(key, value, expire)
             return False
     
+    async def set_if_absent(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        """
+        Define um valor só se a chave não existir (SET NX)
+
+        Returns:
+            True se gravou, False se a chave já existia
+        """
+        if not self._available():
+            return self.fallback.set_if_absent(key, value, expire)
+
+        try:
+            result = await self.redis_client.set(key, encode_value(value), ex=expire, nx=True)
+            self._record_success()
+            return bool(result)
+        except Exception as e:
+            if self._record_failure(f"❌ Erro ao definir valor no Redis: {e}", e):
+                return self.fallback.set_if_absent(key, value, expire)
+            return False
+
     async def get(self, key: str) -> Optional[Any]:
         """
         Recupera um valor do Redis
@@ -66,102 +170,399 @@ class RedisService:
         Returns:
             Valor deserializado ou None se não encontrado
         """
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return None
+        if not self._available():
+            return self.fallback.get(key)
         
         try:
-            value = await self.redis_client.get(key)
-            if value is None:
-                return None
-            
-            # Tenta deserializar como JSON
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                # Se não for JSON, retorna como string
-                return value
+            # Lê os bytes crus: valores em msgpack não são UTF-8
+            value = await self.redis_client.execute_command("GET", key, **{NEVER_DECODE: []})
+            self._record_success()
+        except Exception as e:
+            if self._record_failure(f"❌ Erro ao recuperar valor do Redis: {e}", e):
+                return self.fallback.get(key)
+            return None
+
+        if value is None:
+            return None
+        try:
+            return decode_value(value)
         except Exception as e:
-            print(f"❌ Erro ao recuperar valor do Redis: {e}")
+            print(f"❌ Erro ao decodificar valor da chave '{key}': {e}")
             return None
     
+    async def get_many(self, keys: list) -> Optional[list]:
+        """
+        Recupera vários valores em uma única ida ao Redis (MGET)
+
+        Returns:
+            Lista de valores deserializados (None para chaves ausentes) ou
+            None em caso de erro
+        """
+        if not keys:
+            return []
+        if not self._available():
+            return [self.fallback.get(key) for key in keys]
+
+        try:
+            values = await self.redis_client.execute_command("MGET", *keys, **{NEVER_DECODE: []})
+            self._record_success()
+            return [decode_value(v) if v is not None else None for v in values]
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao recuperar valores do Redis: {e}", e)
+            return None
+
+    async def set_many(self, mapping: dict, expire: Optional[int] = None) -> bool:
+        """Define vários valores em um único pipeline"""
+        if not mapping:
+            return True
+        if not self._available():
+            for key, value in mapping.items():
+                self.fallback.set(key, value, expire)
+            return True
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, encode_value(value), ex=expire)
+                await pipe.execute()
+            self._record_success()
+            return True
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao definir valores no Redis: {e}", e)
+            return False
+
+    async def update_many(self, keys: list, update: Callable[[list], list], attempts: int = 5) -> bool:
+        """
+        Lê e regrava várias chaves de forma atômica (WATCH/MULTI)
+
+        Se outro cliente alterar alguma das chaves entre a leitura e a
+        gravação, a transação é descartada e refeita com os valores novos.
+
+        Args:
+            update: Recebe os valores atuais (None para chaves ausentes) e
+                retorna os novos valores, na mesma ordem
+
+        Returns:
+            True se gravou; False com o Redis indisponível ou se a disputa
+            persistir por `attempts` tentativas
+        """
+        if not keys:
+            return True
+        if not self._available():
+            return False
+
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                for _ in range(attempts):
+                    try:
+                        await pipe.watch(*keys)
+                        raw = await pipe.execute_command("MGET", *keys, **{NEVER_DECODE: []})
+                        values = update([decode_value(v) if v is not None else None for v in raw])
+                        pipe.multi()
+                        for key, value in zip(keys, values):
+                            pipe.set(key, encode_value(value))
+                        await pipe.execute()
+                        self._record_success()
+                        return True
+                    except WatchError:
+                        self.stats_counters["watch_conflicts"] += 1
+            self._record_success()
+            return False
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao atualizar valores no Redis: {e}", e)
+            return False
+
     async def delete(self, key: str) -> bool:
         """Remove uma chave do Redis"""
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return False
+        if not self._available():
+            return self.fallback.delete(key)
         
         try:
             result = await self.redis_client.delete(key)
+            self._record_success()
             return result > 0
         except Exception as e:
-            print(f"❌ Erro ao deletar chave do Redis: {e}")
+            if self._record_failure(f"❌ Erro ao deletar chave do Redis: {e}", e):
+                return self.fallback.delete(key)
             return False
     
     async def exists(self, key: str) -> bool:
         """Verifica se uma chave existe no Redis"""
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return False
+        if not self._available():
+            return self.fallback.exists(key)
         
         try:
             result = await self.redis_client.exists(key)
+            self._record_success()
             return result > 0
         except Exception as e:
-            print(f"❌ Erro ao verificar existência da chave no Redis: {e}")
+            if self._record_failure(f"❌ Erro ao verificar existência da chave no Redis: {e}", e):
+                return self.fallback.exists(key)
             return False
     
     async def expire(self, key: str, seconds: int) -> bool:
         """Define expiração para uma chave"""
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return False
+        if not self._available():
+            return self.fallback.expire(key, seconds)
         
         try:
             result = await self.redis_client.expire(key, seconds)
+            self._record_success()
             return result
         except Exception as e:
-            print(f"❌ Erro ao definir expiração no Redis: {e}")
+            if self._record_failure(f"❌ Erro ao definir expiração no Redis: {e}", e):
+                return self.fallback.expire(key, seconds)
             return False
     
     async def ttl(self, key: str) -> int:
         """Retorna o TTL de uma chave (-1 se não tem expiração, -2 se não existe)"""
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return -2
+        if not self._available():
+            return self.fallback.ttl(key)
         
         try:
-            return await self.redis_client.ttl(key)
+            result = await self.redis_client.ttl(key)
+            self._record_success()
+            return result
         except Exception as e:
-            print(f"❌ Erro ao obter TTL do Redis: {e}")
+            if self._record_failure(f"❌ Erro ao obter TTL do Redis: {e}", e):
+                return self.fallback.ttl(key)
             return -2
     
     async def increment(self, key: str, amount: int = 1) -> Optional[int]:
         """Incrementa um contador no Redis"""
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return None
+        if not self._available():
+            return self.fallback.increment(key, amount)
         
         try:
             if amount == 1:
-                return await self.redis_client.incr(key)
+                result = await self.redis_client.incr(key)
             else:
-                return await self.redis_client.incrby(key, amount)
+                result = await self.redis_client.incrby(key, amount)
+            self._record_success()
+            return result
         except Exception as e:
-            print(f"❌ Erro ao incrementar no Redis: {e}")
+            self._record_failure(f"❌ Erro ao incrementar no Redis: {e}", e)
             return None
     
     async def get_all_keys(self, pattern: str = "*") -> list:
         """Retorna todas as chaves que correspondem ao padrão"""
-        if not self.redis_client:
-            print(REDIS_NOT_CONNECTED_MSG)
-            return []
+        if not self._available():
+            return self.fallback.keys(pattern)
         
         try:
-            return await self.redis_client.keys(pattern)
+            result = await self.redis_client.keys(pattern)
+            self._record_success()
+            return result
         except Exception as e:
-            print(f"❌ Erro ao buscar chaves no Redis: {e}")
+            self._record_failure(f"❌ Erro ao buscar chaves no Redis: {e}", e)
             return []
 
+    async def scan_keys(self, pattern: str = "*", count: int = 1000) -> Optional[list]:
+        """
+        Retorna as chaves que correspondem ao padrão usando SCAN (não bloqueia o servidor)
+
+        Returns:
+            Lista de chaves ou None em caso de erro (diferente de "nenhuma chave")
+        """
+        if not self._available():
+            return None
+
+        try:
+            result = [key async for key in self.redis_client.scan_iter(match=pattern, count=count)]
+            self._record_success()
+            return result
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao varrer chaves no Redis: {e}", e)
+            return None
+
+    async def publish(self, channel: str, message: str) -> bool:
+        """Publica uma mensagem em um canal pub/sub"""
+        if not self._available():
+            return False
+
+        try:
+            await self.redis_client.publish(channel, message)
+            self._record_success()
+            return True
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao publicar no Redis: {e}", e)
+            return False
+
+    def pubsub(self):
+        """Cria um objeto pub/sub na conexão atual (None se desconectado ou em modo degradado)"""
+        if self.degraded:
+            return None
+        return self.redis_client.pubsub()
+
+    async def stream_add_many(self, entries: list) -> bool:
+        """
+        Adiciona várias entradas a streams em um único pipeline
+
+        Args:
+            entries: Tuplas (stream, campos, tamanho máximo aproximado, expiração em segundos ou None)
+        """
+        if not self._available():
+            return False
+        if not entries:
+            return True
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for stream, fields, maxlen, expire in entries:
+                    pipe.xadd(stream, fields, maxlen=maxlen, approximate=True)
+                    if expire:
+                        pipe.expire(stream, expire)
+                await pipe.execute()
+            self._record_success()
+            return True
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao adicionar entradas a streams no Redis: {e}", e)
+            return False
+
+    async def stream_range(self, stream: str, start: str = "-", end: str = "+",
+                           count: Optional[int] = None, reverse: bool = False) -> Optional[list]:
+        """
+        Lê um intervalo de um stream (XRANGE/XREVRANGE)
+
+        Returns:
+            Lista de tuplas (id, campos) ou None em caso de erro
+        """
+        if not self._available():
+            return None
+
+        try:
+            if reverse:
+                result = await self.redis_client.xrevrange(stream, max=end, min=start, count=count)
+            else:
+                result = await self.redis_client.xrange(stream, min=start, max=end, count=count)
+            self._record_success()
+            return result
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao ler stream do Redis: {e}", e)
+            return None
+
+    async def run_script(self, script: str, keys: list, args: list) -> Optional[Any]:
+        """
+        Executa um script Lua de forma atômica no Redis
+
+        O script é registrado uma vez e executado via EVALSHA (com fallback
+        automático para EVAL se o servidor ainda não o conhecer).
+
+        Returns:
+            Resultado do script ou None em caso de erro
+        """
+        if not self._available():
+            return None
+
+        try:
+            registered = self._scripts.get(script)
+            if registered is None:
+                registered = self._scripts[script] = self.redis_client.register_script(script)
+            result = await registered(keys=keys, args=args)
+            self._record_success()
+            return result
+        except Exception as e:
+            self._record_failure(f"❌ Erro ao executar script no Redis: {e}", e)
+            return None
+
+    # ---- Recuperação ----
+
+    def _merge_policy(self, key: str) -> str:
+        for prefix, policy in FALLBACK_MERGE_POLICIES.items():
+            if key.startswith(prefix):
+                return policy
+        return "overwrite"
+
+    async def _merge_fallback(self) -> int:
+        """Reaplica no Redis as alterações feitas no armazenamento local"""
+        merged = 0
+        while True:
+            writes, increments, deleted = self.fallback.drain()
+            if not (writes or increments or deleted):
+                return merged
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key in deleted:
+                        pipe.delete(key)
+                    for key, value, ttl in writes:
+                        policy = self._merge_policy(key)
+                        if policy != "discard":
+                            pipe.set(key, encode_value(value), ex=ttl, nx=policy == "if_absent")
+                    for key, amount in increments.items():
+                        pipe.incrby(key, amount)
+                    await pipe.execute()
+            except Exception:
+                # Devolve as alterações ao armazenamento local para a próxima tentativa
+                for key in deleted:
+                    self.fallback.delete(key)
+                for key, value, ttl in writes:
+                    self.fallback.set(key, value, ttl)
+                for key, amount in increments.items():
+                    self.fallback.increment(key, amount)
+                raise
+            merged += len(deleted) + len(writes) + len(increments)
+
+    async def _check_health(self):
+        if self.redis_client is None:
+            # Conexão inicial falhou: o circuito segue aberto até o fim da mesclagem
+            self._circuit_open = True
+            await self.connect()
+            if self.redis_client is None:
+                return
+        else:
+            await self.redis_client.ping()
+        # Só esta tarefa usa o Redis; as requisições continuam no armazenamento local
+        # até a mesclagem e os callbacks (ex.: deltas de reputação) terminarem
+        token = _recovering.set(True)
+        try:
+            merged = await self._merge_fallback()
+            for callback in self._reconnect_callbacks:
+                try:
+                    await callback()
+                except Exception as e:
+                    print(f"❌ Erro ao reagir à reconexão do Redis: {e}")
+            # Gravações locais feitas enquanto os callbacks rodavam; sem await entre
+            # o fim desta mesclagem e o fechamento do circuito
+            merged += await self._merge_fallback()
+        finally:
+            _recovering.reset(token)
+        self._circuit_open = False
+        self._failures = 0
+        self.stats_counters["merged_keys"] += merged
+        print(f"✅ Redis restabelecido: {merged} alteração(ões) local(is) mescladas")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(Settings.REDIS_HEALTH_CHECK_SECONDS)
+            if self.degraded:
+                try:
+                    await self._check_health()
+                except Exception as e:
+                    print(f"❌ Redis ainda indisponível: {e}")
+
+    def start(self):
+        """Inicia a verificação periódica do Redis enquanto o circuito estiver aberto"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe a verificação periódica"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "degraded": self.degraded,
+            "consecutive_failures": self._failures,
+            "fallback_keys": len(self.fallback),
+            "fallback_evictions": self.fallback.evictions,
+            **self.stats_counters,
+        }
+
 # Instância global do serviço Redis
 redis_service = RedisService()
@@ -1,66 +1,275 @@
+import asyncio
 import time
+from typing import Optional
 from src.services.redis_service import redis_service
+from src.services.ban_filter import ban_filter
 from src.config.settings import settings
 
+def _new_delta() -> dict:
+    """Alterações de reputação acumuladas em memória para uma carteira"""
+    return {
+        "score": 0,
+        "requests": 0,
+        "failures": 0,
+        "success_seen": False,  # Houve sucesso na janela (zera a sequência de falhas)
+        "streak": 0,            # Falhas desde o último sucesso da janela
+        "last_successful_attempt_ts": None,
+        "last_failed_attempt_ts": None,
+    }
+
+def _max_ts(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None or b is None:
+        return a if b is None else b
+    return max(a, b)
+
+def _combine(older: dict, newer: dict) -> dict:
+    """Junta dois deltas consecutivos em um só"""
+    return {
+        "score": older["score"] + newer["score"],
+        "requests": older["requests"] + newer["requests"],
+        "failures": older["failures"] + newer["failures"],
+        "success_seen": older["success_seen"] or newer["success_seen"],
+        "streak": newer["streak"] if newer["success_seen"] else older["streak"] + newer["streak"],
+        "last_successful_attempt_ts": _max_ts(older["last_successful_attempt_ts"], newer["last_successful_attempt_ts"]),
+        "last_failed_attempt_ts": _max_ts(older["last_failed_attempt_ts"], newer["last_failed_attempt_ts"]),
+    }
+
+def _apply(data: dict, delta: dict) -> dict:
+    """Aplica um delta sobre os dados de reputação persistidos"""
+    data = dict(data)
+    data["score"] += delta["score"]
+    data["total_requests"] += delta["requests"]
+    data["total_failures"] += delta["failures"]
+    if delta["success_seen"]:
+        data["failed_attempts_streak"] = delta["streak"]
+    else:
+        data["failed_attempts_streak"] += delta["streak"]
+    for key in ("last_successful_attempt_ts", "last_failed_attempt_ts"):
+        data[key] = _max_ts(data[key], delta[key])
+    return data
+
 class ReputationService:
     """
     Serviço para gerenciar a reputação de endereços de carteira.
+
+    Toda alteração é um delta aplicado sob WATCH/MULTI (update_many), então
+    gravações simultâneas de vários workers (ou de um flush em andamento)
+    sobre a mesma carteira não se sobrescrevem. Sem write-behind o delta é
+    gravado na hora; se a transação falhar, ele segue no buffer.
+
+    No modo write-behind (REPUTATION_WRITE_BEHIND_ENABLED), sucessos e falhas
+    são acumulados por carteira em memória e gravados em uma única transação
+    a cada REPUTATION_FLUSH_INTERVAL_MS ou REPUTATION_FLUSH_MAX_ENTRIES
+    carteiras. Banimentos continuam sendo avaliados e gravados na hora. A
+    perda em caso de queda fica limitada a uma janela de flush, e o
+    desligamento normal grava tudo (flush no shutdown).
+
+    Com o Redis em modo degradado o write-behind é usado mesmo desligado:
+    os deltas esperam em memória (no máximo REDIS_FALLBACK_MAX_KEYS
+    carteiras; as mais antigas são descartadas e contadas em
+    `dropped_deltas`) e são gravados na reconexão ou no flush periódico.
     """
 
+    def __init__(self):
+        self._pending: dict = {}
+        self._base: dict = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.dropped_deltas = 0
+
+    def _write_behind(self, wallet_address: str) -> bool:
+        # Sem Redis, só deltas podem ser mesclados depois sem apagar o histórico de outros
+        # workers; uma carteira com delta pendente também continua no buffer, senão a
+        # gravação direta incluiria o delta e o flush o aplicaria de novo
+        return (
+            settings.REPUTATION_WRITE_BEHIND_ENABLED
+            or redis_service.degraded
+            or wallet_address in self._pending
+        )
+
     async def is_banned(self, wallet_address: str) -> bool:
         """Verifica se um endereço está na lista de bloqueio."""
+        # Negativo no filtro local: com certeza não está banido, sem ida ao Redis
+        if not ban_filter.might_be_banned(wallet_address):
+            return False
         ban_key = f"ban:{wallet_address}"
-        return await redis_service.exists(ban_key)
+        banned = await redis_service.exists(ban_key)
+        ban_filter.record_confirmation(banned)
+        return banned
 
-    async def get_reputation_data(self, wallet_address: str) -> dict:
-        """Recupera os dados de reputação de um endereço."""
+    def _default_data(self) -> dict:
+        return {
+            "score": settings.REPUTATION_INITIAL_SCORE,
+            "failed_attempts_streak": 0,
+            "last_successful_attempt_ts": None,
+            "last_failed_attempt_ts": None,
+            "total_requests": 0,
+            "total_failures": 0,
+        }
+
+    async def _get_persisted_data(self, wallet_address: str) -> dict:
         reputation_key = f"reputation:{wallet_address}"
         data = await redis_service.get(reputation_key)
         
         if data is None:
             # Retorna dados padrão se não existir
-            return {
-                "score": settings.REPUTATION_INITIAL_SCORE,
-                "failed_attempts_streak": 0,
-                "last_successful_attempt_ts": None,
-                "last_failed_attempt_ts": None,
-                "total_requests": 0,
-                "total_failures": 0,
-            }
+            return self._default_data()
         return data
 
+    async def get_reputation_data(self, wallet_address: str) -> dict:
+        """Recupera os dados de reputação de um endereço (incluindo alterações ainda não gravadas)."""
+        data = await self._get_persisted_data(wallet_address)
+        delta = self._pending.get(wallet_address)
+        return _apply(data, delta) if delta else data
+
+    def _should_ban(self, data: dict) -> bool:
+        return (data["score"] < settings.REPUTATION_BAN_THRESHOLD_SCORE or
+                data["failed_attempts_streak"] >= settings.REPUTATION_MAX_FAILED_STREAK)
+
+    async def _ban(self, wallet_address: str):
+        ban_key = f"ban:{wallet_address}"
+        await redis_service.set(ban_key, "banned", expire=settings.REPUTATION_BAN_DURATION_SECONDS)
+        await ban_filter.announce(wallet_address)
+        print(f"🚫 Endereço {wallet_address} banido por {settings.REPUTATION_BAN_DURATION_SECONDS} segundos.")
+
+    def _buffer(self, wallet_address: str, change: dict):
+        """Soma `change` ao delta em memória da carteira; agenda um flush se o buffer encheu"""
+        delta = self._pending.get(wallet_address)
+        if delta is None:
+            if redis_service.degraded:
+                # Flush não teria efeito: limita a memória descartando as carteiras mais antigas
+                while len(self._pending) >= settings.REDIS_FALLBACK_MAX_KEYS:
+                    oldest = next(iter(self._pending))
+                    del self._pending[oldest]
+                    self._base.pop(oldest, None)
+                    self.dropped_deltas += 1
+            self._pending[wallet_address] = change
+            if (
+                len(self._pending) >= settings.REPUTATION_FLUSH_MAX_ENTRIES
+                and self._flush_task is None
+                and not redis_service.degraded
+            ):
+                self._flush_task = asyncio.create_task(self.flush())
+                self._flush_task.add_done_callback(lambda _: setattr(self, "_flush_task", None))
+        else:
+            self._pending[wallet_address] = _combine(delta, change)
+
+    async def _write(self, wallet_address: str, change: dict) -> Optional[dict]:
+        """
+        Grava o delta na hora pelo mesmo caminho WATCH/MULTI do flush
+
+        Returns:
+            Dados gravados, ou None se a transação falhou (o delta fica no buffer)
+        """
+        written = []
+
+        def update(current: list) -> list:
+            # Pode rodar mais de uma vez se outro cliente alterar a chave no meio
+            written[:] = [_apply(current[0] or self._default_data(), change)]
+            return written
+
+        if await redis_service.update_many([f"reputation:{wallet_address}"], update):
+            return written[0]
+        self._buffer(wallet_address, change)
+        return None
+
     async def update_reputation_on_success(self, wallet_address: str):
         """Atualiza a reputação após uma tentativa bem-sucedida."""
-        reputation_key = f"reputation:{wallet_address}"
-        data = await self.get_reputation_data(wallet_address)
-
-        data["score"] += settings.REPUTATION_SCORE_INCREMENT
-        data["failed_attempts_streak"] = 0
-        data["last_successful_attempt_ts"] = int(time.time())
-        data["total_requests"] += 1
+        change = _new_delta()
+        change["score"] = settings.REPUTATION_SCORE_INCREMENT
+        change["requests"] = 1
+        change["success_seen"] = True
+        change["last_successful_attempt_ts"] = int(time.time())
 
-        await redis_service.set(reputation_key, data)
+        if self._write_behind(wallet_address):
+            self._buffer(wallet_address, change)
+        else:
+            await self._write(wallet_address, change)
 
     async def update_reputation_on_failure(self, wallet_address: str):
         """Atualiza a reputação após uma tentativa falha."""
-        reputation_key = f"reputation:{wallet_address}"
-        data = await self.get_reputation_data(wallet_address)
+        change = _new_delta()
+        change["score"] = -settings.REPUTATION_SCORE_DECREMENT
+        change["requests"] = 1
+        change["failures"] = 1
+        change["streak"] = 1
+        change["last_failed_attempt_ts"] = int(time.time())
 
-        data["score"] -= settings.REPUTATION_SCORE_DECREMENT
-        data["failed_attempts_streak"] += 1
-        data["last_failed_attempt_ts"] = int(time.time())
-        data["total_requests"] += 1
-        data["total_failures"] += 1
+        if self._write_behind(wallet_address):
+            # A base persistida é lida uma vez por janela de flush para avaliar o banimento
+            if wallet_address not in self._base:
+                self._base[wallet_address] = await self._get_persisted_data(wallet_address)
+            self._buffer(wallet_address, change)
+            data = _apply(self._base[wallet_address], self._pending[wallet_address])
+        else:
+            data = await self._write(wallet_address, change)
+            if data is None:
+                data = await self.get_reputation_data(wallet_address)
 
         # Verifica se o endereço deve ser banido
-        if (data["score"] < settings.REPUTATION_BAN_THRESHOLD_SCORE or
-            data["failed_attempts_streak"] >= settings.REPUTATION_MAX_FAILED_STREAK):
-            
-            ban_key = f"ban:{wallet_address}"
-            await redis_service.set(ban_key, "banned", expire=settings.REPUTATION_BAN_DURATION_SECONDS)
-            print(f"🚫 Endereço {wallet_address} banido por {settings.REPUTATION_BAN_DURATION_SECONDS} segundos.")
+        if self._should_ban(data):
+            await self._ban(wallet_address)
+
+    async def flush(self) -> int:
+        """
+        Grava os deltas acumulados: MGET e SETs em uma transação WATCH/MULTI
+
+        Em caso de falha, ou com o Redis em modo degradado, os deltas ficam
+        no buffer e são gravados no próximo flush (ou na reconexão).
+
+        Returns:
+            Quantidade de carteiras gravadas
+        """
+        async with self._flush_lock:
+            if not self._pending or redis_service.degraded:
+                return 0
+            pending, self._pending = self._pending, {}
+            self._base = {}
+
+            wallets = list(pending)
+            saved = await redis_service.update_many(
+                [f"reputation:{wallet}" for wallet in wallets],
+                lambda current: [
+                    _apply(data or self._default_data(), pending[wallet])
+                    for wallet, data in zip(wallets, current)
+                ],
+            )
+            if not saved:
+                for wallet, delta in pending.items():
+                    newer = self._pending.get(wallet)
+                    self._pending[wallet] = _combine(delta, newer) if newer else delta
+                return 0
+            return len(wallets)
+
+    def start(self):
+        """Inicia o flush periódico (também grava os deltas acumulados no modo degradado)"""
+        redis_service.on_reconnect(self.flush)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe o flush periódico e grava o que estiver pendente"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            flushed = await self.flush()
+            print(f"💾 Reputação de {flushed} carteira(s) gravada no desligamento")
 
-        await redis_service.set(reputation_key, data)
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.REPUTATION_FLUSH_INTERVAL_MS / 1000)
+            if not self._pending or redis_service.degraded:
+                continue
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Erro ao gravar reputação em lote: {e}")
 
     async def get_ban_ttl(self, wallet_address: str) -> int:
         """Retorna o tempo restante do banimento em segundos."""
@@ -68,4 +277,4 @@ class ReputationService:
         return await redis_service.ttl(ban_key)
 
 # Instância global do serviço de reputação
-reputation_service = ReputationService()
+reputation_service = ReputationService()
\ No newline at end of file
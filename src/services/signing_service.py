@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from eth_account import Account
+from src.config.settings import settings
+
+def sign_transaction(tx: dict, private_key: str) -> tuple:
+    """Assina uma transação e retorna (transação bruta, hash)"""
+    signed = Account.sign_transaction(tx, private_key)
+    return bytes(signed.rawTransaction), signed.hash.hex()
+
+def sign_transactions(txs: list, private_key: str) -> list:
+    """Assina uma lista de transações em sequência (executado dentro do pool)"""
+    return [sign_transaction(tx, private_key) for tx in txs]
+
+class SigningService:
+    """
+    Assina transações em um pool de threads ou processos.
+
+    A assinatura (secp256k1 + keccak) é CPU-bound; executá-la fora do event
+    loop evita travar o worker durante lotes com centenas de transações.
+    Com `SIGNING_POOL_KIND=process` o trabalho é paralelo de fato (sem GIL).
+    """
+
+    def __init__(self, kind: Optional[str] = None, size: Optional[int] = None):
+        self.kind = kind or settings.SIGNING_POOL_KIND
+        self.size = size or settings.SIGNING_POOL_SIZE
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """Pool de assinatura, criado sob demanda no primeiro uso"""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="signer")
+        return self._executor
+
+    async def sign(self, tx: dict, private_key: str) -> tuple:
+        """Assina uma transação no pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, sign_transaction, tx, private_key)
+
+    async def sign_many(self, txs: list, private_key: str) -> list:
+        """
+        Assina uma lista de transações no pool, preservando a ordem
+
+        A lista é dividida em um bloco por worker para amortizar o custo de
+        envio das transações ao pool (relevante no modo processo).
+
+        Returns:
+            Lista de tuplas (transação bruta, hash)
+        """
+        if not txs:
+            return []
+        loop = asyncio.get_running_loop()
+        chunk_size = -(-len(txs) // self.size)
+        chunks = [txs[i:i + chunk_size] for i in range(0, len(txs), chunk_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, sign_transactions, chunk, private_key)
+            for chunk in chunks
+        ))
+        return [signed for chunk in results for signed in chunk]
+
+    async def shutdown(self):
+        """Encerra o pool de assinatura, esperando as assinaturas em andamento fora do event loop"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True)
+
+# Instância global do serviço de assinatura
+signing_service = SigningService()
@@ -0,0 +1,143 @@
+import asyncio
+from typing import Optional
+from src.config.settings import settings
+from src.contracts.chain_client import batch_rpc_responses, is_revert
+from src.contracts.rpc_scheduler import priority
+from src.services.codec import get_codec
+
+# Funções lidas de cada token e os tipos de retorno para decodificação
+SNAPSHOT_CALLS = (
+    ("ownerOf", ["address"]),
+    ("tokenURI", ["string"]),
+    ("accessControl", ["address", "uint256"]),
+)
+ZERO_ADDRESS = "0x" + "00" * 20
+
+class SnapshotReadError(Exception):
+    """Um lote não pôde ser lido por erro do provedor (não por fim da coleção)"""
+
+class SnapshotService:
+    """
+    Snapshot de todos os tokens (dono, URI e delegação) em um bloco fixo.
+
+    Os ids são percorridos em blocos de SNAPSHOT_CHUNK_SIZE; cada bloco é
+    uma única requisição JSON-RPC em lote com três eth_call por token, todas
+    no mesmo número de bloco, então o resultado é consistente do primeiro ao
+    último token e a memória usada não depende do tamanho da coleção. Como
+    os ids são sequenciais e não há burn, o primeiro ownerOf revertido marca
+    o fim da coleção naquele bloco. Qualquer outro erro (timeout, limite do
+    provedor) faz o lote ser lido de novo; se persistir, o stream termina
+    com uma linha de erro em vez de parecer completo. A última linha é
+    sempre um trailer com "complete" e "last_token_id".
+    """
+
+    def __init__(self):
+        self.contract = None
+        self._selectors: dict = {}
+
+    def _call_data(self, fn_name: str, token_id: int) -> str:
+        selector = self._selectors.get(fn_name)
+        if selector is None:
+            selector = self.contract.contract.encodeABI(fn_name=fn_name, args=[0])[:10]
+            self._selectors[fn_name] = selector
+        return f"{selector}{token_id:064x}"
+
+    def _decode(self, types: list, response: dict, token_id: int):
+        if "error" in response:
+            if is_revert(response["error"]):
+                return None
+            raise SnapshotReadError(f"token {token_id}: {response['error'].get('message', response['error'])}")
+        result = response.get("result")
+        if not result or result == "0x":
+            return None
+        return self.contract.w3.codec.decode(types, bytes.fromhex(result[2:]))
+
+    def pin_block(self, block: Optional[int] = None) -> dict:
+        """Número e timestamp do bloco usado no snapshot (o mais recente por padrão)"""
+        header = self.contract.w3.eth.get_block(block if block is not None else "latest")
+        return {"number": header["number"], "timestamp": header["timestamp"]}
+
+    def read_chunk(self, start_id: int, count: int, block: dict) -> list:
+        """
+        Lê `count` tokens a partir de `start_id` no bloco fixado
+
+        Returns:
+            Registros dos tokens existentes; a lista termina antes do
+            primeiro token inexistente (ownerOf revertido)
+
+        Raises:
+            SnapshotReadError: alguma chamada falhou por outro motivo
+        """
+        block_tag = hex(block["number"])
+        token_ids = range(start_id, start_id + count)
+        calls = [
+            ("eth_call", [{"to": settings.CONTRACT_ADDRESS, "data": self._call_data(fn_name, token_id)}, block_tag])
+            for token_id in token_ids
+            for fn_name, _ in SNAPSHOT_CALLS
+        ]
+        # Reconciliação em massa não pode tirar orçamento das leituras de /access
+        with priority("background"):
+            responses = batch_rpc_responses(calls)
+
+        records = []
+        for i, token_id in enumerate(token_ids):
+            owner, uri, access = (
+                self._decode(types, responses[i * len(SNAPSHOT_CALLS) + j], token_id)
+                for j, (_, types) in enumerate(SNAPSHOT_CALLS)
+            )
+            if owner is None:
+                break
+            delegatee, expires_at = access if access else (ZERO_ADDRESS, 0)
+            to_checksum = self.contract.w3.to_checksum_address
+            records.append({
+                "token_id": token_id,
+                "owner": to_checksum(owner[0]),
+                "token_uri": uri[0] if uri else None,
+                "delegatee": to_checksum(delegatee) if delegatee != ZERO_ADDRESS else None,
+                "expires_at": expires_at,
+                "is_active": expires_at > block["timestamp"],
+            })
+        return records
+
+    async def _read_with_retries(self, start_id: int, count: int, block: dict) -> list:
+        for attempt in range(settings.SNAPSHOT_RETRIES + 1):
+            try:
+                return await asyncio.to_thread(self.read_chunk, start_id, count, block)
+            except Exception as e:
+                if attempt >= settings.SNAPSHOT_RETRIES:
+                    raise
+                print(f"⚠️ Snapshot: lote {start_id}-{start_id + count - 1} falhou ({e}), tentando de novo")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def stream(self, block: dict, from_id: int = 1, to_id: Optional[int] = None):
+        """
+        Gera as linhas NDJSON do snapshot, um bloco de tokens por vez
+
+        A última linha é o trailer {"complete": true, "last_token_id": N}
+        ou, se um lote falhou mesmo após as novas tentativas,
+        {"complete": false, "error": ..., "last_token_id": N}. N é o último
+        token emitido (None se nenhum).
+        """
+        codec = get_codec(settings.API_JSON_CODEC)
+        token_id = max(from_id, 1)
+        last_token_id = None
+        while to_id is None or token_id <= to_id:
+            count = settings.SNAPSHOT_CHUNK_SIZE
+            if to_id is not None:
+                count = min(count, to_id - token_id + 1)
+            try:
+                records = await self._read_with_retries(token_id, count, block)
+            except Exception as e:
+                print(f"❌ Snapshot interrompido no token {token_id}: {e}")
+                yield codec.dumps({"complete": False, "error": str(e), "last_token_id": last_token_id}) + b"\n"
+                return
+            if records:
+                last_token_id = records[-1]["token_id"]
+                yield b"".join(codec.dumps(record) + b"\n" for record in records)
+            if len(records) < count:
+                break
+            token_id += count
+        yield codec.dumps({"complete": True, "last_token_id": last_token_id}) + b"\n"
+
+# Instância global do serviço de snapshot
+snapshot_service = SnapshotService()
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from functools import cached_property
+from typing import Optional
+from eth_account import Account
+from src.config.settings import settings
+from src.services.redis_service import redis_service
+from src.services.ticket_verifier import sign_revocation_list, sign_ticket, ticket_domain
+
+# Conjunto ordenado token -> instante da última revogação de tickets
+REVOCATIONS_KEY = "tickets:revoked"
+
+# Margem do hasAccess do contrato: o ticket de um delegado vence antes da delegação
+DELEGATION_SAFETY_MARGIN = 30
+
+# Registra a revogação de vários tokens e descarta as que não afetam mais nenhum ticket.
+# KEYS[1]: conjunto de revogações
+# ARGV: instante da revogação, instante mínimo mantido, ids dos tokens...
+REVOKE_SCRIPT = """
+for i = 3, #ARGV do
+    redis.call('ZADD', KEYS[1], 'GT', ARGV[1], ARGV[i])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[2])
+return #ARGV - 2
+"""
+
+# Lê as revogações ainda relevantes (id, instante, id, instante, ...)
+# KEYS[1]: conjunto de revogações
+# ARGV[1]: instante mínimo mantido
+LIST_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+return redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+"""
+
+class TicketService:
+    """
+    Emite tickets de acesso assinados (EIP-712) e mantém a lista de revogação.
+
+    Depois de um hasAccess positivo o portador recebe um ticket que vale até
+    TICKET_MAX_TTL_SECONDS (ou até a delegação vencer, o que vier antes);
+    dispositivos o verificam localmente com `ticket_verifier`. Delegate,
+    revoke e Transfer de um token revogam todos os tickets dele emitidos até
+    aquele instante; a lista assinada é servida em /tickets/revocations e só
+    guarda entradas que ainda podem afetar algum ticket válido.
+
+    Sem TICKET_SIGNING_KEY a emissão fica desligada.
+    """
+
+    def __init__(self):
+        # Revogações ainda não gravadas no Redis (modo degradado)
+        self._unsynced: dict = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats_counters = {"issued": 0, "revoked": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.TICKET_SIGNING_KEY)
+
+    @cached_property
+    def issuer(self) -> str:
+        """Endereço que os dispositivos devem aceitar como emissor"""
+        return Account.from_key(settings.TICKET_SIGNING_KEY).address
+
+    @cached_property
+    def domain(self) -> dict:
+        return ticket_domain(settings.TICKET_CHAIN_ID, settings.CONTRACT_ADDRESS)
+
+    def _min_relevant(self, now: int) -> int:
+        # Tickets emitidos antes disso já venceram, mesmo com o relógio do dispositivo atrasado
+        return now - settings.TICKET_MAX_TTL_SECONDS - DELEGATION_SAFETY_MARGIN
+
+    # ---- Emissão ----
+
+    def issue(self, token_id: int, holder: str, delegatee: Optional[str], delegation_expires_at: int) -> Optional[dict]:
+        """
+        Assina um ticket para quem acabou de passar no hasAccess
+
+        Returns:
+            Ticket e seus campos, ou None se a delegação vence antes de o ticket ter utilidade
+        """
+        now = int(time.time())
+        expires_at = now + settings.TICKET_MAX_TTL_SECONDS
+        if delegatee and delegatee.lower() == holder.lower():
+            expires_at = min(expires_at, delegation_expires_at - DELEGATION_SAFETY_MARGIN)
+        if expires_at <= now:
+            return None
+
+        message = {"tokenId": token_id, "holder": holder, "issuedAt": now, "expiresAt": expires_at}
+        ticket = sign_ticket(message, self.domain, settings.TICKET_SIGNING_KEY)
+        self.stats_counters["issued"] += 1
+        return {
+            "ticket": ticket,
+            "token_id": token_id,
+            "holder": holder,
+            "issued_at": now,
+            "expires_at": expires_at,
+            "issuer": self.issuer,
+        }
+
+    # ---- Revogação ----
+
+    async def revoke(self, *token_ids: int):
+        """Revoga todos os tickets já emitidos para os tokens"""
+        token_ids = [int(token_id) for token_id in token_ids if token_id is not None]
+        if not self.enabled or not token_ids:
+            return
+        now = int(time.time())
+        for token_id in token_ids:
+            self._unsynced[token_id] = now
+        self.stats_counters["revoked"] += len(token_ids)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Grava no Redis as revogações pendentes; chamado também quando o Redis volta"""
+        if not self._unsynced:
+            return 0
+        pending, self._unsynced = self._unsynced, {}
+        by_time: dict = {}
+        for token_id, revoked_at in pending.items():
+            by_time.setdefault(revoked_at, []).append(token_id)
+        now = int(time.time())
+        for revoked_at, token_ids in by_time.items():
+            result = await redis_service.run_script(
+                REVOKE_SCRIPT, [REVOCATIONS_KEY], [revoked_at, self._min_relevant(now), *token_ids]
+            )
+            if result is None:
+                # Redis indisponível: mantém localmente (sem sobrescrever revogações mais novas)
+                for token_id in token_ids:
+                    self._unsynced[token_id] = max(self._unsynced.get(token_id, 0), revoked_at)
+        return len(pending) - len(self._unsynced)
+
+    async def revocation_list(self) -> dict:
+        """Lista de revogação atual, assinada pelo emissor"""
+        now = int(time.time())
+        min_relevant = self._min_relevant(now)
+        revoked = {}
+        result = await redis_service.run_script(LIST_SCRIPT, [REVOCATIONS_KEY], [min_relevant])
+        for i in range(0, len(result or []), 2):
+            revoked[int(result[i])] = int(float(result[i + 1]))
+        for token_id, revoked_at in self._unsynced.items():
+            if revoked_at >= min_relevant:
+                revoked[token_id] = max(revoked.get(token_id, 0), revoked_at)
+        return {
+            "issuer": self.issuer,
+            "domain": self.domain,
+            **sign_revocation_list(revoked, now, self.domain, settings.TICKET_SIGNING_KEY),
+        }
+
+    async def on_receipt(self, event: str, entry: dict):
+        """
+        Assinante do receipt_tracker: revoga de novo quando delegate/revoke é minerado
+
+        Entre o envio e a mineração o hasAccess ainda reflete o estado antigo,
+        então um ticket emitido nesse intervalo também precisa cair.
+        """
+        if event == "mined" and entry.get("kind") in ("delegate", "revoke"):
+            await self.revoke(entry.get("token_id"), *entry.get("token_ids", []))
+
+    def on_transfer(self, token_id: int, sender: str, recipient: str, block: Optional[int]):
+        """Ouvinte do token_index (executado na thread de varredura): o dono anterior perde os tickets"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: asyncio.create_task(self.revoke(token_id)))
+
+    def on_access_event(self, event: dict):
+        """Ouvinte do token_index para delegações e revogações feitas direto no contrato"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: asyncio.create_task(self.revoke(event["token_id"])))
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        redis_service.on_reconnect(self.flush)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "unsynced_revocations": len(self._unsynced), **self.stats_counters}
+
+# Instância global do serviço de tickets de acesso
+ticket_service = TicketService()
@@ -0,0 +1,187 @@
+"""
+Tickets de acesso assinados (EIP-712) e sua verificação local
+
+Módulo autocontido, sem dependências do restante do serviço (só o
+eth_account), para ser copiado para gateways e dispositivos. Com o endereço
+do emissor e a lista de revogação mais recente, um dispositivo verifica um
+ticket sem nenhuma ida ao servidor ou à blockchain:
+
+    verifier = TicketVerifier(issuer, ticket_domain(137, contract_address))
+    verifier.load_revocations(requests.get(".../tickets/revocations").json())
+    claims = verifier.verify(ticket, token_id=7, holder=user)
+
+O ticket é um base64url de 133 bytes: tokenId (32), holder (20), issuedAt
+(8), expiresAt (8) e a assinatura secp256k1 (65).
+"""
+
+import base64
+import struct
+import time
+from typing import Optional
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+
+TICKET_TYPES = {
+    "AccessTicket": [
+        {"name": "tokenId", "type": "uint256"},
+        {"name": "holder", "type": "address"},
+        {"name": "issuedAt", "type": "uint64"},
+        {"name": "expiresAt", "type": "uint64"},
+    ],
+}
+
+REVOCATION_TYPES = {
+    "RevocationList": [
+        {"name": "issuedAt", "type": "uint64"},
+        {"name": "tokenIds", "type": "uint256[]"},
+        {"name": "revokedAt", "type": "uint64[]"},
+    ],
+}
+
+_PACKED_TICKET = struct.Struct(">32s20sQQ65s")
+
+class InvalidTicket(Exception):
+    """Ticket malformado, com assinatura inválida, vencido ou revogado"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Ticket inválido: {reason}")
+        self.reason = reason
+
+def ticket_domain(chain_id: int, verifying_contract: str) -> dict:
+    """Domínio EIP-712: amarra o ticket à rede e ao contrato de origem"""
+    return {
+        "name": "IoTAccessTicket",
+        "version": "1",
+        "chainId": chain_id,
+        "verifyingContract": verifying_contract,
+    }
+
+def encode_ticket(message: dict, signature: bytes) -> str:
+    packed = _PACKED_TICKET.pack(
+        message["tokenId"].to_bytes(32, "big"),
+        bytes.fromhex(message["holder"][2:]),
+        message["issuedAt"],
+        message["expiresAt"],
+        signature,
+    )
+    return base64.urlsafe_b64encode(packed).rstrip(b"=").decode()
+
+def decode_ticket(ticket: str) -> tuple:
+    """
+    Returns:
+        (mensagem EIP-712, assinatura)
+
+    Raises:
+        InvalidTicket: formato inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(ticket + "=" * (-len(ticket) % 4))
+        token_id, holder, issued_at, expires_at, signature = _PACKED_TICKET.unpack(raw)
+    except (ValueError, TypeError, struct.error):
+        raise InvalidTicket("formato")
+    message = {
+        "tokenId": int.from_bytes(token_id, "big"),
+        "holder": "0x" + holder.hex(),
+        "issuedAt": issued_at,
+        "expiresAt": expires_at,
+    }
+    return message, signature
+
+def sign_ticket(message: dict, domain: dict, private_key) -> str:
+    signed = Account.sign_message(encode_typed_data(domain, TICKET_TYPES, message), private_key)
+    return encode_ticket(message, bytes(signed.signature))
+
+def sign_revocation_list(revoked: dict, issued_at: int, domain: dict, private_key) -> dict:
+    """Assina a lista {token_id: revogado_em}; o resultado é serializável em JSON"""
+    token_ids = sorted(revoked)
+    message = {"issuedAt": issued_at, "tokenIds": token_ids, "revokedAt": [revoked[t] for t in token_ids]}
+    signed = Account.sign_message(encode_typed_data(domain, REVOCATION_TYPES, message), private_key)
+    return {
+        "issued_at": issued_at,
+        "entries": [[token_id, revoked[token_id]] for token_id in token_ids],
+        "signature": "0x" + bytes(signed.signature).hex(),
+    }
+
+class TicketVerifier:
+    """
+    Verifica tickets localmente contra o emissor e a lista de revogação.
+
+    Um ticket do token T emitido até o instante de revogação de T é
+    recusado. Listas só substituem a atual se forem mais novas, para que uma
+    lista antiga reenviada não desfaça revogações. Com `max_revocation_age`,
+    tickets são recusados enquanto a lista carregada for mais antiga que isso
+    (dispositivo sem sincronizar falha fechado).
+    """
+
+    def __init__(self, issuer: str, domain: dict, clock_skew: int = 30, max_revocation_age: Optional[int] = None):
+        self.issuer = issuer.lower()
+        self.domain = domain
+        self.clock_skew = clock_skew
+        self.max_revocation_age = max_revocation_age
+        self.revoked: dict = {}
+        self.revocations_issued_at = 0
+
+    def load_revocations(self, revocation_list: dict) -> bool:
+        """
+        Adota uma lista de revogação assinada pelo emissor
+
+        Returns:
+            True se a lista foi adotada, False se não é mais nova que a atual
+
+        Raises:
+            InvalidTicket: assinatura da lista inválida
+        """
+        token_ids = [int(token_id) for token_id, _ in revocation_list["entries"]]
+        revoked_at = [int(ts) for _, ts in revocation_list["entries"]]
+        message = {"issuedAt": int(revocation_list["issued_at"]), "tokenIds": token_ids, "revokedAt": revoked_at}
+        try:
+            signer = Account.recover_message(
+                encode_typed_data(self.domain, REVOCATION_TYPES, message),
+                signature=bytes.fromhex(revocation_list["signature"].removeprefix("0x")),
+            )
+        except Exception:
+            raise InvalidTicket("assinatura da lista de revogação")
+        if signer.lower() != self.issuer:
+            raise InvalidTicket("lista de revogação não assinada pelo emissor")
+        if message["issuedAt"] <= self.revocations_issued_at:
+            return False
+        self.revoked = dict(zip(token_ids, revoked_at))
+        self.revocations_issued_at = message["issuedAt"]
+        return True
+
+    def verify(self, ticket: str, token_id: Optional[int] = None, holder: Optional[str] = None,
+               now: Optional[int] = None) -> dict:
+        """
+        Valida assinatura, validade, revogação e (opcionalmente) token e portador
+
+        Returns:
+            Campos do ticket (tokenId, holder, issuedAt, expiresAt)
+
+        Raises:
+            InvalidTicket: com o motivo da recusa
+        """
+        message, signature = decode_ticket(ticket)
+        try:
+            signer = Account.recover_message(
+                encode_typed_data(self.domain, TICKET_TYPES, message), signature=signature
+            )
+        except Exception:
+            raise InvalidTicket("assinatura")
+        if signer.lower() != self.issuer:
+            raise InvalidTicket("emissor")
+
+        now = int(time.time()) if now is None else now
+        if message["expiresAt"] <= now:
+            raise InvalidTicket("expirado")
+        if message["issuedAt"] > now + self.clock_skew:
+            raise InvalidTicket("emitido no futuro")
+        if token_id is not None and message["tokenId"] != token_id:
+            raise InvalidTicket("token")
+        if holder is not None and message["holder"].lower() != holder.lower():
+            raise InvalidTicket("portador")
+        if self.max_revocation_age is not None and now - self.revocations_issued_at > self.max_revocation_age:
+            raise InvalidTicket("lista de revogação desatualizada")
+        revoked_at = self.revoked.get(message["tokenId"])
+        if revoked_at is not None and message["issuedAt"] <= revoked_at:
+            raise InvalidTicket("revogado")
+        return message
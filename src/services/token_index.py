@@ -0,0 +1,219 @@
+import asyncio
+import time
+from typing import Optional
+from web3.exceptions import ContractLogicError
+from src.config.settings import settings
+from src.contracts.chain_client import batch_rpc
+from src.contracts.iot_access_nft import ACCESS_TOPICS, parse_access_events
+from src.contracts.rpc_scheduler import rpc_priority
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = "0x" + "00" * 20
+
+def parse_transfers(logs: list) -> list:
+    """Extrai (token_id, de, para, bloco) dos logs Transfer de uma lista de logs"""
+    return [
+        (
+            int(log["topics"][3], 16),
+            "0x" + log["topics"][1][-40:],
+            "0x" + log["topics"][2][-40:],
+            int(log["blockNumber"], 16) if log.get("blockNumber") else None,
+        )
+        for log in logs
+        if len(log.get("topics", [])) == 4
+        and log["topics"][0].lower() == TRANSFER_TOPIC
+    ]
+
+def minted_token_ids(logs: list) -> list:
+    """Extrai os ids de tokens criados (Transfer a partir do endereço zero) de uma lista de logs"""
+    return [
+        token_id
+        for token_id, sender, _, _ in parse_transfers(logs)
+        if sender == ZERO_ADDRESS
+    ]
+
+class TokenIndex:
+    """
+    Mantém em memória o maior id de token já criado.
+
+    O contrato numera os tokens sequencialmente a partir de 1 e não possui
+    burn, então qualquer id acima do máximo conhecido com certeza não existe.
+    O valor inicial é obtido por busca binária em `ownerOf` (poucas chamadas)
+    e depois atualizado pelos recibos de mint vistos pelo serviço e por uma
+    consulta incremental aos logs Transfer do contrato, que também são
+    repassados aos ouvintes registrados em `on_transfer`. No contrato v2 a
+    mesma consulta traz AccessDelegated/AccessRevoked, repassados aos
+    ouvintes de `on_access_event` (delegações feitas fora do serviço).
+
+    Como outro worker (ou instância) pode ter acabado de criar tokens que este
+    ainda não viu, ids logo acima do máximo (até TOKEN_INDEX_PROBE_WINDOW) não
+    são recusados de imediato: `probe` confirma com um ownerOf, e um resultado
+    negativo vale por TOKEN_INDEX_MISSING_TTL_SECONDS para ele e ids maiores.
+    """
+
+    def __init__(self):
+        self.max_token_id: Optional[int] = None
+        self.last_scanned_block: Optional[int] = None
+        self.contract = None
+        self._transfer_listeners: list = []
+        self._access_listeners: list = []
+        # (menor id confirmado como inexistente, instante da confirmação)
+        self._missing_from: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def on_transfer(self, callback):
+        """
+        Registra um ouvinte para os Transfers encontrados na varredura de logs
+
+        O callback recebe (token_id, de, para, bloco) e é chamado a partir da
+        thread de varredura.
+        """
+        self._transfer_listeners.append(callback)
+
+    def on_access_event(self, callback):
+        """
+        Registra um ouvinte para os eventos de acesso encontrados na varredura (v2)
+
+        O callback recebe o dict de `parse_access_events` e é chamado a partir
+        da thread de varredura.
+        """
+        self._access_listeners.append(callback)
+
+    def observe(self, token_id: int):
+        """Registra um token sabidamente criado"""
+        if self.max_token_id is None or token_id > self.max_token_id:
+            self.max_token_id = token_id
+
+    def is_known_missing(self, token_id: int) -> bool:
+        """True se o token com certeza não existe (sem nenhuma chamada à rede)"""
+        if token_id < 1:
+            return True
+        if self.max_token_id is None or token_id <= self.max_token_id:
+            return False
+        if token_id > self.max_token_id + settings.TOKEN_INDEX_PROBE_WINDOW:
+            return True
+        missing = self._missing_from
+        return (
+            missing is not None
+            and token_id >= missing[0]
+            and time.monotonic() - missing[1] < settings.TOKEN_INDEX_MISSING_TTL_SECONDS
+        )
+
+    def needs_probe(self, token_id: int) -> bool:
+        """True se o token está logo acima do máximo conhecido e precisa ser confirmado na rede"""
+        return (
+            self.max_token_id is not None
+            and token_id > self.max_token_id
+            and not self.is_known_missing(token_id)
+        )
+
+    def probe(self, token_id: int) -> Optional[bool]:
+        """
+        Confirma na rede se um token acima do máximo conhecido existe
+
+        Returns:
+            True/False, ou None se a consulta falhou (existência desconhecida)
+        """
+        try:
+            exists = self._token_exists(token_id)
+        except Exception as e:
+            print(f"⚠️  Não foi possível confirmar o token {token_id}: {e}")
+            return None
+        if exists:
+            self.observe(token_id)
+        else:
+            missing = self._missing_from
+            now = time.monotonic()
+            if missing is None or token_id < missing[0] or now - missing[1] >= settings.TOKEN_INDEX_MISSING_TTL_SECONDS:
+                self._missing_from = (token_id, now)
+        return exists
+
+    async def on_receipt(self, event: str, entry: dict):
+        """Assinante do receipt_tracker: atualiza o índice com os mints minerados"""
+        if event == "mined" and entry.get("kind") == "mint" and entry.get("receipt"):
+            for token_id in minted_token_ids(entry["receipt"].get("logs", [])):
+                self.observe(token_id)
+
+    def _token_exists(self, token_id: int) -> bool:
+        # Só um revert indica token inexistente; erros de rede são propagados
+        try:
+            self.contract.contract.functions.ownerOf(token_id).call()
+            return True
+        except ContractLogicError:
+            return False
+
+    def bootstrap(self) -> int:
+        """Descobre o maior id existente por busca exponencial + binária em ownerOf"""
+        block = self.contract.w3.eth.block_number
+        low, high = 0, 1
+        while self._token_exists(high):
+            low, high = high, high * 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if self._token_exists(mid):
+                low = mid
+            else:
+                high = mid
+        self.max_token_id = max(self.max_token_id or 0, low)
+        self.last_scanned_block = block
+        return low
+
+    def refresh(self):
+        """Lê os logs Transfer desde o último bloco consultado"""
+        latest = self.contract.w3.eth.block_number
+        # Um filtro com lista no primeiro tópico casa com qualquer um deles
+        topics = [TRANSFER_TOPIC, *ACCESS_TOPICS] if self.contract.supports_batch else TRANSFER_TOPIC
+        from_block = self.last_scanned_block + 1
+        while from_block <= latest:
+            to_block = min(from_block + settings.TOKEN_INDEX_LOG_CHUNK_BLOCKS - 1, latest)
+            logs = batch_rpc([("eth_getLogs", [{
+                "address": settings.CONTRACT_ADDRESS,
+                "fromBlock": hex(from_block),
+                "toBlock": hex(to_block),
+                "topics": [topics],
+            }])])[0]
+            if logs is None:
+                raise RuntimeError(f"eth_getLogs falhou para os blocos {from_block}-{to_block}")
+            for transfer in parse_transfers(logs):
+                if transfer[1] == ZERO_ADDRESS:
+                    self.observe(transfer[0])
+                for callback in self._transfer_listeners:
+                    callback(*transfer)
+            for event in parse_access_events(logs):
+                for callback in self._access_listeners:
+                    callback(event)
+            self.last_scanned_block = to_block
+            from_block = to_block + 1
+
+    def start(self, contract):
+        """Inicia a descoberta e a atualização periódica em segundo plano"""
+        self.contract = contract
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe a atualização periódica"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        rpc_priority.set("background")
+        while True:
+            try:
+                if self.last_scanned_block is None:
+                    max_id = await asyncio.to_thread(self.bootstrap)
+                    print(f"🔢 Maior token conhecido: {max_id}")
+                else:
+                    await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"❌ Erro ao atualizar índice de tokens: {e}")
+            await asyncio.sleep(settings.TOKEN_INDEX_REFRESH_SECONDS)
+
+# Instância global do índice de tokens
+token_index = TokenIndex()
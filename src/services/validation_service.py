@@ -0,0 +1,57 @@
+import asyncio
+from functools import lru_cache
+from typing import Optional
+from eth_utils import is_checksum_address, is_checksum_formatted_address, is_hex_address, to_checksum_address
+from fastapi import HTTPException
+from src.services.token_index import token_index
+
+# Quantidade de endereços normalizados mantidos em cache
+ADDRESS_CACHE_SIZE = 65536
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def normalize_address(address: str) -> Optional[str]:
+    """
+    Valida e normaliza um endereço para o formato checksum (EIP-55)
+
+    Endereços só com minúsculas ou maiúsculas são aceitos; os com letras
+    mistas precisam ter o checksum correto.
+
+    Returns:
+        Endereço em checksum ou None se for inválido
+    """
+    if not is_hex_address(address):
+        return None
+    if is_checksum_formatted_address(address) and not is_checksum_address(address):
+        return None
+    return to_checksum_address(address)
+
+async def token_missing(token_id: int) -> bool:
+    """
+    True se o token não existe
+
+    Decidido localmente, exceto para ids logo acima do maior conhecido (que
+    outro worker pode ter acabado de criar): esses são confirmados na rede.
+    """
+    if token_index.is_known_missing(token_id):
+        return True
+    if token_index.needs_probe(token_id):
+        return await asyncio.to_thread(token_index.probe, token_id) is False
+    return False
+
+async def validate_token_id(token_id: int):
+    """Rejeita ids de token que não existem (sem consultar a rede, salvo ids recém-criados)"""
+    if await token_missing(token_id):
+        raise HTTPException(status_code=404, detail="Token não encontrado")
+
+async def validate_access_request(token_id: int, user: str) -> str:
+    """
+    Valida uma verificação de acesso antes de qualquer outra I/O
+
+    Returns:
+        Endereço do usuário normalizado
+    """
+    address = normalize_address(user)
+    if address is None:
+        raise HTTPException(status_code=400, detail="Endereço Ethereum inválido")
+    await validate_token_id(token_id)
+    return address
@@ -0,0 +1,35 @@
+import os
+
+# Configuração mínima exigida por src.config.settings (conta e contrato de teste do hardhat/anvil)
+for name, value in {
+    "ALCHEMY_API_KEY": "test",
+    "CONTRACT_ADDRESS": "0x5FbDB2315678afecb367f032d93F642f64180aa3",
+    "MY_ADDRESS": "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266",
+    "PRIVATE_KEY": "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80",
+}.items():
+    os.environ.setdefault(name, value)
+
+import fakeredis
+import pytest
+from src.services.local_store import LocalStore
+from src.services.redis_service import redis_service
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def fake_redis():
+    """RedisService global apontando para um fakeredis novo (com Lua)"""
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    # Para simular outro worker gravando no mesmo servidor
+    client.fake_server = server
+    redis_service.redis_client = client
+    redis_service._scripts = {}
+    redis_service._failures = 0
+    redis_service._circuit_open = False
+    redis_service.fallback = LocalStore(redis_service.fallback.max_keys)
+    yield client
+    redis_service.redis_client = None
+    await client.aclose()
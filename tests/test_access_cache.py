@@ -0,0 +1,68 @@
+import asyncio
+import time
+import pytest
+from src.services.access_cache import AccessCache, cache_key, stale_key
+
+pytestmark = pytest.mark.anyio
+
+DETAILS = {"delegatee": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8", "expires_at": 0, "is_active": True}
+
+async def wait_for(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condição não atingida"
+        await asyncio.sleep(0.01)
+
+@pytest.fixture
+async def workers(fake_redis):
+    workers = [AccessCache(), AccessCache()]
+    for worker in workers:
+        worker.start()
+    await wait_for(lambda: all(worker._subscribed for worker in workers))
+    yield workers
+    for worker in workers:
+        await worker.stop()
+
+async def test_redis_hit_then_local_hit(workers):
+    first, second = workers
+    details = {**DETAILS, "expires_at": int(time.time()) + 3600}
+    assert await first.set(7, details, 300, first.generation(7))
+
+    data, source, ttl = await second.get(7)
+    assert (data, source) == (details, "redis")
+    assert 0 < ttl <= 300
+    assert (await second.get(7))[1] == "local"
+
+async def test_invalidation_reaches_every_worker(workers, fake_redis):
+    first, second = workers
+    await first.set(7, DETAILS, 300, first.generation(7))
+    await second.get(7)
+    assert 7 in second._local
+
+    await first.invalidate(7)
+    await wait_for(lambda: 7 not in second._local)
+    assert await second.get(7) is None
+    assert not await fake_redis.exists(cache_key(7), stale_key(7))
+
+async def test_read_started_before_invalidation_is_not_cached(workers):
+    first, _ = workers
+    generation = first.generation(7)
+    await first.invalidate(7)
+    assert not await first.set(7, DETAILS, 300, generation)
+    assert await first.get(7) is None
+
+async def test_stale_copy_outlives_ttl_with_recomputed_activity(workers, fake_redis):
+    first, _ = workers
+    expired = {**DETAILS, "expires_at": int(time.time()) - 10, "is_active": True}
+    await first.set(7, expired, 300, first.generation(7))
+    await fake_redis.delete(cache_key(7))
+
+    data, age = await first.get_stale(7)
+    assert data["is_active"] is False
+    assert age >= 0
+
+async def test_local_layer_disabled_without_subscription(fake_redis):
+    cache = AccessCache()
+    await cache.set(7, DETAILS, 300, cache.generation(7))
+    assert cache._local == {}
+    assert (await cache.get(7))[1] == "redis"
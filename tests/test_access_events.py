@@ -0,0 +1,69 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+import pytest
+from src.config.settings import Settings
+from src.services.access_events import AccessEventHub
+
+pytestmark = pytest.mark.anyio
+
+DELEGATEE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+@pytest.fixture
+async def hub():
+    hub = AccessEventHub()
+    contract = SimpleNamespace(get_access_details=lambda token_id: (DELEGATEE, int(time.time()) + 3600))
+    hub.start(contract)
+    yield hub
+    await hub.stop()
+
+async def next_event(queue, timeout: float = 1) -> tuple:
+    event_type, payload = await asyncio.wait_for(queue.get(), timeout)
+    return event_type, json.loads(payload)
+
+async def test_confirmed_operations_reach_only_subscribed_tokens(hub):
+    queue = hub.subscribe([7])
+    other = hub.subscribe([8])
+
+    await hub.on_receipt("confirmed", {"status": "success", "kind": "delegate", "token_id": 7, "tx_hash": "0xaa"})
+    await hub.on_receipt("mined", {"status": "success", "kind": "revoke", "token_id": 7, "tx_hash": "0xbb"})
+    await hub.on_receipt("confirmed", {"status": "success", "kind": "revoke", "token_id": 7, "tx_hash": "0xcc"})
+
+    event_type, payload = await next_event(queue)
+    assert (event_type, payload["delegatee"], payload["tx_hash"]) == ("delegated", DELEGATEE, "0xaa")
+    assert (await next_event(queue))[0] == "revoked"
+    assert other.empty()
+
+async def test_transfer_from_scan_thread(hub):
+    queue = hub.subscribe([7])
+    await asyncio.to_thread(hub.on_transfer, 7, "0x1", "0x2", 123)
+    event_type, payload = await next_event(queue)
+    assert event_type == "transfer"
+    assert (payload["from"], payload["to"], payload["block"]) == ("0x1", "0x2", 123)
+
+async def test_expiry_is_emitted_once_and_superseded_deadlines_are_ignored(hub):
+    queue = hub.subscribe([7])
+    now = time.time()
+    hub.schedule_expiry(7, int(now) + 1, DELEGATEE)
+    # Nova delegação substitui o prazo anterior
+    hub.schedule_expiry(7, int(now) + 2, DELEGATEE)
+
+    event_type, payload = await next_event(queue, timeout=4)
+    assert event_type == "expired"
+    assert payload["expires_at"] == int(now) + 2
+    assert queue.empty()
+    assert hub.stats()["scheduled_expiries"] == 0
+
+async def test_slow_client_drops_oldest(hub, monkeypatch):
+    monkeypatch.setattr(Settings, "SSE_CLIENT_QUEUE_SIZE", 2)
+    queue = hub.subscribe([7])
+    for i in range(3):
+        hub._dispatch({"type": "revoked", "token_id": 7, "n": i})
+    assert hub.dropped == 1
+    assert [json.loads(queue.get_nowait()[1])["n"] for _ in range(2)] == [1, 2]
+
+async def test_unsubscribe_removes_empty_tokens(hub):
+    queue = hub.subscribe([7, 8])
+    hub.unsubscribe(queue, [7, 8])
+    assert hub.stats()["tokens"] == 0
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from src.contracts.iot_access_nft import ACCESS_DELEGATED_TOPIC, ACCESS_REVOKED_TOPIC
+from src.services.access_cache import AccessCache
+from src.services.access_events import AccessEventHub
+from src.services.receipt_tracker import receipt_tracker
+
+pytestmark = pytest.mark.anyio
+
+DELEGATEE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+def topic(value: int) -> str:
+    return "0x" + f"{value:x}".rjust(64, "0")
+
+def batch_entry(logs: list, kind: str = "delegate") -> dict:
+    return {"tx_hash": "0xcc", "kind": kind, "token_id": None, "token_ids": [1, 2],
+            "status": "success", "receipt": {"logs": logs}}
+
+DELEGATED = [
+    {"topics": [ACCESS_DELEGATED_TOPIC, topic(token_id), topic(int(DELEGATEE, 16))], "data": topic(4_000_000_000)}
+    for token_id in (1, 2)
+]
+
+async def next_event(queue) -> str:
+    event_type, _ = await asyncio.wait_for(queue.get(), 1)
+    return event_type
+
+@pytest.fixture
+async def hub():
+    hub = AccessEventHub()
+    hub.start(contract=None)
+    yield hub
+    await hub.stop()
+
+async def test_batch_receipt_publishes_decoded_events(hub):
+    queue = hub.subscribe([1, 2])
+    await hub.on_receipt("confirmed", batch_entry(DELEGATED))
+    assert [await next_event(queue), await next_event(queue)] == ["delegated", "delegated"]
+    assert hub.stats()["scheduled_expiries"] == 2
+
+async def test_scanned_events_from_other_senders_are_published(hub):
+    queue = hub.subscribe([7])
+    event = {"event": "AccessRevoked", "token_id": 7, "delegatee": DELEGATEE, "expires_at": None, "tx_hash": "0xdd"}
+    await asyncio.to_thread(hub.on_access_event, event)
+    assert await next_event(queue) == "revoked"
+
+async def test_scanned_events_of_own_transactions_are_skipped(hub, monkeypatch):
+    monkeypatch.setattr(receipt_tracker, "pending", {"0xee": {"tx_hash": "0xee"}})
+    queue = hub.subscribe([7])
+    hub.on_access_event({"event": "AccessRevoked", "token_id": 7, "delegatee": DELEGATEE,
+                         "expires_at": None, "tx_hash": "0xee"})
+    await asyncio.sleep(0.05)
+    assert queue.empty()
+
+async def test_cache_drops_every_token_of_a_batch_receipt(fake_redis):
+    cache = AccessCache()
+    revoked = [{"topics": [ACCESS_REVOKED_TOPIC, topic(3), topic(int(DELEGATEE, 16))], "data": "0x"}]
+    for token_id in (1, 2, 3):
+        await cache.set(token_id, {"expires_at": 0}, 300, cache.generation(token_id))
+
+    await cache.on_receipt("mined", batch_entry(revoked, kind="revoke"))
+    assert [await cache.get(token_id) for token_id in (1, 2, 3)] == [None, None, None]
@@ -0,0 +1,101 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from src.config.settings import Settings
+from src.services.admission_control import AdaptiveLimit, AdmissionControl, AdmissionRejected
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(Settings, "ADMISSION_CONTROL_ENABLED", True)
+    monkeypatch.setattr(Settings, "ADMISSION_INITIAL_LIMIT", 4)
+    monkeypatch.setattr(Settings, "ADMISSION_MIN_LIMIT", 2)
+    monkeypatch.setattr(Settings, "ADMISSION_MAX_LIMIT", 5)
+    monkeypatch.setattr(Settings, "ADMISSION_BACKOFF_RATIO", 0.5)
+    monkeypatch.setattr(Settings, "ADMISSION_READ_LATENCY_TARGET_SECONDS", 1.0)
+
+def fill(limit: AdaptiveLimit, n: int):
+    for _ in range(n):
+        assert limit.try_acquire()
+
+def test_rejects_above_the_limit():
+    limit = AdaptiveLimit(1.0)
+    fill(limit, 4)
+    assert not limit.try_acquire()
+    assert limit.counters == {"admitted": 4, "rejected": 1, "decreases": 0}
+
+def test_fast_responses_grow_the_limit_only_when_busy():
+    limit = AdaptiveLimit(1.0)
+    fill(limit, 1)
+    limit.release(0.1, overloaded=False)
+    assert limit.limit == 4  # Ocioso: nada a aprender
+
+    fill(limit, 4)
+    for _ in range(4):
+        limit.release(0.1, overloaded=False)
+    assert 4 < limit.limit < 5
+    for _ in range(20):
+        fill(limit, 4)
+        for _ in range(4):
+            limit.release(0.1, overloaded=False)
+    assert limit.limit == 5
+
+def test_slow_responses_back_off_once_per_window(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limit = AdaptiveLimit(1.0)
+    fill(limit, 3)
+    # Uma leva de respostas lentas simultâneas reduz o limite uma vez só
+    for _ in range(3):
+        limit.release(2.0, overloaded=False)
+    assert limit.limit == 2.0 and limit.counters["decreases"] == 1
+
+    now[0] += 1.5
+    fill(limit, 1)
+    limit.release(0.1, overloaded=True)
+    assert limit.limit == 2.0  # Não passa do mínimo
+    assert limit.retry_after() == pytest.approx(0.8 * (0.8 * 2.0 + 0.2 * 2.0) + 0.2 * 0.1)
+
+async def test_context_manager_rejects_and_releases():
+    control = AdmissionControl()
+    entered = asyncio.Event()
+    leave = asyncio.Event()
+
+    async def hold():
+        async with control.limit("/access"):
+            entered.set()
+            await leave.wait()
+
+    holders = [asyncio.create_task(hold()) for _ in range(4)]
+    while control.stats()["routes"].get("/access", {}).get("inflight", 0) < 4:
+        await asyncio.sleep(0.01)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        async with control.limit("/access"):
+            pass
+    assert excinfo.value.route == "/access"
+    leave.set()
+    await asyncio.gather(*holders)
+    assert control.stats()["routes"]["/access"]["inflight"] == 0
+
+async def test_client_errors_do_not_count_as_overload():
+    control = AdmissionControl()
+    for status in (404, 404, 404):
+        with pytest.raises(HTTPException):
+            async with control.limit("/access"):
+                raise HTTPException(status_code=status)
+    assert control.stats()["routes"]["/access"]["decreases"] == 0
+
+    with pytest.raises(RuntimeError):
+        async with control.limit("/access"):
+            raise RuntimeError("provedor fora do ar")
+    assert control.stats()["routes"]["/access"]["decreases"] == 1
+
+async def test_disabled_admits_everything(monkeypatch):
+    monkeypatch.setattr(Settings, "ADMISSION_CONTROL_ENABLED", False)
+    control = AdmissionControl()
+    for _ in range(10):
+        async with control.limit("/access"):
+            pass
+    assert control.stats()["routes"] == {}
@@ -0,0 +1,80 @@
+import pytest
+from src.config.settings import Settings
+from src.services import audit_service as audit_module
+from src.services.audit_service import AUDIT_STREAM, AuditService
+from src.services.redis_service import redis_service
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setattr(Settings, "AUDIT_ENABLED", True)
+    monkeypatch.setattr(Settings, "AUDIT_BATCH_SIZE", 500)
+    monkeypatch.setattr(Settings, "AUDIT_QUEUE_MAX", 1000)
+
+async def test_flush_writes_general_and_indexed_streams(fake_redis, settings):
+    audit = AuditService()
+    audit.record(7, "0xabc", "granted", 0.0123)
+    audit.record(7, "0xdef", "denied", 0.02)
+    audit.record(0, "garbage", "rejected", 0.0)
+    assert await fake_redis.xlen(AUDIT_STREAM) == 0
+
+    assert await audit.flush() == 3
+    assert await fake_redis.xlen(AUDIT_STREAM) == 3
+    assert await fake_redis.xlen("audit:token:7") == 2
+    # Requisições inválidas não criam streams por token/carteira
+    assert not await fake_redis.exists("audit:token:0", "audit:wallet:garbage")
+    assert 0 < await fake_redis.ttl("audit:wallet:0xabc") <= Settings.AUDIT_INDEX_TTL_SECONDS
+
+async def test_query_pages_newest_first(fake_redis, settings):
+    audit = AuditService()
+    for i in range(5):
+        audit.record(7, f"0x{i}", "granted", 0.01)
+    await audit.flush()
+
+    first = await audit.query(token_id=7, limit=2)
+    assert [item["user"] for item in first["items"]] == ["0x4", "0x3"]
+    second = await audit.query(token_id=7, cursor=first["next_cursor"], limit=2)
+    assert [item["user"] for item in second["items"]] == ["0x2", "0x1"]
+    last = await audit.query(token_id=7, cursor=second["next_cursor"], limit=2)
+    assert [item["user"] for item in last["items"]] == ["0x0"]
+    assert last["next_cursor"] is None
+
+    both = await audit.query(token_id=7, wallet="0x3", limit=10)
+    assert [item["user"] for item in both["items"]] == ["0x3"]
+
+async def test_filtered_query_fills_page_across_reads(fake_redis, settings, monkeypatch):
+    monkeypatch.setattr(audit_module, "AUDIT_FILTER_SCAN_COUNT", 2)
+    audit = AuditService()
+    # Só 3 das 12 entradas do token são da carteira, espalhadas pelo stream
+    for i in range(12):
+        audit.record(7, "0xa" if i % 4 == 0 else "0xb", "granted", 0.01)
+    await audit.flush()
+
+    first = await audit.query(token_id=7, wallet="0xa", limit=2)
+    assert [item["user"] for item in first["items"]] == ["0xa", "0xa"]
+    assert first["next_cursor"] == first["items"][-1]["id"]
+    rest = await audit.query(token_id=7, wallet="0xa", cursor=first["next_cursor"], limit=2)
+    assert [item["user"] for item in rest["items"]] == ["0xa"]
+    assert rest["next_cursor"] is None
+
+async def test_query_rejects_malformed_cursor(fake_redis, settings):
+    with pytest.raises(ValueError):
+        await AuditService().query(cursor="garbage")
+    assert not redis_service.degraded
+
+async def test_full_queue_drops_oldest(settings, monkeypatch):
+    monkeypatch.setattr(Settings, "AUDIT_QUEUE_MAX", 2)
+    audit = AuditService()
+    for i in range(3):
+        audit.record(i + 1, "0xabc", "granted", 0.0)
+    assert audit.stats() == {"queued": 2, "dropped": 1}
+    assert [record["token_id"] for record in audit._queue] == [2, 3]
+
+async def test_failed_flush_keeps_order(fake_redis, settings, monkeypatch):
+    audit = AuditService()
+    for i in range(3):
+        audit.record(i + 1, "0xabc", "granted", 0.0)
+    monkeypatch.setattr(redis_service, "_circuit_open", True)
+    assert await audit.flush() == 0
+    assert [record["token_id"] for record in audit._queue] == [1, 2, 3]
@@ -0,0 +1,46 @@
+import pytest
+from src.services.ban_filter import BanFilter, BloomFilter
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    members = [f"0x{i:040x}" for i in range(2000)]
+    for member in members:
+        bloom.add(member)
+    assert all(member in bloom for member in members)
+
+    false_positives = sum(f"0x{i:040x}" in bloom for i in range(10_000, 30_000))
+    assert false_positives / 20_000 < 0.02
+    assert bloom.estimated_error_rate() == pytest.approx(0.01, rel=0.2)
+
+def test_bloom_filter_counts_only_new_items():
+    bloom = BloomFilter(capacity=100, error_rate=0.001)
+    bloom.add("0xabc")
+    bloom.add("0xabc")
+    assert bloom.count == 1
+
+def test_unsynchronized_filter_always_defers_to_redis():
+    ban_filter = BanFilter()
+    assert ban_filter.might_be_banned("0xabc")
+    assert ban_filter.stats()["skipped"] == 0
+
+@pytest.mark.anyio
+async def test_rebuild_loads_existing_bans(fake_redis):
+    await fake_redis.set("ban:0xbanned", "1", ex=300)
+    ban_filter = BanFilter()
+    ban_filter._subscribed = True
+
+    assert await ban_filter.rebuild()
+    assert ban_filter.ready
+    assert ban_filter.might_be_banned("0xbanned")
+    assert not ban_filter.might_be_banned("0xclean")
+
+    ban_filter.add("0xnew")
+    assert ban_filter.might_be_banned("0xnew")
+    assert ban_filter.stats()["items"] == 2
+
+@pytest.mark.anyio
+async def test_rebuild_without_subscription_stays_not_ready(fake_redis):
+    ban_filter = BanFilter()
+    assert await ban_filter.rebuild()
+    assert not ban_filter.ready
+    assert ban_filter.might_be_banned("0xclean")
@@ -0,0 +1,110 @@
+import gzip
+import json
+import pytest
+import requests
+from src.config.settings import Settings
+from src.contracts import chain_client
+from src.contracts.chain_client import _method_timeouts, _timeout_for, batch_rpc, rpc_post
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, body=None):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+class FakeSession:
+    """Devolve (ou levanta) os itens de `replies` em ordem e guarda cada POST"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.posts = []
+
+    def post(self, url, data, headers, timeout):
+        self.posts.append({"data": data, "headers": headers, "timeout": timeout})
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(Settings, "RPC_SCHEDULER_ENABLED", False)
+    monkeypatch.setattr(Settings, "RPC_RETRIES", 2)
+    monkeypatch.setattr(Settings, "RPC_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(Settings, "RPC_GZIP_REQUESTS", False)
+    session = FakeSession()
+    monkeypatch.setattr(chain_client, "_get_session", lambda: session)
+    return session
+
+@pytest.fixture
+def method_timeouts(monkeypatch):
+    monkeypatch.setattr(Settings, "RPC_METHOD_TIMEOUTS", ["eth_getLogs=30", " eth_sendRawTransaction = 20"])
+    monkeypatch.setattr(Settings, "RPC_READ_TIMEOUT_SECONDS", 10.0)
+    _method_timeouts.cache_clear()
+    yield
+    _method_timeouts.cache_clear()
+
+def test_read_timeout_is_the_largest_of_the_body(method_timeouts):
+    assert _method_timeouts() == {"eth_getLogs": 30.0, "eth_sendRawTransaction": 20.0}
+    assert _timeout_for(["eth_call"])[1] == 10.0
+    assert _timeout_for(["eth_call", "eth_getLogs", "eth_sendRawTransaction"])[1] == 30.0
+
+def test_batch_results_follow_call_order(session):
+    session.replies.append(FakeResponse(body=[
+        {"jsonrpc": "2.0", "id": 2, "result": "0x3"},
+        {"jsonrpc": "2.0", "id": 0, "result": "0x1"},
+        {"jsonrpc": "2.0", "id": 1, "error": {"code": 3, "message": "execution reverted"}},
+    ]))
+    calls = [("eth_call", [{}, "latest"])] * 3
+    assert batch_rpc(calls) == ["0x1", None, "0x3"]
+    assert [item["id"] for item in json.loads(session.posts[0]["data"])] == [0, 1, 2]
+
+def test_batch_rejected_as_a_whole_raises(session):
+    session.replies.append(FakeResponse(body={"jsonrpc": "2.0", "id": None, "error": {"message": "batch too large"}}))
+    with pytest.raises(RuntimeError):
+        batch_rpc([("eth_blockNumber", [])])
+
+def test_empty_batch_skips_http(session):
+    assert batch_rpc([]) == []
+    assert session.posts == []
+
+def test_transient_status_is_retried(session):
+    session.replies += [FakeResponse(503), requests.ReadTimeout(), FakeResponse(body={"result": "0x1"})]
+    assert json.loads(rpc_post(b"{}", ["eth_call"])) == {"result": "0x1"}
+    assert len(session.posts) == 3
+
+def test_retries_are_bounded(session):
+    session.replies += [FakeResponse(503)] * 3
+    with pytest.raises(requests.HTTPError):
+        rpc_post(b"{}", ["eth_call"])
+    assert len(session.posts) == 3
+
+def test_permanent_status_is_not_retried(session):
+    session.replies.append(FakeResponse(400))
+    with pytest.raises(requests.HTTPError):
+        rpc_post(b"{}", ["eth_call"])
+    assert len(session.posts) == 1
+
+def test_send_is_not_repeated_after_the_request_left(session):
+    session.replies += [requests.ReadTimeout(), FakeResponse(body={"result": "0xhash"})]
+    with pytest.raises(requests.ReadTimeout):
+        rpc_post(b"{}", ["eth_sendRawTransaction"])
+    assert len(session.posts) == 1
+
+def test_send_is_repeated_when_connection_never_opened(session):
+    session.replies += [requests.ConnectTimeout(), FakeResponse(body={"result": "0xhash"})]
+    assert json.loads(rpc_post(b"{}", ["eth_sendRawTransaction"])) == {"result": "0xhash"}
+    assert len(session.posts) == 2
+
+def test_large_bodies_are_gzipped(session, monkeypatch):
+    monkeypatch.setattr(Settings, "RPC_GZIP_REQUESTS", True)
+    monkeypatch.setattr(Settings, "RPC_GZIP_MIN_BYTES", 100)
+    session.replies += [FakeResponse(body={}), FakeResponse(body={})]
+    rpc_post(b"x" * 10, ["eth_call"])
+    rpc_post(b"x" * 200, ["eth_call"])
+    assert session.posts[0]["headers"] == {}
+    assert session.posts[1]["headers"] == {"Content-Encoding": "gzip"}
+    assert gzip.decompress(session.posts[1]["data"]) == b"x" * 200
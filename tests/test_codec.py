@@ -0,0 +1,53 @@
+import pytest
+from src.config.settings import Settings
+from src.services.codec import decode_value, encode_value, get_codec
+from src.services.redis_service import redis_service
+
+PAYLOADS = [
+    {"score": 95, "failed_streak": 0, "last_update": 1700000000.5, "history": [1, 2, 3]},
+    {"delegatee": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8", "expires_at": 0, "is_active": False},
+    [None, True, "texto com acentuação"],
+    42,
+    "123",
+    "",
+    '{"parece": "json"}',
+]
+
+@pytest.mark.parametrize("codec", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("value", PAYLOADS)
+def test_round_trip(monkeypatch, codec, value):
+    monkeypatch.setattr(Settings, "REDIS_CODEC", codec)
+    assert decode_value(encode_value(value)) == value
+
+@pytest.mark.parametrize("codec", ["json", "orjson", "msgpack"])
+def test_strings_are_not_parsed_as_json(monkeypatch, codec):
+    monkeypatch.setattr(Settings, "REDIS_CODEC", codec)
+    assert decode_value(encode_value("123")) == "123"
+    assert decode_value(encode_value({"a": 1})) == {"a": 1}
+
+def test_values_written_with_another_codec_stay_readable(monkeypatch):
+    monkeypatch.setattr(Settings, "REDIS_CODEC", "msgpack")
+    packed = encode_value({"score": 1})
+    monkeypatch.setattr(Settings, "REDIS_CODEC", "orjson")
+    assert decode_value(packed) == {"score": 1}
+
+def test_untagged_legacy_values():
+    assert decode_value(b'{"score": 100}') == {"score": 100}
+    assert decode_value(b"7") == 7
+    assert decode_value(b"plain text") == "plain text"
+
+def test_orjson_and_json_share_the_wire_format():
+    value = {"a": [1, 2.5, "x"]}
+    assert get_codec("orjson").tag == get_codec("json").tag
+    assert get_codec("json").loads(get_codec("orjson").dumps(value)) == value
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+@pytest.mark.anyio
+async def test_redis_round_trip(fake_redis):
+    await redis_service.set("reputation:0xabc", PAYLOADS[0])
+    await redis_service.set("plain", "123")
+    assert await redis_service.get("reputation:0xabc") == PAYLOADS[0]
+    assert await redis_service.get("plain") == "123"
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+import pytest
+from web3 import Web3
+from src.config.settings import Settings
+from src.contracts.iot_access_nft import (
+    ACCESS_DELEGATED_TOPIC, ACCESS_REVOKED_TOPIC, IoTAccessNFT, parse_access_events
+)
+from src.services import token_index as token_index_module
+from src.services.token_index import TRANSFER_TOPIC, TokenIndex
+
+DELEGATEE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+def topic(value: int) -> str:
+    return "0x" + f"{value:x}".rjust(64, "0")
+
+def delegated_log(token_id: int, expires_at: int, tx_hash: str = "0xaa") -> dict:
+    return {
+        "topics": [ACCESS_DELEGATED_TOPIC, topic(token_id), topic(int(DELEGATEE, 16))],
+        "data": topic(expires_at),
+        "blockNumber": "0x10",
+        "transactionHash": tx_hash,
+    }
+
+def revoked_log(token_id: int) -> dict:
+    return {
+        "topics": [ACCESS_REVOKED_TOPIC, topic(token_id), topic(int(DELEGATEE, 16))],
+        "data": "0x",
+        "blockNumber": "0x11",
+        "transactionHash": "0xbb",
+    }
+
+@pytest.fixture
+def v2():
+    return IoTAccessNFT(w3=Web3(), version=2)
+
+def test_event_topics_match_the_v2_abi(v2):
+    for name, expected in (("AccessDelegated", ACCESS_DELEGATED_TOPIC), ("AccessRevoked", ACCESS_REVOKED_TOPIC)):
+        event_abi = getattr(v2.contract.events, name)._get_event_abi()
+        signature = f"{name}({','.join(arg['type'] for arg in event_abi['inputs'])})"
+        assert Web3.keccak(text=signature).hex() == expected
+
+def test_batch_calls_round_trip_through_the_abi(v2):
+    data = v2.contract.encodeABI(fn_name="delegateAccessBatch", args=[[1, 2], [DELEGATEE, DELEGATEE], [60, 120]])
+    function, args = v2.contract.decode_function_input(data)
+    assert function.fn_name == "delegateAccessBatch"
+    assert args == {"tokenIds": [1, 2], "delegatees": [DELEGATEE, DELEGATEE], "durations": [60, 120]}
+
+def test_v1_has_no_batch_functions_or_events():
+    v1 = IoTAccessNFT(w3=Web3(), version=1)
+    assert not v1.supports_batch
+    with pytest.raises(ValueError, match="v2"):
+        v1.build_revoke_batch_tx([1, 2])
+    assert v1.access_events({"logs": [delegated_log(1, 2_000)]}) == []
+
+def test_access_events_are_decoded_in_log_order(v2):
+    transfer = {"topics": [TRANSFER_TOPIC, topic(0), topic(1), topic(3)], "data": "0x"}
+    events = v2.access_events({"logs": [delegated_log(3, 2_000), transfer, revoked_log(4)]})
+    assert events == [
+        {"event": "AccessDelegated", "token_id": 3, "delegatee": DELEGATEE, "expires_at": 2_000,
+         "block": 16, "tx_hash": "0xaa"},
+        {"event": "AccessRevoked", "token_id": 4, "delegatee": DELEGATEE, "expires_at": None,
+         "block": 17, "tx_hash": "0xbb"},
+    ]
+
+def test_log_scan_reports_access_events_on_v2(v2, monkeypatch):
+    requests = []
+
+    def batch_rpc(calls):
+        requests.append(calls[0][1][0])
+        return [[delegated_log(5, 2_000), {"topics": [TRANSFER_TOPIC, topic(0), topic(1), topic(9)], "data": "0x"}]]
+
+    monkeypatch.setattr(token_index_module, "batch_rpc", batch_rpc)
+    monkeypatch.setattr(Settings, "TOKEN_INDEX_LOG_CHUNK_BLOCKS", 1000)
+    v2.w3 = SimpleNamespace(eth=SimpleNamespace(block_number=20))
+    index = TokenIndex()
+    index.contract = v2
+    index.last_scanned_block = 10
+    transfers, access = [], []
+    index.on_transfer(lambda *transfer: transfers.append(transfer[0]))
+    index.on_access_event(access.append)
+
+    index.refresh()
+
+    assert requests[0]["topics"] == [[TRANSFER_TOPIC, ACCESS_DELEGATED_TOPIC, ACCESS_REVOKED_TOPIC]]
+    assert transfers == [9] and index.max_token_id == 9
+    assert [(event["event"], event["token_id"]) for event in access] == [("AccessDelegated", 5)]
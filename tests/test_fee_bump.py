@@ -0,0 +1,99 @@
+import time
+from types import SimpleNamespace
+import pytest
+from web3 import Web3
+from src.config.settings import Settings
+from src.services import fee_bump_service as fee_bump_module
+from src.services.fee_bump_service import FeeBumpService
+from src.services.receipt_tracker import ReceiptTracker
+
+pytestmark = pytest.mark.anyio
+
+GWEI = 10**9
+
+class FakeContract:
+    """Cliente de contrato com taxas fixas e envio programável"""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+        self.w3 = SimpleNamespace(eth=SimpleNamespace(
+            gas_price=30 * GWEI,
+            max_priority_fee=30 * GWEI,
+            get_block=lambda _: {"baseFeePerGas": 50 * GWEI},
+        ))
+
+    def sign_and_send(self, tx, private_key):
+        error = self.errors.get(tx["nonce"])
+        if error:
+            raise ValueError(error)
+        self.sent.append(tx)
+        return f"0x{len(self.sent):064x}"
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = ReceiptTracker()
+    monkeypatch.setattr(fee_bump_module, "receipt_tracker", tracker)
+    monkeypatch.setattr(Settings, "STUCK_TX_THRESHOLD_SECONDS", 60)
+    monkeypatch.setattr(Settings, "FEE_BUMP_PERCENT", 12.5)
+    monkeypatch.setattr(Settings, "FEE_BUMP_MAX_FEE_GWEI", 1000)
+    monkeypatch.setattr(Settings, "FEE_BUMP_MAX_ATTEMPTS", 5)
+    return tracker
+
+def track_stuck(tracker, tx_hash: str, nonce: int):
+    tx = {"nonce": nonce, "maxFeePerGas": 100 * GWEI, "maxPriorityFeePerGas": 30 * GWEI, "gas": 100000}
+    tracker.track(tx_hash, kind="mint", tx=tx)
+    tracker.pending[tx_hash]["last_submitted_at"] -= 120
+
+def test_bumped_fees_meets_minimum_increase(tracker):
+    service = FeeBumpService()
+    service.contract = FakeContract()
+    fees = service.bumped_fees({"maxFeePerGas": 100 * GWEI, "maxPriorityFeePerGas": 30 * GWEI})
+    assert fees["maxPriorityFeePerGas"] >= 30 * GWEI * 1.125
+    assert fees["maxFeePerGas"] >= 100 * GWEI * 1.125
+
+def test_bumped_fees_respects_ceiling(tracker, monkeypatch):
+    monkeypatch.setattr(Settings, "FEE_BUMP_MAX_FEE_GWEI", 105)
+    service = FeeBumpService()
+    service.contract = FakeContract()
+    assert service.bumped_fees({"maxFeePerGas": 100 * GWEI, "maxPriorityFeePerGas": 30 * GWEI}) is None
+    assert service.bumped_fees({"gasPrice": 100 * GWEI}) is None
+    assert service.bumped_fees({"gasPrice": 90 * GWEI}) == {"gasPrice": Web3.to_wei(101.25, "gwei")}
+
+async def test_failure_does_not_block_other_stuck_transactions(tracker):
+    service = FeeBumpService()
+    service.contract = FakeContract(errors={1: "replacement transaction underpriced"})
+    track_stuck(tracker, "0xaa", nonce=1)
+    track_stuck(tracker, "0xbb", nonce=2)
+
+    await service.check_once()
+
+    assert [tx["nonce"] for tx in service.contract.sent] == [2]
+    assert tracker.pending["0xbb"]["bumps"] == 1
+    # A que falhou espera outro intervalo antes de nova tentativa
+    assert time.time() - tracker.pending["0xaa"]["last_bump_attempt_at"] < 5
+    # Sem reenvio, o prazo de descarte do rastreador continua contando do último envio
+    assert time.time() - tracker.pending["0xaa"]["last_submitted_at"] >= 120
+    assert service.stuck_transactions() == []
+
+async def test_already_known_waits_another_interval(tracker):
+    service = FeeBumpService()
+    service.contract = FakeContract(errors={1: "already known"})
+    track_stuck(tracker, "0xaa", nonce=1)
+
+    await service.check_once()
+
+    assert tracker.pending["0xaa"].get("bumps", 0) == 0
+    assert service.stuck_transactions() == []
+
+async def test_nonce_too_low_stops_bumping(tracker):
+    service = FeeBumpService()
+    service.contract = FakeContract(errors={1: "nonce too low"})
+    track_stuck(tracker, "0xaa", nonce=1)
+
+    await service.check_once()
+
+    # Continua acompanhada (o recibo de alguma versão vai aparecer), mas sem novas substituições
+    assert "0xaa" in tracker.pending
+    tracker.pending["0xaa"]["last_submitted_at"] -= 120
+    assert service.stuck_transactions() == []
@@ -0,0 +1,116 @@
+import math
+import os
+import numpy as np
+import pytest
+from src.graphs.stats import gas_efficiency, grouped_stats, has_values, load_measurements, summarize_by_network
+from src.services.measurement_service import COLUMNS, ColumnarLog
+
+def row(kind: str = "mint", network: str = "Polygon", success: int = 1, gas_used: int = 50000,
+        gas_limit: int = 100000, cost_usd: float = math.nan) -> dict:
+    return {
+        "submitted_at": 1.0, "kind": kind, "network": network, "success": success,
+        "gas_used": gas_used, "gas_limit": gas_limit, "effective_gas_price": 10**9,
+        "cost_native": gas_used * 10**9 / 10**18, "cost_usd": cost_usd,
+        "mine_latency": 2.0, "confirm_latency": 6.0,
+    }
+
+def test_grouped_stats_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(100, 10, size=5000)
+    groups = rng.integers(0, 3, size=5000)
+
+    result = grouped_stats(values, groups, 4, n_boot=100, chunk_size=777)
+
+    for g in range(3):
+        selected = values[groups == g]
+        assert result["count"][g] == len(selected)
+        assert result["mean"][g] == pytest.approx(selected.mean())
+        assert result["std"][g] == pytest.approx(selected.std(ddof=1))
+        assert result["percentiles"][g] == pytest.approx(np.percentile(selected, [50, 90, 99]))
+        # IC da média em torno da média, com largura da ordem do erro padrão
+        half_width = 1.96 * selected.std(ddof=1) / math.sqrt(len(selected))
+        assert result["ci_low"][g] < result["mean"][g] < result["ci_high"][g]
+        assert result["ci_high"][g] - result["ci_low"][g] == pytest.approx(2 * half_width, rel=0.5)
+    # Grupo sem linhas
+    assert result["count"][3] == 0
+    assert np.isnan(result["mean"][3]) and np.isnan(result["ci_low"][3])
+    assert np.isnan(result["percentiles"][3]).all()
+
+def test_grouped_stats_drops_non_finite_values():
+    values = np.array([1.0, np.nan, 3.0, np.inf, np.nan])
+    groups = np.array([0, 0, 0, 1, 1])
+
+    result = grouped_stats(values, groups, 2, n_boot=20)
+
+    assert result["count"].tolist() == [2, 0]
+    assert result["mean"][0] == 2.0
+    assert np.isnan(result["mean"][1])
+
+def test_grouped_stats_is_deterministic_with_seed():
+    values = np.arange(100, dtype=float)
+    groups = np.zeros(100, dtype=int)
+    first = grouped_stats(values, groups, 1, seed=7)
+    second = grouped_stats(values, groups, 1, seed=7)
+    assert first["ci_low"] == second["ci_low"] and first["ci_high"] == second["ci_high"]
+
+def test_gas_efficiency_guards_zero_limit():
+    data = {"gas_used": np.array([50, 80, 10], dtype=np.uint64), "gas_limit": np.array([100, 0, 10], dtype=np.uint64)}
+    with np.errstate(all="raise"):
+        efficiency = gas_efficiency(data)
+    assert efficiency[0] == 50.0 and efficiency[2] == 100.0
+    assert np.isnan(efficiency[1])
+
+def test_summarize_by_network_filters_and_orders(tmp_path):
+    log = ColumnarLog(str(tmp_path))
+    log.append(
+        [row(network="Optimism", gas_used=20000)] * 3
+        + [row(network="Polygon", gas_used=40000)] * 2
+        + [row(network="Polygon", success=0, gas_used=99000)]
+        + [row(kind="revoke", network="Arbitrum", gas_used=30000)]
+    )
+    data = load_measurements(str(tmp_path))
+
+    metrics = summarize_by_network(data, "mint", {"Gas": "gas_used", "Cost (USD)": "cost_usd"},
+                                   networks=["Polygon", "Arbitrum", "Optimism"], n_boot=20)
+
+    # Arbitrum não tem mint: sai da lista; falhas são ignoradas
+    assert metrics["networks"] == ["Polygon", "Optimism"]
+    assert metrics["Gas"] == [40000.0, 20000.0]
+    assert metrics["Gas_CI"] == [(0.0, 0.0), (0.0, 0.0)]
+    # cost_usd NaN (sem MEASUREMENT_NATIVE_TOKEN_USD): métrica sem amostras
+    assert has_values(metrics, "Gas")
+    assert not has_values(metrics, "Cost (USD)")
+
+def test_columnar_log_round_trip(tmp_path):
+    log = ColumnarLog(str(tmp_path))
+    assert log.append([]) == 0
+    log.append([row(kind="mint", cost_usd=0.5), row(kind="delegate", network="Arbitrum")])
+    log.append([row(kind="revoke", gas_limit=0)])
+
+    data = load_measurements(str(tmp_path))
+
+    assert set(data) == {name for name, _, _ in COLUMNS}
+    assert data["kind"].tolist() == ["mint", "delegate", "revoke"]
+    assert data["network"].tolist() == ["Polygon", "Arbitrum", "Polygon"]
+    assert data["gas_limit"].tolist() == [100000, 100000, 0]
+    assert data["cost_usd"][0] == 0.5 and np.isnan(data["cost_usd"][1])
+
+def test_columnar_log_repairs_interrupted_write(tmp_path):
+    log = ColumnarLog(str(tmp_path))
+    log.append([row(gas_used=1), row(gas_used=2)])
+    # Gravação interrompida: só parte das colunas recebeu a terceira linha
+    with open(os.path.join(str(tmp_path), "gas_used.bin"), "ab") as f:
+        f.write(b"\x07" * 8)
+
+    assert load_measurements(str(tmp_path))["gas_used"].tolist() == [1, 2]
+
+    log.append([row(gas_used=3)])
+    assert load_measurements(str(tmp_path))["gas_used"].tolist() == [1, 2, 3]
+
+def test_load_measurements_concatenates_directories(tmp_path):
+    ColumnarLog(str(tmp_path / "polygon")).append([row(network="Polygon")])
+    ColumnarLog(str(tmp_path / "arbitrum")).append([row(network="Arbitrum"), row(network="Arbitrum")])
+
+    data = load_measurements(str(tmp_path / "polygon"), str(tmp_path / "arbitrum"))
+
+    assert data["network"].tolist() == ["Polygon", "Arbitrum", "Arbitrum"]
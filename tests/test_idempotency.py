@@ -0,0 +1,143 @@
+import asyncio
+import httpx
+import pytest
+import requests
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from src.config.settings import Settings
+from src.contracts import chain_client
+from src.contracts.chain_client import rpc_post
+from src.contracts.rpc_scheduler import RPCBudgetExceeded
+from src.services.idempotency_service import IdempotencyService
+
+pytestmark = pytest.mark.anyio
+
+class TimeoutAfterSend:
+    """Sessão cujo POST chega ao nó mas a resposta nunca volta"""
+
+    def __init__(self):
+        self.posts = 0
+
+    def post(self, *args, **kwargs):
+        self.posts += 1
+        raise requests.ReadTimeout("read timed out")
+
+@pytest.fixture
+def service(fake_redis, monkeypatch):
+    monkeypatch.setattr(Settings, "IDEMPOTENCY_ENABLED", True)
+    monkeypatch.setattr(Settings, "IDEMPOTENCY_WAIT_SECONDS", 2.0)
+    monkeypatch.setattr(Settings, "RPC_SCHEDULER_ENABLED", False)
+    monkeypatch.setattr(Settings, "RPC_RETRY_BACKOFF_SECONDS", 0)
+    return IdempotencyService()
+
+@pytest.fixture
+def app(service):
+    app = FastAPI()
+    app.middleware("http")(service.middleware)
+    app.state.calls = 0
+    app.state.release = None
+    app.state.budget_left = 0
+
+    @app.exception_handler(RPCBudgetExceeded)
+    async def budget_exceeded(request: Request, exc: RPCBudgetExceeded):
+        return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+    @app.post("/mint")
+    async def mint(request: Request):
+        app.state.calls += 1
+        if app.state.release is not None:
+            await app.state.release.wait()
+        return {"tx_hash": f"0x{app.state.calls:064x}", "body": (await request.json())}
+
+    @app.post("/budget")
+    async def budget():
+        app.state.calls += 1
+        if app.state.budget_left <= 0:
+            # Recusado antes de montar ou enviar qualquer transação
+            raise RPCBudgetExceeded("write", "fila cheia", 1)
+        return {"tx_hash": "0x01"}
+
+    @app.post("/send")
+    async def send():
+        app.state.calls += 1
+        await asyncio.to_thread(rpc_post, b"{}", ["eth_sendRawTransaction"])
+        return {"tx_hash": "0x01"}
+
+    @app.post("/send-then-502")
+    async def send_then_502():
+        app.state.calls += 1
+        try:
+            await asyncio.to_thread(rpc_post, b"{}", ["eth_sendRawTransaction"])
+        except requests.Timeout:
+            return JSONResponse(status_code=502, content={"detail": "nó não respondeu"})
+
+    return app
+
+def client_for(app) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+def key(value: str) -> dict:
+    return {"Idempotency-Key": value}
+
+async def test_retry_replays_the_first_response(app):
+    async with client_for(app) as client:
+        first = await client.post("/mint", json={"n": 1}, headers=key("a"))
+        second = await client.post("/mint", json={"n": 1}, headers=key("a"))
+        other = await client.post("/mint", json={"n": 1}, headers=key("b"))
+
+    assert app.state.calls == 2
+    assert second.json() == first.json() != other.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+async def test_same_key_with_another_body_is_rejected(app):
+    async with client_for(app) as client:
+        await client.post("/mint", json={"n": 1}, headers=key("a"))
+        response = await client.post("/mint", json={"n": 2}, headers=key("a"))
+    assert response.status_code == 422
+    assert app.state.calls == 1
+
+async def test_concurrent_duplicate_waits_for_the_original(app):
+    app.state.release = asyncio.Event()
+    async with client_for(app) as client:
+        first = asyncio.create_task(client.post("/mint", json={"n": 1}, headers=key("a")))
+        second = asyncio.create_task(client.post("/mint", json={"n": 1}, headers=key("a")))
+        await asyncio.sleep(0.1)
+        app.state.release.set()
+        first, second = await first, await second
+    assert app.state.calls == 1
+    assert first.json() == second.json()
+
+async def test_duplicate_gets_409_when_the_original_outlasts_the_wait(app, monkeypatch):
+    monkeypatch.setattr(Settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    app.state.release = asyncio.Event()
+    async with client_for(app) as client:
+        first = asyncio.create_task(client.post("/mint", json={"n": 1}, headers=key("a")))
+        await asyncio.sleep(0.05)
+        second = await client.post("/mint", json={"n": 1}, headers=key("a"))
+        app.state.release.set()
+        await first
+    assert second.status_code == 409
+    assert second.headers["Retry-After"] == "1"
+
+async def test_rejection_before_sending_releases_the_key(app):
+    async with client_for(app) as client:
+        rejected = await client.post("/budget", headers=key("a"))
+        app.state.budget_left = 1
+        retried = await client.post("/budget", headers=key("a"))
+    assert rejected.status_code == 503
+    assert retried.status_code == 200 and "Idempotent-Replayed" not in retried.headers
+    assert app.state.calls == 2
+
+@pytest.mark.parametrize("path", ["/send", "/send-then-502"])
+async def test_timeout_after_send_is_never_sent_again(app, monkeypatch, path):
+    session = TimeoutAfterSend()
+    monkeypatch.setattr(chain_client, "_get_session", lambda: session)
+    async with client_for(app) as client:
+        first = await client.post(path, headers=key("a"))
+        retried = await client.post(path, headers=key("a"))
+    assert first.status_code >= 500
+    assert retried.status_code == 409
+    assert "desconhecido" in retried.json()["detail"]
+    # eth_sendRawTransaction não é repetido nem pelo rpc_post nem pela repetição do cliente
+    assert (session.posts, app.state.calls) == (1, 1)
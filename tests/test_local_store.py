@@ -0,0 +1,49 @@
+import time
+from src.services.local_store import LocalStore
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    store = LocalStore(10)
+    store.set("a", 1, expire=5)
+    store.set("b", 2)
+    assert (store.ttl("a"), store.ttl("b"), store.ttl("missing")) == (5, -1, -2)
+
+    now[0] += 6
+    assert store.get("a") is None
+    assert not store.exists("a")
+    assert store.keys() == ["b"]
+
+def test_lru_eviction_keeps_recently_used():
+    store = LocalStore(2)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert (store.get("a"), store.get("c")) == (1, 3)
+    assert store.evictions == 1
+
+def test_increment_keeps_ttl_and_is_drained_as_delta(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    store = LocalStore(10)
+    store.set("hits", 5, expire=60)
+    assert store.increment("hits") == 6
+    assert store.increment("hits", 2) == 8
+    assert store.ttl("hits") == 60
+
+    store.set("plain", "x", expire=30)
+    store.delete("gone")
+    writes, increments, deleted = store.drain()
+    # Chaves incrementadas voltam como INCRBY, não como SET do valor local
+    assert writes == [("plain", "x", 30)]
+    assert increments == {"hits": 3}
+    assert deleted == {"gone"}
+    assert len(store) == 0 and store.drain() == ([], {}, set())
+
+def test_set_if_absent():
+    store = LocalStore(10)
+    assert store.set_if_absent("k", 1)
+    assert not store.set_if_absent("k", 2)
+    assert store.get("k") == 1
@@ -0,0 +1,36 @@
+import pytest
+from src.config.settings import Settings
+from src.services.measurement_service import MeasurementService
+
+pytestmark = pytest.mark.anyio
+
+def confirmed(gas_used: int) -> dict:
+    return {"submitted_at": 1.0, "kind": "mint", "status": "success", "gas_used": gas_used,
+            "effective_gas_price": 10**9, "tx": {"gas": 100000}, "mined_at": 3.0, "confirmed_at": 9.0}
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "MEASUREMENT_ENABLED", True)
+    monkeypatch.setattr(Settings, "MEASUREMENT_BUFFER_MAX", 3)
+    service = MeasurementService()
+    service.log.path = str(tmp_path)
+    return service
+
+async def test_failing_disk_keeps_only_the_newest_rows(service, monkeypatch):
+    def fail(rows):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(service.log, "append", fail)
+
+    for gas_used in range(1, 6):
+        service.on_receipt("confirmed", confirmed(gas_used))
+        assert await service.flush() == 0
+
+    assert [row["gas_used"] for row in service._rows] == [3, 4, 5]
+    assert service.stats()["dropped"] == 2
+    assert service.stats()["write_errors"] == 5
+
+async def test_rows_are_written_after_the_disk_recovers(service):
+    service.on_receipt("confirmed", confirmed(21000))
+    service.on_receipt("mined", confirmed(1))
+    assert await service.flush() == 1
+    assert service.stats()["buffered"] == 0
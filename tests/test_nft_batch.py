@@ -0,0 +1,182 @@
+from types import SimpleNamespace
+import pytest
+from pydantic import ValidationError
+from src.config.settings import Settings
+from src.contracts.iot_access_nft import NonceAllocator
+from src.schemas.models import DelegateAccessBatchRequest, RevokeAccessBatchRequest
+from src.services import nft_service as nft_module
+from src.services.nft_service import NFTService
+from src.services.receipt_tracker import ReceiptTracker
+
+pytestmark = pytest.mark.anyio
+
+DELEGATEE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+class FakeContract:
+    """Contrato v1 (uma transação por item) com falhas programáveis por token"""
+
+    supports_batch = False
+
+    def __init__(self, build_errors=(), send_errors=()):
+        self.build_errors = set(build_errors)
+        self.send_errors = set(send_errors)
+        self.sent = []
+        self.w3 = SimpleNamespace(eth=SimpleNamespace(get_transaction_count=lambda address, block: 7))
+        self.nonces = NonceAllocator(self.w3)
+
+    def fee_params(self) -> dict:
+        return {"maxFeePerGas": 2, "maxPriorityFeePerGas": 1}
+
+    def _tx(self, token_id, nonce, **fees) -> dict:
+        if token_id in self.build_errors:
+            raise ValueError(f"token {token_id}: execution reverted")
+        if nonce is None:
+            # Envio individual: como IoTAccessNFT._build, reserva depois de montar
+            nonce = self.nonces.reserve()
+        return {"token_id": token_id, "nonce": nonce, **fees}
+
+    def build_delegate_tx(self, token_id, delegatee, duration, nonce=None, **fees):
+        return self._tx(token_id, nonce, **fees)
+
+    def build_revoke_tx(self, token_id, nonce=None, **fees):
+        return self._tx(token_id, nonce, **fees)
+
+    def send_raw(self, raw_tx: dict) -> str:
+        if raw_tx["token_id"] in self.send_errors:
+            raise ValueError("nonce too low")
+        self.sent.append(raw_tx)
+        return f"0x{raw_tx['nonce']:064x}"
+
+    def sign_and_send(self, tx: dict, private_key: str) -> str:
+        return self.send_raw(tx)
+
+class FakeSigner:
+    async def sign_many(self, txs, private_key):
+        # A "transação assinada" é a própria transação, para o contrato falso inspecionar
+        return [(dict(tx), f"0x{tx['nonce']:064x}") for tx in txs]
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = ReceiptTracker()
+    monkeypatch.setattr(nft_module, "receipt_tracker", tracker)
+    monkeypatch.setattr(nft_module, "signing_service", FakeSigner())
+    return tracker
+
+def service_with(contract) -> NFTService:
+    service = NFTService()
+    service._contract = contract
+    return service
+
+async def test_batch_gets_sequential_nonces_and_is_tracked(tracker):
+    contract = FakeContract()
+    results = await service_with(contract).revoke_access_batch([1, 2, 3])
+
+    assert [r["status"] for r in results] == ["sent"] * 3
+    assert [r["nonce"] for r in results] == [7, 8, 9]
+    assert all(tx["maxFeePerGas"] == 2 for tx in contract.sent)
+    assert {entry["token_id"] for entry in tracker.pending_entries()} == {1, 2, 3}
+
+async def test_build_failure_does_not_consume_a_nonce(tracker):
+    contract = FakeContract(build_errors={2})
+    results = await service_with(contract).delegate_access_batch(
+        [(1, DELEGATEE, 60), (2, DELEGATEE, 60), (3, DELEGATEE, 60)]
+    )
+
+    assert [r["status"] for r in results] == ["sent", "failed", "sent"]
+    assert "execution reverted" in results[1]["error"]
+    assert [results[0]["nonce"], results[2]["nonce"]] == [7, 8]
+    assert results[0]["delegatee"] == DELEGATEE
+
+async def test_send_failure_marks_later_nonces_as_blocked(tracker):
+    contract = FakeContract(send_errors={2})
+    results = await service_with(contract).revoke_access_batch([1, 2, 3])
+
+    assert [r["status"] for r in results] == ["sent", "failed", "sent"]
+    assert "blocked_by_nonce" not in results[0]
+    assert results[2]["blocked_by_nonce"] == 8
+    # Só os enviados entram no rastreador
+    assert len(tracker.pending_entries()) == 2
+
+async def test_single_write_does_not_reuse_batch_nonces(tracker):
+    # O nó ainda não viu o lote: o contador "pending" continua em 7
+    contract = FakeContract()
+    service = service_with(contract)
+    await service.revoke_access_batch([1, 2, 3])
+    service.revoke_access(4)
+
+    assert [tx["nonce"] for tx in contract.sent] == [7, 8, 9, 10]
+
+async def test_unsent_nonces_are_released(tracker):
+    contract = FakeContract(send_errors={3, 6})
+    service = service_with(contract)
+    # O último nonce do lote falhou: volta a ser o próximo
+    await service.revoke_access_batch([1, 2, 3])
+    assert contract.nonces.reserve() == 9
+    # Falha no meio deixa lacuna: a próxima reserva ressincroniza com o nó
+    contract.nonces.release(9)
+    await service.revoke_access_batch([4, 5, 6, 7])
+    assert contract.nonces.reserve() == 7
+
+async def test_nothing_buildable_skips_nonce_lookup(tracker):
+    contract = FakeContract(build_errors={1})
+    contract.w3.eth.get_transaction_count = None
+    results = await service_with(contract).revoke_access_batch([1])
+    assert results[0]["status"] == "failed"
+
+def test_batch_requests_reject_duplicates_and_oversize(monkeypatch):
+    monkeypatch.setattr(Settings, "BATCH_MAX_ITEMS", 2)
+    with pytest.raises(ValidationError, match="repetidos"):
+        RevokeAccessBatchRequest(token_ids=[1, 1])
+    with pytest.raises(ValidationError, match="no máximo 2"):
+        RevokeAccessBatchRequest(token_ids=[1, 2, 3])
+    with pytest.raises(ValidationError, match="ao menos um"):
+        RevokeAccessBatchRequest(token_ids=[])
+    with pytest.raises(ValidationError, match="repetidos"):
+        DelegateAccessBatchRequest(items=[
+            {"token_id": 1, "delegatee": DELEGATEE, "duration": 60},
+            {"token_id": 1, "delegatee": DELEGATEE, "duration": 30},
+        ])
+
+class FakeContractV2(FakeContract):
+    """Contrato v2: uma transação por bloco de itens"""
+
+    supports_batch = True
+
+    def build_revoke_batch_tx(self, token_ids, nonce=None, **fees):
+        if self.build_errors & set(token_ids):
+            raise ValueError("execution reverted: Token inexistente")
+        return {"token_id": tuple(token_ids), "nonce": nonce, **fees}
+
+    def build_delegate_batch_tx(self, token_ids, delegatees, durations, nonce=None, **fees):
+        assert len(token_ids) == len(delegatees) == len(durations)
+        return self.build_revoke_batch_tx(token_ids, nonce, **fees)
+
+async def test_v2_sends_one_transaction_per_chunk(tracker, monkeypatch):
+    monkeypatch.setattr(nft_module, "MAX_BATCH_SIZE", 2)
+    contract = FakeContractV2()
+    results = await service_with(contract).revoke_access_batch([1, 2, 3, 4, 5])
+
+    assert [tx["token_id"] for tx in contract.sent] == [(1, 2), (3, 4), (5,)]
+    assert [r["token_id"] for r in results] == [1, 2, 3, 4, 5]
+    assert [r["nonce"] for r in results] == [7, 7, 8, 8, 9]
+    assert results[0]["tx_hash"] == results[1]["tx_hash"] != results[2]["tx_hash"]
+    entries = sorted(tracker.pending_entries(), key=lambda entry: entry["tx"]["nonce"])
+    assert [entry["token_ids"] for entry in entries] == [[1, 2], [3, 4], [5]]
+    assert [entry["batch_size"] for entry in entries] == [2, 2, 1]
+
+async def test_v2_chunk_fails_as_a_whole(tracker, monkeypatch):
+    monkeypatch.setattr(nft_module, "MAX_BATCH_SIZE", 2)
+    contract = FakeContractV2(build_errors={3})
+    results = await service_with(contract).delegate_access_batch(
+        [(token_id, DELEGATEE, 60) for token_id in (1, 2, 3, 4)]
+    )
+
+    assert [r["status"] for r in results] == ["sent", "sent", "failed", "failed"]
+    assert "Token inexistente" in results[3]["error"]
+    assert results[2]["delegatee"] == DELEGATEE and "delegatees" not in results[2]
+
+def test_oversized_batch_is_rejected_before_duplicate_scan(monkeypatch):
+    monkeypatch.setattr(Settings, "BATCH_MAX_ITEMS", 10)
+    with pytest.raises(ValidationError, match="no máximo 10") as error:
+        RevokeAccessBatchRequest(token_ids=[1] * 20_000)
+    assert "repetidos" not in str(error.value)
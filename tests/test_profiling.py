@@ -0,0 +1,80 @@
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.config.settings import Settings
+from src.services.profiling_service import ProfilingService, StackSampler
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(Settings, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(Settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(Settings, "PROFILING_INTERVAL_SECONDS", 0.001)
+
+def busy_loop(seconds: float):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+def app_with(service: ProfilingService) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.middleware("http")(service.middleware)
+
+    @app.get("/work")
+    async def work():
+        busy_loop(0.05)
+        return {"ok": True}
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def test_only_admins_can_force_a_profile(admin):
+    service = ProfilingService()
+    assert service.is_admin("secret")
+    assert not service.is_admin("wrong") and not service.is_admin(None)
+    assert service.should_profile({"x-profile": "1", "x-admin-token": "secret"})
+    assert not service.should_profile({"x-profile": "1", "x-admin-token": "wrong"})
+    assert not service.should_profile({})
+
+async def test_stack_sampler_collects_folded_stacks():
+    sampler = StackSampler(0.001)
+    sampler.start()
+    busy_loop(0.05)
+    fmt, data = sampler.stop()
+    assert fmt == "folded"
+    assert "busy_loop (test_profiling.py" in data
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in data.splitlines())
+
+async def test_profiled_request_is_stored_in_redis(admin, fake_redis, monkeypatch):
+    monkeypatch.setattr(Settings, "PROFILING_STORAGE", "redis")
+    service = ProfilingService()
+    monkeypatch.setattr(service, "new_profiler", lambda: StackSampler(0.001))
+
+    async with app_with(service) as client:
+        plain = await client.get("/work")
+        profiled = await client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+
+    assert "X-Profile-Id" not in plain.headers
+    profile_id = profiled.headers["X-Profile-Id"]
+    [meta] = await service.list()
+    assert (meta["id"], meta["path"], meta["format"]) == (profile_id, "/work", "folded")
+    fmt, data = await service.fetch(profile_id)
+    assert fmt == "folded" and "busy_loop" in data
+    assert await service.fetch("missing") is None
+
+async def test_disk_storage_keeps_only_the_latest(admin, tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "PROFILING_STORAGE", "disk")
+    monkeypatch.setattr(Settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "PROFILING_MAX_STORED", 2)
+    service = ProfilingService()
+    ids = []
+    for i in range(3):
+        monkeypatch.setattr(time, "time", lambda i=i: 1_000 + i)
+        ids.append(await service.save({"path": f"/p{i}", "duration": 0.1}, "folded", f"main {i}"))
+
+    assert [meta["id"] for meta in await service.list()] == ids[:0:-1]
+    assert await service.fetch(ids[0]) is None
+    assert await service.fetch(ids[2]) == ("folded", "main 2")
+    # O id vira nome de arquivo: nada fora do diretório de perfis
+    assert await service.fetch("../etc") is None
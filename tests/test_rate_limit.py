@@ -0,0 +1,47 @@
+import pytest
+from src.config.settings import Settings
+from src.services.rate_limit_service import rate_limit_service
+from src.services.redis_service import redis_service
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_WALLET_CAPACITY", 3)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_WALLET_REFILL_PER_SECOND", 0.01)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_IP_CAPACITY", 5)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_IP_REFILL_PER_SECOND", 0.01)
+
+async def test_wallet_bucket_exhausts_and_reports_retry(fake_redis, limits):
+    states = [await rate_limit_service.check("0xabc") for _ in range(4)]
+    assert [s["allowed"] for s in states] == [True, True, True, False]
+    assert [s["remaining"] for s in states[:3]] == [2, 1, 0]
+    # 1 token a 0,01/s: 100 s
+    assert states[3]["retry_after"] == 100
+    headers = rate_limit_service.headers(states[3])
+    assert headers["RateLimit-Limit"] == "3"
+    assert headers["Retry-After"] == "100"
+    assert 0 < await fake_redis.pttl("ratelimit:wallet:0xabc") <= 300_000
+
+async def test_ip_bucket_is_shared_across_wallets(fake_redis, limits):
+    allowed = [(await rate_limit_service.check(f"0x{i}", "10.0.0.1"))["allowed"] for i in range(6)]
+    assert allowed == [True] * 5 + [False]
+    # Outro IP não é afetado
+    assert (await rate_limit_service.check("0x99", "10.0.0.2"))["allowed"]
+
+async def test_rejected_request_consumes_no_tokens(fake_redis, limits, monkeypatch):
+    monkeypatch.setattr(Settings, "RATE_LIMIT_IP_CAPACITY", 1)
+    assert (await rate_limit_service.check("0xabc", "10.0.0.1"))["allowed"]
+    # O IP bloqueia; o bucket da carteira não deve ser debitado
+    blocked = await rate_limit_service.check("0xabc", "10.0.0.1")
+    assert not blocked["allowed"]
+    assert blocked["limit"] == 1
+    assert int(float(await fake_redis.hget("ratelimit:wallet:0xabc", "tokens"))) == 2
+
+async def test_fails_open_when_disabled_or_degraded(fake_redis, limits, monkeypatch):
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    assert await rate_limit_service.check("0xabc") is None
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(redis_service, "_circuit_open", True)
+    assert await rate_limit_service.check("0xabc") is None
@@ -0,0 +1,131 @@
+import threading
+import pytest
+from src.config.settings import Settings
+from src.services import receipt_tracker as receipt_module
+from src.services.receipt_tracker import ReceiptTracker
+
+pytestmark = pytest.mark.anyio
+
+class FakeChain:
+    """Responde eth_blockNumber e eth_getTransactionReceipt a partir de um dicionário"""
+
+    def __init__(self):
+        self.block = 100
+        self.receipts = {}
+        self.calls = []
+
+    def batch_rpc(self, calls):
+        self.calls.append(calls)
+        results = []
+        for method, params in calls:
+            if method == "eth_blockNumber":
+                results.append(hex(self.block))
+            else:
+                results.append(self.receipts.get(params[0]))
+        return results
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = FakeChain()
+    monkeypatch.setattr(receipt_module, "batch_rpc", chain.batch_rpc)
+    monkeypatch.setattr(Settings, "RECEIPT_CONFIRMATION_DEPTH", 3)
+    return chain
+
+def receipt(block: int, status: int = 1) -> dict:
+    return {"blockNumber": hex(block), "status": hex(status), "gasUsed": hex(21000), "effectiveGasPrice": hex(10**9)}
+
+async def test_no_rpc_when_nothing_pending(chain):
+    tracker = ReceiptTracker()
+    await tracker.poll_once()
+    assert chain.calls == []
+
+async def test_mined_then_confirmed(chain):
+    tracker = ReceiptTracker()
+    events = []
+    tracker.subscribe(lambda event, entry: events.append((event, entry["status"])))
+    tracker.track("0xAA", kind="mint")
+
+    await tracker.poll_once()
+    assert events == []
+
+    chain.block = 101
+    chain.receipts["0xaa"] = receipt(101)
+    await tracker.poll_once()
+    assert events == [("mined", "success")]
+    assert tracker.status("0xaa")["confirmations"] == 1
+
+    # Mesmo bloco: só o eth_blockNumber, sem consultar recibos
+    calls = len(chain.calls)
+    await tracker.poll_once()
+    assert chain.calls[calls:] == [[("eth_blockNumber", [])]]
+
+    chain.block = 103
+    await tracker.poll_once()
+    assert events[-1] == ("confirmed", "success")
+    assert "0xaa" not in tracker.pending
+    assert tracker.status("0xaa")["gas_used"] == 21000
+
+async def test_replacement_is_tracked_under_original_hash(chain):
+    tracker = ReceiptTracker()
+    tracker.track("0xaa", kind="delegate", tx={"nonce": 1})
+    tracker.replace("0xaa", "0xbb", {"nonce": 1, "maxFeePerGas": 2})
+
+    chain.block = 101
+    chain.receipts["0xbb"] = receipt(101)
+    await tracker.poll_once()
+    assert tracker.status("0xbb")["mined_hash"] == "0xbb"
+    assert tracker.status("0xaa")["hashes"] == ["0xaa", "0xbb"]
+
+async def test_reorg_returns_to_pending(chain):
+    tracker = ReceiptTracker()
+    events = []
+    tracker.subscribe(lambda event, entry: events.append(event))
+    tracker.track("0xaa")
+    chain.block = 101
+    chain.receipts["0xaa"] = receipt(101)
+    await tracker.poll_once()
+
+    chain.block = 102
+    del chain.receipts["0xaa"]
+    await tracker.poll_once()
+    assert events == ["mined", "reorged"]
+    assert tracker.status("0xaa")["status"] == "pending"
+
+async def test_drop_timeout_counts_from_last_replacement(chain, monkeypatch):
+    monkeypatch.setattr(Settings, "RECEIPT_TRACKING_TIMEOUT_SECONDS", 600)
+    tracker = ReceiptTracker()
+    events = []
+    tracker.subscribe(lambda event, entry: events.append(event))
+    tracker.track("0xaa", tx={"nonce": 1})
+    # Substituída por taxa maior pouco antes do prazo contado do primeiro envio
+    tracker.pending["0xaa"]["submitted_at"] -= 590
+    tracker.replace("0xaa", "0xbb", {"nonce": 1})
+    tracker.pending["0xaa"]["last_submitted_at"] -= 20
+
+    await tracker.poll_once()
+    assert events == []
+    assert "0xaa" in tracker.pending
+
+    tracker.pending["0xaa"]["last_submitted_at"] -= 600
+    chain.block += 1
+    await tracker.poll_once()
+    assert events == ["dropped"]
+
+async def test_track_from_threads_while_polling(chain):
+    tracker = ReceiptTracker()
+    per_thread = 500
+
+    def submit(prefix: int):
+        for i in range(per_thread):
+            tracker.track(f"0x{prefix:02x}{i:06x}")
+
+    threads = [threading.Thread(target=submit, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        chain.block += 1
+        await tracker.poll_once()
+    for thread in threads:
+        thread.join()
+
+    assert len(tracker.pending) == 4 * per_thread
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from src.config.settings import Settings
+from src.services.redis_service import redis_service
+
+pytestmark = pytest.mark.anyio
+
+class BrokenRedis:
+    """Cliente cujas chamadas falham como um Redis fora do ar"""
+
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ConnectionError("Connection refused")
+        return fail
+
+@pytest.fixture
+def broken(fake_redis, monkeypatch):
+    monkeypatch.setattr(Settings, "REDIS_CIRCUIT_FAILURE_THRESHOLD", 3)
+    redis_service.redis_client = BrokenRedis()
+    yield fake_redis
+    redis_service.redis_client = fake_redis
+
+async def test_circuit_opens_after_consecutive_failures(broken):
+    for i in range(3):
+        assert not redis_service.degraded
+        await redis_service.set(f"k{i}", i)
+    assert redis_service.degraded
+    # Falhas e o circuito aberto são atendidos pelo armazenamento local
+    assert await redis_service.get("k0") == 0
+    await redis_service.set("k3", 3)
+    assert redis_service.fallback.get("k3") == 3
+
+async def test_reconnect_merges_by_key_policy(broken):
+    await broken.set("ban:0xabc", "banned-by-other-worker")
+    await broken.set("reputation:0xabc", "from-other-worker")
+    await broken.set("counter", "10")
+    await broken.set("obsolete", "1")
+    redis_service._circuit_open = True
+
+    await redis_service.set("ban:0xabc", "banned")
+    await redis_service.set("access_details:1", {"delegatee": None})
+    await redis_service.set("reputation:0xabc", {"score": 0})
+    await redis_service.set("plain", {"v": 1}, expire=60)
+    await redis_service.increment("counter", 5)
+    await redis_service.delete("obsolete")
+
+    reconnected = []
+    async def on_reconnect():
+        reconnected.append(True)
+    redis_service.on_reconnect(on_reconnect)
+    try:
+        redis_service.redis_client = broken
+        await redis_service._check_health()
+    finally:
+        redis_service._reconnect_callbacks.remove(on_reconnect)
+
+    assert not redis_service.degraded and reconnected == [True]
+    assert await broken.get("ban:0xabc") == "banned-by-other-worker"
+    assert await broken.get("reputation:0xabc") == "from-other-worker"
+    assert not await broken.exists("access_details:1", "obsolete")
+    assert await broken.get("counter") == "15"
+    assert await redis_service.get("plain") == {"v": 1}
+    assert 0 < await broken.ttl("plain") <= 60
+
+async def test_command_errors_do_not_open_circuit(fake_redis, monkeypatch):
+    monkeypatch.setattr(Settings, "REDIS_CIRCUIT_FAILURE_THRESHOLD", 3)
+    await fake_redis.set("plain", "1")
+    before = dict(redis_service.stats_counters)
+    for _ in range(5):
+        # Id de stream inválido (ex.: cursor malformado vindo do cliente) e tipo errado
+        assert await redis_service.stream_range("audit:x", end="(garbage", reverse=True) is None
+        assert await redis_service.run_script("return redis.call('XRANGE', KEYS[1], 'x', 'y')", ["plain"], []) is None
+    assert await redis_service.increment("plain", 2) == 3
+
+    assert not redis_service.degraded
+    assert redis_service._failures == 0
+    assert redis_service.stats_counters["circuit_opens"] == before["circuit_opens"]
+    assert redis_service.stats_counters["command_errors"] == before["command_errors"] + 10
+    assert len(redis_service.fallback) == 0
+
+async def test_circuit_closes_only_after_reconnect_callbacks(fake_redis, monkeypatch):
+    # Conexão inicial falhou: gravação local enquanto o Redis estava fora
+    redis_service.redis_client = None
+    await redis_service.set("plain", "local")
+
+    async def connect():
+        redis_service.redis_client = fake_redis
+    monkeypatch.setattr(redis_service, "connect", connect)
+
+    # Requisição concorrente (outra tarefa) durante os callbacks de reconexão
+    started = asyncio.Event()
+    observed = []
+    async def request():
+        await started.wait()
+        observed.append(redis_service.degraded)
+        await redis_service.set("late", "from-request")
+    task = asyncio.create_task(request())
+
+    seen = []
+    async def on_reconnect():
+        seen.append((redis_service.degraded, await redis_service.get("plain")))
+        started.set()
+        await task
+
+    redis_service.on_reconnect(on_reconnect)
+    try:
+        await redis_service._check_health()
+    finally:
+        redis_service._reconnect_callbacks.remove(on_reconnect)
+
+    assert seen == [(False, "local")]
+    # A requisição ainda via o modo degradado, e a gravação dela também foi mesclada
+    assert observed == [True]
+    assert not redis_service.degraded
+    assert await redis_service.get("late") == "from-request"
@@ -0,0 +1,145 @@
+import asyncio
+import fakeredis
+import pytest
+from src.config.settings import Settings
+from src.services import reputation_service as reputation_module
+from src.services.codec import encode_value
+from src.services.redis_service import redis_service
+from src.services.reputation_service import ReputationService
+
+pytestmark = pytest.mark.anyio
+
+WALLET = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setattr(Settings, "REPUTATION_WRITE_BEHIND_ENABLED", True)
+    monkeypatch.setattr(Settings, "REPUTATION_INITIAL_SCORE", 100)
+    monkeypatch.setattr(Settings, "REPUTATION_SCORE_INCREMENT", 5)
+    monkeypatch.setattr(Settings, "REPUTATION_SCORE_DECREMENT", 10)
+    monkeypatch.setattr(Settings, "REPUTATION_MAX_FAILED_STREAK", 3)
+    monkeypatch.setattr(Settings, "REPUTATION_BAN_THRESHOLD_SCORE", 50)
+    monkeypatch.setattr(Settings, "REPUTATION_FLUSH_MAX_ENTRIES", 1000)
+    monkeypatch.setattr(Settings, "BAN_FILTER_ENABLED", False)
+
+async def test_update_many_retries_when_another_client_writes(fake_redis):
+    other = fakeredis.FakeRedis(server=fake_redis.fake_server)
+    attempts = []
+
+    def update(current):
+        attempts.append(current)
+        if len(attempts) == 1:
+            # Outro worker grava entre o WATCH e o EXEC
+            other.set("counter", encode_value({"n": 10}))
+        return [{"n": (current[0] or {"n": 0})["n"] + 1}]
+
+    assert await redis_service.update_many(["counter"], update)
+    assert attempts == [[None], [{"n": 10}]]
+    assert await redis_service.get("counter") == {"n": 11}
+    assert redis_service.stats_counters["watch_conflicts"] >= 1
+
+async def test_update_many_gives_up_under_persistent_contention(fake_redis):
+    other = fakeredis.FakeRedis(server=fake_redis.fake_server)
+
+    def update(current):
+        other.set("counter", encode_value({"n": 0}))
+        return [{"n": 1}]
+
+    assert not await redis_service.update_many(["counter"], update, attempts=3)
+
+async def test_write_behind_buffers_until_flush(fake_redis, settings):
+    service = ReputationService()
+    await service.update_reputation_on_success(WALLET)
+    await service.update_reputation_on_failure(WALLET)
+
+    assert await fake_redis.exists(f"reputation:{WALLET}") == 0
+    data = await service.get_reputation_data(WALLET)
+    assert (data["score"], data["total_requests"], data["total_failures"]) == (95, 2, 1)
+
+    assert await service.flush() == 1
+    assert service._pending == {}
+    stored = await redis_service.get(f"reputation:{WALLET}")
+    assert (stored["score"], stored["failed_attempts_streak"]) == (95, 1)
+
+async def test_flushes_from_two_workers_accumulate(fake_redis, settings):
+    workers = [ReputationService(), ReputationService()]
+    for worker in workers:
+        for _ in range(3):
+            await worker.update_reputation_on_success(WALLET)
+
+    assert await asyncio.gather(*(worker.flush() for worker in workers)) == [1, 1]
+    stored = await redis_service.get(f"reputation:{WALLET}")
+    assert stored["score"] == 100 + 6 * 5
+    assert stored["total_requests"] == 6
+
+async def test_failure_streak_bans_immediately(fake_redis, settings, monkeypatch):
+    announced = []
+
+    async def announce(wallet):
+        announced.append(wallet)
+
+    monkeypatch.setattr(reputation_module.ban_filter, "announce", announce)
+    service = ReputationService()
+    for _ in range(3):
+        await service.update_reputation_on_failure(WALLET)
+
+    assert announced == [WALLET]
+    assert await service.is_banned(WALLET)
+    assert 0 < await service.get_ban_ttl(WALLET) <= Settings.REPUTATION_BAN_DURATION_SECONDS
+
+@pytest.fixture
+def degraded(fake_redis, monkeypatch):
+    monkeypatch.setattr(redis_service, "_circuit_open", True)
+    return fake_redis
+
+async def test_degraded_buffer_is_bounded_and_never_flushes(degraded, settings, monkeypatch):
+    monkeypatch.setattr(Settings, "REPUTATION_WRITE_BEHIND_ENABLED", False)
+    monkeypatch.setattr(Settings, "REPUTATION_FLUSH_MAX_ENTRIES", 2)
+    monkeypatch.setattr(Settings, "REDIS_FALLBACK_MAX_KEYS", 3)
+    service = ReputationService()
+    wallets = [f"0x{i:040x}" for i in range(5)]
+    for wallet in wallets:
+        await service.update_reputation_on_failure(wallet)
+
+    assert list(service._pending) == wallets[2:]
+    assert set(service._base) <= set(wallets[2:])
+    assert service.dropped_deltas == 2
+    assert service._flush_task is None
+
+async def test_degraded_deltas_are_flushed_once_after_reconnect(degraded, settings, monkeypatch):
+    monkeypatch.setattr(Settings, "REPUTATION_WRITE_BEHIND_ENABLED", False)
+    await redis_service.redis_client.set(f"reputation:{WALLET}", encode_value({
+        "score": 200, "failed_attempts_streak": 0, "last_successful_attempt_ts": None,
+        "last_failed_attempt_ts": None, "total_requests": 40, "total_failures": 0,
+    }))
+    service = ReputationService()
+    await service.update_reputation_on_success(WALLET)
+
+    monkeypatch.setattr(redis_service, "_circuit_open", False)
+    # Ainda pendente: a carteira continua no buffer para o delta não ser aplicado duas vezes
+    await service.update_reputation_on_success(WALLET)
+    assert await service.flush() == 1
+    await service.update_reputation_on_success(WALLET)
+
+    stored = await redis_service.get(f"reputation:{WALLET}")
+    assert (stored["score"], stored["total_requests"]) == (215, 43)
+
+async def test_direct_update_does_not_overwrite_concurrent_flush(fake_redis, settings, monkeypatch):
+    monkeypatch.setattr(Settings, "REPUTATION_WRITE_BEHIND_ENABLED", False)
+    other = fakeredis.FakeRedis(server=fake_redis.fake_server)
+    apply = reputation_module._apply
+    calls = []
+
+    def apply_racing(data, delta):
+        calls.append(delta)
+        if len(calls) == 1:
+            # Flush de outro worker grava a carteira entre a leitura e a gravação
+            other.set(f"reputation:{WALLET}", encode_value(apply(data, {**delta, "score": 20, "requests": 4})))
+        return apply(data, delta)
+
+    monkeypatch.setattr(reputation_module, "_apply", apply_racing)
+    await ReputationService().update_reputation_on_success(WALLET)
+
+    stored = await redis_service.get(f"reputation:{WALLET}")
+    assert len(calls) == 2
+    assert (stored["score"], stored["total_requests"]) == (100 + 20 + 5, 5)
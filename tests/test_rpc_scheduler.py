@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.config.settings import Settings
+from src.contracts.rpc_scheduler import RPCBudgetExceeded, RPCScheduler, compute_units, priority, rpc_priority
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(Settings, "RPC_SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(Settings, "RPC_CU_PER_SECOND", 100)
+    monkeypatch.setattr(Settings, "RPC_CU_BURST", 100)
+    for name in ("INTERACTIVE", "WRITE", "BACKGROUND"):
+        monkeypatch.setattr(Settings, f"RPC_QUEUE_MAX_{name}", 10)
+        monkeypatch.setattr(Settings, f"RPC_QUEUE_TIMEOUT_{name}", 2.0)
+
+def test_compute_units_and_priority_context():
+    assert compute_units(["eth_call", "eth_sendRawTransaction", "unknown"]) == 26 + 250 + 26
+    with priority("background"):
+        assert rpc_priority.get() == "background"
+    assert rpc_priority.get() == "interactive"
+
+def test_waits_for_refill(budget):
+    scheduler = RPCScheduler()
+    scheduler.acquire(100)
+    start = time.monotonic()
+    scheduler.acquire(20)
+    assert 0.1 < time.monotonic() - start < 1
+    assert scheduler.stats()["classes"]["interactive"]["throttled"] == 1
+
+def test_times_out_and_rejects_when_queue_is_full(budget, monkeypatch):
+    monkeypatch.setattr(Settings, "RPC_QUEUE_TIMEOUT_BACKGROUND", 0.05)
+    scheduler = RPCScheduler()
+    scheduler.penalize()
+    with pytest.raises(RPCBudgetExceeded, match="tempo de espera"):
+        scheduler.acquire(50, "background")
+
+    monkeypatch.setattr(Settings, "RPC_QUEUE_MAX_BACKGROUND", 0)
+    with pytest.raises(RPCBudgetExceeded, match="fila cheia") as excinfo:
+        scheduler.acquire(50, "background")
+    assert excinfo.value.retry_after == 0.5
+    counters = scheduler.stats()["classes"]["background"]
+    assert (counters["timeouts"], counters["rejected"]) == (1, 1)
+
+def test_interactive_goes_before_waiting_background(budget):
+    scheduler = RPCScheduler()
+    scheduler.penalize()
+    order = []
+
+    def call(name):
+        scheduler.acquire(50, name)
+        order.append(name)
+
+    background = threading.Thread(target=call, args=("background",))
+    background.start()
+    while not scheduler.stats()["classes"]["background"]["queue_depth"]:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=call, args=("interactive",))
+    interactive.start()
+    background.join()
+    interactive.join()
+    assert order == ["interactive", "background"]
+
+@pytest.mark.anyio
+async def test_never_blocks_the_event_loop(budget):
+    scheduler = RPCScheduler()
+    scheduler.acquire(60)
+
+    start = time.monotonic()
+    with pytest.raises(RPCBudgetExceeded, match="event loop"):
+        scheduler.acquire(60)
+    assert time.monotonic() - start < 0.05
+    assert scheduler.stats()["classes"]["interactive"]["loop_rejected"] == 1
+
+    # Fora do loop (asyncio.to_thread) a mesma chamada espera o saldo
+    await asyncio.to_thread(scheduler.acquire, 60)
@@ -0,0 +1,63 @@
+import asyncio
+import time
+import pytest
+from eth_account import Account
+from src.services.signing_service import SigningService, sign_transaction
+
+pytestmark = pytest.mark.anyio
+
+PRIVATE_KEY = "0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d"
+SENDER = Account.from_key(PRIVATE_KEY).address
+
+def make_txs(count: int) -> list:
+    return [
+        {
+            "to": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
+            "value": 0,
+            "gas": 21000,
+            "maxFeePerGas": 2 * 10**9,
+            "maxPriorityFeePerGas": 10**9,
+            "nonce": nonce,
+            "chainId": 137,
+        }
+        for nonce in range(count)
+    ]
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_sign_many_matches_serial_signing_in_order(kind):
+    service = SigningService(kind=kind, size=3)
+    txs = make_txs(10)
+    try:
+        signed = await service.sign_many(txs, PRIVATE_KEY)
+    finally:
+        await service.shutdown()
+
+    assert signed == [sign_transaction(tx, PRIVATE_KEY) for tx in txs]
+    for raw, _ in signed:
+        assert Account.recover_transaction(raw) == SENDER
+
+async def test_sign_many_empty_and_smaller_than_pool():
+    service = SigningService(kind="thread", size=8)
+    try:
+        assert await service.sign_many([], PRIVATE_KEY) == []
+        assert len(await service.sign_many(make_txs(3), PRIVATE_KEY)) == 3
+        assert service._executor is not None
+    finally:
+        await service.shutdown()
+    assert service._executor is None
+
+async def test_shutdown_waits_without_blocking_the_event_loop():
+    service = SigningService(kind="thread", size=1)
+    loop = asyncio.get_running_loop()
+    running = loop.run_in_executor(service.executor, time.sleep, 0.3)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while not running.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(service.shutdown(), tick())
+    assert running.done() and service._executor is None
+    assert ticks > 5
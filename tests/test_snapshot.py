@@ -0,0 +1,108 @@
+import json
+import pytest
+from web3 import Web3
+from src.config.settings import Settings
+from src.contracts.iot_access_nft import IoTAccessNFT
+from src.services import snapshot_service as snapshot_module
+from src.services.snapshot_service import SnapshotService
+
+pytestmark = pytest.mark.anyio
+
+OWNER = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+DELEGATEE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+BLOCK = {"number": 100, "timestamp": 1_000}
+REVERT = {"error": {"code": 3, "message": "execution reverted"}}
+RATE_LIMITED = {"error": {"code": 429, "message": "compute units exceeded"}}
+
+class FakeChain:
+    """Responde o lote de eth_call do snapshot para os tokens 1..`minted`"""
+
+    def __init__(self, contract, minted: int):
+        self.codec = contract.w3.codec
+        self.selectors = {
+            contract.contract.encodeABI(fn_name=name, args=[0])[:10]: name
+            for name in ("ownerOf", "tokenURI", "accessControl")
+        }
+        self.minted = minted
+        self.failures = {}  # token_id -> respostas de erro ainda a devolver
+        self.batches = 0
+
+    def encode(self, types, values) -> dict:
+        return {"result": "0x" + self.codec.encode(types, values).hex()}
+
+    def respond(self, call) -> dict:
+        data = call[1][0]["data"]
+        name, token_id = self.selectors[data[:10]], int(data[10:], 16)
+        if self.failures.get(token_id):
+            return self.failures[token_id].pop(0)
+        if token_id > self.minted:
+            return REVERT
+        if name == "ownerOf":
+            return self.encode(["address"], [OWNER])
+        if name == "tokenURI":
+            return self.encode(["string"], [f"ipfs://{token_id}"])
+        return self.encode(["address", "uint256"], [DELEGATEE, 2_000] if token_id == 1 else ["0x" + "00" * 20, 0])
+
+    def batch_rpc_responses(self, calls):
+        self.batches += 1
+        return [self.respond(call) for call in calls]
+
+@pytest.fixture
+def service():
+    service = SnapshotService()
+    service.contract = IoTAccessNFT(w3=Web3(), version=1)
+    return service
+
+@pytest.fixture
+def chain(service, monkeypatch):
+    chain = FakeChain(service.contract, minted=5)
+    monkeypatch.setattr(snapshot_module, "batch_rpc_responses", chain.batch_rpc_responses)
+    monkeypatch.setattr(snapshot_module.asyncio, "sleep", _no_sleep)
+    monkeypatch.setattr(Settings, "SNAPSHOT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(Settings, "SNAPSHOT_RETRIES", 2)
+    return chain
+
+async def _no_sleep(_):
+    pass
+
+async def collect(service, **kwargs) -> list:
+    lines = b"".join([chunk async for chunk in service.stream(BLOCK, **kwargs)]).splitlines()
+    return [json.loads(line) for line in lines]
+
+async def test_stream_ends_at_first_revert_with_trailer(service, chain):
+    lines = await collect(service)
+    assert [line["token_id"] for line in lines[:-1]] == [1, 2, 3, 4, 5]
+    assert lines[0]["delegatee"] == DELEGATEE and lines[0]["is_active"] is True
+    assert lines[1]["delegatee"] is None and lines[1]["is_active"] is False
+    assert lines[-1] == {"complete": True, "last_token_id": 5}
+
+async def test_range_trailer(service, chain):
+    lines = await collect(service, from_id=2, to_id=3)
+    assert lines[-1] == {"complete": True, "last_token_id": 3}
+    assert len(lines) == 3
+
+async def test_empty_collection_still_has_trailer(service, chain):
+    chain.minted = 0
+    assert await collect(service) == [{"complete": True, "last_token_id": None}]
+
+async def test_provider_error_mid_chunk_is_retried(service, chain):
+    chain.failures[3] = [RATE_LIMITED]
+    lines = await collect(service)
+    assert [line["token_id"] for line in lines[:-1]] == [1, 2, 3, 4, 5]
+    assert lines[-1]["complete"] is True
+
+async def test_persistent_error_ends_with_error_line(service, chain):
+    chain.failures[3] = [RATE_LIMITED] * 10
+    lines = await collect(service)
+    # Nada do lote com erro é emitido e o trailer diz onde parou
+    assert [line["token_id"] for line in lines[:-1]] == [1, 2]
+    assert lines[-1]["complete"] is False
+    assert lines[-1]["last_token_id"] == 2
+    assert "compute units" in lines[-1]["error"]
+
+async def test_whole_batch_failure_ends_with_error_line(service, chain, monkeypatch):
+    def rejected(calls):
+        raise RuntimeError("batch too large")
+    monkeypatch.setattr(snapshot_module, "batch_rpc_responses", rejected)
+    lines = await collect(service)
+    assert lines == [{"complete": False, "error": "batch too large", "last_token_id": None}]
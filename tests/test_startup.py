@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from src.contracts.abis import iot_access_nft_abi, iot_access_nft_v2_abi
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ABIS_DIR = os.path.join(ROOT, "src", "contracts", "abis")
+
+@pytest.mark.parametrize("module, json_file", [
+    (iot_access_nft_abi, "IoTAccessNFT.json"),
+    (iot_access_nft_v2_abi, "IoTAccessNFTV2.json"),
+])
+def test_abi_module_matches_compiler_output(module, json_file):
+    with open(os.path.join(ABIS_DIR, json_file)) as f:
+        assert module.abi == json.load(f)
+
+def test_importing_the_app_has_no_chain_side_effects():
+    # Processo separado: outros testes podem já ter criado o cliente
+    code = (
+        "import src.routes.api\n"
+        "from src.contracts.chain_client import _get_session, get_web3\n"
+        "assert get_web3.cache_info().currsize == 0\n"
+        "assert _get_session.cache_info().currsize == 0\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT,
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
@@ -0,0 +1,107 @@
+import time
+import pytest
+from eth_account import Account
+from src.config.settings import Settings
+from src.services.redis_service import redis_service
+from src.services.ticket_service import TicketService
+from src.services.ticket_verifier import InvalidTicket, TicketVerifier, decode_ticket, encode_ticket, sign_revocation_list
+
+pytestmark = pytest.mark.anyio
+
+SIGNING_KEY = "0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d"
+OTHER_KEY = "0x5de4111afa1a4b94908f83103eb1f1706367c2e68ca870fc3fb9a804cdab365a"
+HOLDER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(Settings, "TICKET_SIGNING_KEY", SIGNING_KEY)
+    monkeypatch.setattr(Settings, "TICKET_MAX_TTL_SECONDS", 300)
+    return TicketService()
+
+@pytest.fixture
+def verifier(service):
+    return TicketVerifier(service.issuer, service.domain)
+
+def test_issued_ticket_verifies_locally(service, verifier):
+    issued = service.issue(7, HOLDER, None, 0)
+    claims = verifier.verify(issued["ticket"], token_id=7, holder=HOLDER.lower())
+    assert claims["tokenId"] == 7 and claims["expiresAt"] == issued["expires_at"]
+    assert service.issuer == Account.from_key(SIGNING_KEY).address
+
+def test_delegatee_ticket_ends_before_the_delegation(service):
+    now = int(time.time())
+    issued = service.issue(7, HOLDER, HOLDER, now + 100)
+    assert issued["expires_at"] == now + 100 - 30
+    assert service.issue(7, HOLDER, HOLDER, now + 10) is None
+
+@pytest.mark.parametrize("check, reason", [
+    (dict(token_id=8), "token"),
+    (dict(holder="0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"), "portador"),
+    (dict(now=301), "expirado"),
+    (dict(now=-100), "emitido no futuro"),
+])
+def test_claims_are_enforced(service, verifier, check, reason):
+    issued = service.issue(7, HOLDER, None, 0)
+    if "now" in check:
+        # Deslocamento relativo à emissão
+        check = {"now": issued["issued_at"] + check["now"]}
+    with pytest.raises(InvalidTicket) as excinfo:
+        verifier.verify(issued["ticket"], **check)
+    assert excinfo.value.reason == reason
+
+def test_tampered_or_foreign_tickets_are_rejected(service, verifier):
+    ticket = service.issue(7, HOLDER, None, 0)["ticket"]
+    message, signature = decode_ticket(ticket)
+    with pytest.raises(InvalidTicket):
+        verifier.verify(encode_ticket({**message, "tokenId": 8}, signature))
+    with pytest.raises(InvalidTicket, match="formato"):
+        verifier.verify(ticket[:-4])
+
+    other = TicketVerifier(Account.from_key(OTHER_KEY).address, service.domain)
+    with pytest.raises(InvalidTicket, match="emissor"):
+        other.verify(ticket)
+
+async def test_revocation_list_rejects_earlier_tickets(fake_redis, service, verifier):
+    old = service.issue(7, HOLDER, None, 0)["ticket"]
+    await service.revoke(7)
+    assert verifier.load_revocations(await service.revocation_list())
+    with pytest.raises(InvalidTicket, match="revogado"):
+        verifier.verify(old)
+    # Tickets de outros tokens continuam valendo
+    verifier.verify(service.issue(8, HOLDER, None, 0)["ticket"])
+
+def test_older_list_does_not_undo_revocations(service, verifier):
+    now = int(time.time())
+    newer = sign_revocation_list({7: now}, now, service.domain, SIGNING_KEY)
+    older = sign_revocation_list({}, now - 60, service.domain, SIGNING_KEY)
+    assert verifier.load_revocations(newer)
+    assert not verifier.load_revocations(older)
+    assert verifier.revoked == {7: now}
+
+def test_forged_list_is_rejected(service, verifier):
+    now = int(time.time())
+    forged = sign_revocation_list({}, now, service.domain, OTHER_KEY)
+    with pytest.raises(InvalidTicket, match="emissor"):
+        verifier.load_revocations(forged)
+    tampered = sign_revocation_list({7: now}, now, service.domain, SIGNING_KEY)
+    tampered["entries"] = []
+    with pytest.raises(InvalidTicket):
+        verifier.load_revocations(tampered)
+
+def test_stale_revocation_list_fails_closed(service):
+    verifier = TicketVerifier(service.issuer, service.domain, max_revocation_age=60)
+    with pytest.raises(InvalidTicket, match="desatualizada"):
+        verifier.verify(service.issue(7, HOLDER, None, 0)["ticket"])
+
+async def test_revocations_survive_redis_outage(fake_redis, service, verifier, monkeypatch):
+    monkeypatch.setattr(redis_service, "_circuit_open", True)
+    await service.revoke(7)
+    assert service.stats()["unsynced_revocations"] == 1
+    # A lista servida durante a queda já inclui a revogação local
+    assert [entry[0] for entry in (await service.revocation_list())["entries"]] == [7]
+
+    monkeypatch.setattr(redis_service, "_circuit_open", False)
+    assert await service.flush() == 1
+    assert service.stats()["unsynced_revocations"] == 0
+    assert verifier.load_revocations(await service.revocation_list())
+    assert 7 in verifier.revoked
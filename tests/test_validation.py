@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from web3.exceptions import ContractLogicError
+from src.config.settings import Settings
+from src.services import validation_service
+from src.services.token_index import TokenIndex
+from src.services.validation_service import normalize_address, token_missing, validate_access_request
+
+pytestmark = pytest.mark.anyio
+
+class FakeOwnerOf:
+    """Contrato com tokens 1..minted; `error` simula falha de rede"""
+
+    def __init__(self, minted: int):
+        self.minted = minted
+        self.error = None
+        self.calls = []
+        self.contract = SimpleNamespace(functions=SimpleNamespace(ownerOf=self._owner_of))
+
+    def _owner_of(self, token_id):
+        def call():
+            self.calls.append(token_id)
+            if self.error:
+                raise self.error
+            if token_id > self.minted:
+                raise ContractLogicError("execution reverted: ERC721NonexistentToken")
+            return "0x" + "11" * 20
+        return SimpleNamespace(call=call)
+
+@pytest.fixture
+def index(monkeypatch):
+    index = TokenIndex()
+    index.contract = FakeOwnerOf(minted=10)
+    index.observe(10)
+    monkeypatch.setattr(validation_service, "token_index", index)
+    monkeypatch.setattr(Settings, "TOKEN_INDEX_PROBE_WINDOW", 100)
+    monkeypatch.setattr(Settings, "TOKEN_INDEX_MISSING_TTL_SECONDS", 60.0)
+    return index
+
+def test_normalize_address():
+    lower = "0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266"
+    assert normalize_address(lower) == "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+    assert normalize_address("0xF39fd6e51aad88F6F4ce6aB8827279cffFb92266") is None  # checksum errado
+    assert normalize_address("0x123") is None
+
+async def test_invalid_address_is_rejected(index):
+    with pytest.raises(HTTPException) as error:
+        await validate_access_request(1, "not-an-address")
+    assert error.value.status_code == 400
+
+async def test_known_tokens_and_far_ids_need_no_rpc(index):
+    assert not await token_missing(1)
+    assert not await token_missing(10)
+    assert await token_missing(0)
+    assert await token_missing(10 + 101)
+    assert index.contract.calls == []
+
+async def test_token_minted_elsewhere_is_confirmed_on_chain(index):
+    index.contract.minted = 15
+    assert not await token_missing(15)
+    assert index.contract.calls == [15]
+    assert index.max_token_id == 15
+    # Já observado: sem nova consulta
+    assert not await token_missing(12)
+    assert index.contract.calls == [15]
+
+async def test_missing_probe_is_cached_for_higher_ids(index):
+    with pytest.raises(HTTPException) as error:
+        await validate_access_request(20, "0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266")
+    assert error.value.status_code == 404
+    assert await token_missing(50)
+    assert index.contract.calls == [20]
+    # Ids abaixo do inexistente confirmado ainda são consultados
+    assert await token_missing(11)
+    assert index.contract.calls == [20, 11]
+
+async def test_probe_failure_does_not_reject(index):
+    index.contract.error = ConnectionError("timeout")
+    assert not await token_missing(11)
+    assert index.max_token_id == 10